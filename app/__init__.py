@@ -0,0 +1,4 @@
+import time
+
+# Start of the application import, for the startup profile in app.lifespan.
+IMPORT_STARTED_AT = time.perf_counter()
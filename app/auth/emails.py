@@ -0,0 +1,64 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.model import User
+from app.database import session_scope
+from app.jobs import jobs
+from app.mail import send_email
+from app.utils.auth import create_verification_token
+
+# Token emails only store the username in the outbox; the token itself is
+# minted when the email is sent, so it never sits in the ``jobs`` table.
+VERIFICATION_EMAIL = "email.verification"
+RESET_PASSWORD_EMAIL = "email.reset_password"
+
+
+def verification_email(user: User, token: str) -> dict:
+    return {
+        "to": user.email,
+        "subject": "Verify your email",
+        "body": (
+            f"Hi {user.first_name},\n\n"
+            f"Use this token to verify your email address:\n\n{token}\n\n"
+            "It expires in 15 minutes.\n"
+        ),
+    }
+
+
+def reset_password_email(user: User, token: str) -> dict:
+    return {
+        "to": user.email,
+        "subject": "Reset your password",
+        "body": (
+            f"Hi {user.first_name},\n\n"
+            f"Use this token to reset your password:\n\n{token}\n\n"
+            "It expires in 15 minutes. If you did not ask for a reset, "
+            "ignore this email.\n"
+        ),
+    }
+
+
+def queue_verification_email(db: AsyncSession, user: User) -> None:
+    jobs.enqueue(db, VERIFICATION_EMAIL, {"username": user.username})
+
+
+def queue_reset_password_email(db: AsyncSession, user: User) -> None:
+    jobs.enqueue(db, RESET_PASSWORD_EMAIL, {"username": user.username})
+
+
+async def _send_token_email(username: str, token_type: str, build) -> None:
+    async with session_scope(read_only=True) as db:
+        user = await db.scalar(select(User).where(User.username == username))
+    if user is None:
+        return
+    await send_email(build(user, create_verification_token(username, token_type)))
+
+
+@jobs.handler(VERIFICATION_EMAIL)
+async def send_verification_email(payload: dict) -> None:
+    await _send_token_email(payload["username"], "verification", verification_email)
+
+
+@jobs.handler(RESET_PASSWORD_EMAIL)
+async def send_reset_password_email(payload: dict) -> None:
+    await _send_token_email(payload["username"], "reset", reset_password_email)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Request
+
+from app.config import get_settings
+from app.utils.auth import keyring
+from app.utils.conditional import conditional_response, make_etag
+
+settings = get_settings()
+
+router = APIRouter(tags=["auth"])
+
+
+@router.get("/.well-known/jwks.json")
+def jwks(request: Request):
+    """Public keys that verify access tokens; empty while they are HS-signed."""
+    body = keyring.jwks() if keyring is not None else {"keys": []}
+    entry = {
+        "body": body,
+        "etag": make_etag(key["kid"] for key in body["keys"]),
+        "last_modified": None,
+    }
+    return conditional_response(request, entry, settings.JWKS_CACHE_CONTROL)
@@ -1,30 +1,50 @@
+import asyncio
+
 from fastapi import status, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.emails import queue_reset_password_email, queue_verification_email
 from app.auth.model import User
 from app.auth.schema import (
+    AuthPrincipal,
     ChangePasswordSchema,
+    LogoutSchema,
     ResetPasswordSchema,
     SendTokenSchema,
     SigninSchema,
     SignupSchema,
     VerifyEmailSchema,
 )
-from app.utils.auth import create_verification_token, verify_verification_token
-from app.utils.hashing import HashPassword
+from app.utils.auth import (
+    invalidate_user,
+    revoke_token,
+    verify_verification_token,
+)
+from app.utils.hashing import hashing_service
 
 
-def signup_repository(request: SignupSchema, db: Session):
-    if db.query(User).filter(User.email == request.email).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Email already in used"
-        )
-    if db.query(User).filter(User.username == request.username).first():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Username already in used"
+def _already_used(field: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{field.capitalize()} already in used",
+    )
+
+
+async def signup_repository(request: SignupSchema, db: AsyncSession):
+    taken = (
+        await db.execute(
+            select(User.email, User.username).where(
+                or_(User.email == request.email, User.username == request.username)
+            )
         )
-    password_context = HashPassword()
-    hashed_password = password_context.get_hash_password(request.password)
+    ).all()
+    if any(email == request.email for email, _ in taken):
+        raise _already_used("email")
+    if taken:
+        raise _already_used("username")
+    hashed_password = await hashing_service.hash(request.password)
     user = User(
         first_name=request.first_name,
         last_name=request.last_name,
@@ -33,13 +53,17 @@ def signup_repository(request: SignupSchema, db: Session):
         password=hashed_password,
     )
     db.add(user)
-    db.commit()
-    token = create_verification_token(user.username)
-    return token
+    queue_verification_email(db, user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        # Lost a race with a concurrent signup; the unique indexes decide.
+        await db.rollback()
+        raise _already_used("email" if "email" in str(e.orig) else "username")
 
 
-def signin_repository(request: SigninSchema, db: Session):
-    user = db.query(User).filter(User.email == request.email).first()
+async def signin_repository(request: SigninSchema, db: AsyncSession):
+    user = await db.scalar(select(User).where(User.email == request.email))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong credentials"
@@ -52,75 +76,96 @@ def signin_repository(request: SigninSchema, db: Session):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User is not active"
         )
-    password_context = HashPassword()
-    if not password_context.verify_hash_password(request.password, user.password):
+    if not await hashing_service.verify(request.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Wrong credentials"
         )
     return user
 
 
-def change_password_repository(request: ChangePasswordSchema, db: Session, user: User):
-    password_context = HashPassword()
-    auth_user = db.query(User).filter(User.id == user.id).first()
+async def change_password_repository(
+    request: ChangePasswordSchema, db: AsyncSession, user: AuthPrincipal
+):
+    auth_user = await db.get(User, user.id)
     if request.password1 != request.password2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password1 and password2 must be same",
         )
-    if not password_context.verify_hash_password(
-        request.current_password, auth_user.password
-    ):
+    current_matches, new_matches = await asyncio.gather(
+        hashing_service.verify(request.current_password, auth_user.password),
+        hashing_service.verify(request.password1, auth_user.password),
+    )
+    if not current_matches:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Password mis-match"
         )
-    if password_context.verify_hash_password(request.password1, auth_user.password):
+    if new_matches:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password same as current password",
         )
-    auth_user.password = password_context.get_hash_password(request.password1)
+    auth_user.password = await hashing_service.hash(request.password1)
+    auth_user.token_version += 1
     db.add(auth_user)
-    db.commit()
+    await db.commit()
+    invalidate_user(auth_user)
 
 
-def verify_email_repository(request: VerifyEmailSchema, db: Session):
-    user = verify_verification_token(request.token)
-    auth_user = db.query(User).filter(User.id == user.id).first()
+async def verify_email_repository(request: VerifyEmailSchema, db: AsyncSession):
+    user = await verify_verification_token(request.token, db)
+    auth_user = await db.get(User, user.id)
     auth_user.verified = True
     auth_user.active = True
+    # Both are access token claims.
+    auth_user.token_version += 1
     db.add(auth_user)
-    db.commit()
+    await db.commit()
+    invalidate_user(auth_user)
 
 
-def resend_verify_email_repository(request: SendTokenSchema, db: Session):
-    user = db.query(User).filter(User.email == request.email).first()
+async def resend_verify_email_repository(request: SendTokenSchema, db: AsyncSession):
+    user = await db.scalar(select(User).where(User.email == request.email))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    token = create_verification_token(user.username)
-    return token
+    queue_verification_email(db, user)
+    await db.commit()
 
 
-def forgot_password_repository(request: SendTokenSchema, db: Session):
-    user = db.query(User).filter(User.email == request.email).first()
+async def forgot_password_repository(request: SendTokenSchema, db: AsyncSession):
+    user = await db.scalar(select(User).where(User.email == request.email))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-    token = create_verification_token(user.username, token_type="reset")
-    return token
+    queue_reset_password_email(db, user)
+    await db.commit()
 
 
-def reset_password_repository(request: ResetPasswordSchema, db: Session):
+async def reset_password_repository(request: ResetPasswordSchema, db: AsyncSession):
     if request.password1 != request.password2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Password mis-match"
         )
-    user = verify_verification_token(request.token, token_type="reset")
-    auth_user = db.query(User).filter(User.id == user.id).first()
-    password_context = HashPassword()
-    auth_user.password = password_context.get_hash_password(request.password1)
+    user = await verify_verification_token(request.token, db, token_type="reset")
+    auth_user = await db.get(User, user.id)
+    auth_user.password = await hashing_service.hash(request.password1)
+    auth_user.token_version += 1
     db.add(auth_user)
-    db.commit()
+    await db.commit()
+    invalidate_user(auth_user)
+
+
+async def logout_repository(
+    access_token: str, request: LogoutSchema, db: AsyncSession, user: AuthPrincipal
+):
+    await revoke_token(access_token, db, "access", user.id)
+    if request.refresh_token:
+        await revoke_token(request.refresh_token, db, "refresh", user.id)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Revoked concurrently elsewhere; nothing left to do.
+        await db.rollback()
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from fastapi.security.http import HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.model import User
 from app.auth.repository import (
     change_password_repository,
     forgot_password_repository,
+    logout_repository,
     resend_verify_email_repository,
     reset_password_repository,
     signin_repository,
@@ -12,8 +14,10 @@ from app.auth.repository import (
     verify_email_repository,
 )
 from app.auth.schema import (
+    AuthPrincipal,
     AuthUserSchema,
     ChangePasswordSchema,
+    LogoutSchema,
     ResetPasswordSchema,
     SendTokenSchema,
     SigninSchema,
@@ -23,11 +27,15 @@ from app.auth.schema import (
     VerifyEmailSchema,
 )
 from app.database import get_db
+from app.ratelimit import rate_limit
 from app.utils.auth import (
     create_access_token,
     create_refresh_token,
-    get_current_user,
-    validate_refresh_token,
+    get_current_principal,
+    principal_claims,
+    reuseable_oauth,
+    rotate_refresh_token,
+    version_claims,
 )
 
 
@@ -36,67 +44,110 @@ router = APIRouter(
     tags=["auth"],
 )
 
+ME_FIELDS = tuple(AuthUserSchema.model_fields)
 
-@router.post("/signup", status_code=status.HTTP_200_OK)
-def signup(request: SignupSchema, db: Session = Depends(get_db)):
-    token = signup_repository(request, db)
-    return {"detail": "Signup successfully!", "token": token}
 
+@router.post(
+    "/signup",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("signup"))],
+)
+async def signup(request: SignupSchema, db: AsyncSession = Depends(get_db)):
+    await signup_repository(request, db)
+    return {"detail": "Signup successfully!"}
 
-@router.post("/signin", status_code=status.HTTP_200_OK, response_model=TokenSchema)
-def signin(request: SigninSchema, db: Session = Depends(get_db)):
-    user = signin_repository(request, db)
+
+@router.post(
+    "/signin",
+    status_code=status.HTTP_200_OK,
+    response_model=TokenSchema,
+    dependencies=[Depends(rate_limit("signin"))],
+)
+async def signin(request: SigninSchema, db: AsyncSession = Depends(get_db)):
+    user = await signin_repository(request, db)
     return {
-        "access_token": create_access_token(user.username),
-        "refresh_token": create_refresh_token(user.username),
+        "access_token": create_access_token(
+            user.username, claims=principal_claims(user)
+        ),
+        "refresh_token": create_refresh_token(
+            user.username, claims=version_claims(user)
+        ),
     }
 
 
 @router.get("/me", status_code=status.HTTP_200_OK, response_model=AuthUserSchema)
-def me(user: User = Depends(get_current_user)):
-    return user
+async def me(user: AuthPrincipal = Depends(get_current_principal)):
+    # The principal is already validated; skip re-validating it as the model.
+    return ORJSONResponse({field: getattr(user, field) for field in ME_FIELDS})
 
 
 @router.post(
     "/token/refresh", status_code=status.HTTP_200_OK, response_model=TokenSchema
 )
-def refresh_token(request: RefreshTokenSchema, db: Session = Depends(get_db)):
-    user = validate_refresh_token(request, db)
+async def refresh_token(
+    request: RefreshTokenSchema, db: AsyncSession = Depends(get_db)
+):
+    user = await rotate_refresh_token(request, db)
     return {
-        "access_token": create_access_token(user.username),
-        "refresh_token": request.refresh_token,
+        "access_token": create_access_token(
+            user.username, claims=principal_claims(user)
+        ),
+        "refresh_token": create_refresh_token(
+            user.username, claims=version_claims(user)
+        ),
     }
 
 
+@router.post("/logout", status_code=status.HTTP_200_OK)
+async def logout(
+    request: LogoutSchema,
+    token: HTTPAuthorizationCredentials = Depends(reuseable_oauth),
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    await logout_repository(token.credentials, request, db, user)
+    return {"detail": "Logout successfully!"}
+
+
 @router.post("/change-password", status_code=status.HTTP_200_OK)
-def change_password(
+async def change_password(
     request: ChangePasswordSchema,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
 ):
-    change_password_repository(request, db, user)
+    await change_password_repository(request, db, user)
     return {"detail": "Change password successfully!"}
 
 
 @router.post("/email-verify", status_code=status.HTTP_200_OK)
-def email_verify(request: VerifyEmailSchema, db: Session = Depends(get_db)):
-    verify_email_repository(request, db)
+async def email_verify(request: VerifyEmailSchema, db: AsyncSession = Depends(get_db)):
+    await verify_email_repository(request, db)
     return {"detail": "Email verified successfully!"}
 
 
-@router.post("/resend-email", status_code=status.HTTP_200_OK)
-def resend_email(request: SendTokenSchema, db: Session = Depends(get_db)):
-    token = resend_verify_email_repository(request, db)
-    return {"detail": token}
+@router.post(
+    "/resend-email",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("resend-email"))],
+)
+async def resend_email(request: SendTokenSchema, db: AsyncSession = Depends(get_db)):
+    await resend_verify_email_repository(request, db)
+    return {"detail": "Verification email sent"}
 
 
-@router.post("/forgot-password", status_code=status.HTTP_200_OK)
-def forgot_password(request: SendTokenSchema, db: Session = Depends(get_db)):
-    token = forgot_password_repository(request, db)
-    return {"detail": token}
+@router.post(
+    "/forgot-password",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit("forgot-password"))],
+)
+async def forgot_password(request: SendTokenSchema, db: AsyncSession = Depends(get_db)):
+    await forgot_password_repository(request, db)
+    return {"detail": "Password reset email sent"}
 
 
 @router.post("/reset-password", status_code=status.HTTP_200_OK)
-def reset_password(request: ResetPasswordSchema, db: Session = Depends(get_db)):
-    reset_password_repository(request, db)
+async def reset_password(
+    request: ResetPasswordSchema, db: AsyncSession = Depends(get_db)
+):
+    await reset_password_repository(request, db)
     return {"detail": "Reset password successfully!"}
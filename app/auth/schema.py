@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, validator, Field, EmailStr
 
 
@@ -53,6 +55,10 @@ class RefreshTokenSchema(BaseModel):
     refresh_token: str
 
 
+class LogoutSchema(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class TokenSchema(BaseModel):
     access_token: str
     refresh_token: str
@@ -61,7 +67,26 @@ class TokenSchema(BaseModel):
 class VerificationTokenPayload(BaseModel):
     exp: int
     sub: str
+    jti: Optional[str] = None
 
 
 class TokenPayload(VerificationTokenPayload):
     token_type: str
+    uid: Optional[int] = None
+    ver: Optional[int] = None
+    verified: Optional[bool] = None
+    active: Optional[bool] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+
+
+class AuthPrincipal(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    verified: bool = False
+    active: bool = False
+    token_version: int = 0
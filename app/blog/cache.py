@@ -0,0 +1,129 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+
+from fastapi import Request
+
+from app.blog.queries import blog_item
+from app.cache import bump_generation, cache, generation, get_json, set_json
+from app.config import get_settings
+from app.utils.conditional import http_date, make_etag
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+ALL_BLOGS = "blogs:all"
+
+# A per-process cache never sees the other workers' invalidations, so with
+# several workers each would serve its own stale copies for CACHE_TTL_SECONDS.
+responses_cached = cache.shared or settings.WEB_CONCURRENCY <= 1
+if not responses_cached:
+    logger.warning(
+        "Blog response caching is disabled: CACHE_BACKEND=%s is per-process "
+        "and WEB_CONCURRENCY=%d; use CACHE_BACKEND=redis to enable it",
+        settings.CACHE_BACKEND,
+        settings.WEB_CONCURRENCY,
+    )
+
+
+def blog_key(id: int) -> str:
+    return f"blog:{id}"
+
+
+def owner_blogs(owner_id: int) -> str:
+    return f"blogs:owner:{owner_id}"
+
+
+def blog_validators(
+    id: int,
+    created_at: Optional[datetime],
+    updated_at: Optional[datetime],
+    thumbnail: Optional[str],
+    image_webp: Optional[str],
+) -> tuple:
+    """ETag and Last-Modified of a blog. The derivatives are recorded later
+    without touching ``updated_at``, so they are part of the ETag."""
+    modified_at = updated_at or created_at
+    etag = make_etag(("blog", id, modified_at, thumbnail, image_webp))
+    return etag, http_date(modified_at)
+
+
+async def get_cached_blog(id: int) -> Optional[dict]:
+    if not responses_cached:
+        return None
+    return await get_json(blog_key(id))
+
+
+async def cache_blog(blog) -> dict:
+    etag, last_modified = blog_validators(
+        blog.id, blog.created_at, blog.updated_at, blog.thumbnail, blog.image_webp
+    )
+    entry = {
+        "body": blog_item(blog),
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+    if responses_cached:
+        await set_json(blog_key(blog.id), entry)
+    return entry
+
+
+def _modified_at(item: dict) -> Optional[datetime]:
+    value = item.get("updated_at") or item.get("created_at")
+    # Feed items come back from JSON with ISO strings.
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def cached_page(
+    group: str, request: Request, load: Callable[[], Awaitable]
+) -> dict:
+    """Cached page of ``blog_item`` bodies, serialized straight from the
+    dicts instead of through ``Page[BlogSchema]``."""
+    key = None
+    if responses_cached:
+        url_hash = hashlib.sha1(str(request.url).encode()).hexdigest()
+        key = f"{group}:{await generation(group)}:{url_hash}"
+        entry = await get_json(key)
+        if entry is not None:
+            return entry
+    page = await load()
+    versions = [
+        (
+            item["id"],
+            _modified_at(item),
+            item.get("thumbnail"),
+            item.get("image_webp"),
+        )
+        for item in page["items"]
+    ]
+    modified_at = max(
+        (version[1] for version in versions if version[1] is not None),
+        default=None,
+    )
+    total = page.get("total")
+    entry = {
+        "body": {
+            "items": page["items"],
+            "next": page["next"],
+            "prev": page["prev"],
+            "total": total,
+        },
+        "etag": make_etag(("page", versions, page["next"], page["prev"], total)),
+        "last_modified": http_date(modified_at),
+    }
+    if key is not None:
+        await set_json(key, entry)
+    return entry
+
+
+async def invalidate_blog(id: int, owner_id: int) -> None:
+    await invalidate_blogs([id], owner_id)
+
+
+async def invalidate_blogs(ids: Iterable[int], owner_id: int) -> None:
+    """Drop cached copies of ``ids`` and bump the listing generations once."""
+    for id in ids:
+        await cache.delete(blog_key(id))
+    await bump_generation(ALL_BLOGS, owner_blogs(owner_id))
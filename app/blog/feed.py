@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from fastapi import Request
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blog.cache import ALL_BLOGS, owner_blogs
+from app.blog.model import Blog
+from app.blog.queries import BLOG_KEYSET, blog_item, blog_listing
+from app.cache import TTLCache, bump_generation, cache
+from app.cache.feeds import create_feed_store
+from app.config import get_settings
+from app.database import session_scope
+from app.jobs import jobs
+from app.pagination import CursorParams, encode_cursor, paginate
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+FEED_REBUILD = "feed.rebuild"
+ALL_FEED = "feed:all"
+
+# A feed that is missing or too short is rebuilt at most this often per
+# process, however many requests notice it.
+REBUILD_RETRY_SECONDS = 30
+
+EPOCH = datetime(1970, 1, 1)
+
+feeds = create_feed_store(
+    cache,
+    settings.FEED_MAX_LENGTH,
+    settings.FEED_TTL_SECONDS,
+    settings.FEED_MAX_FEEDS,
+)
+
+# Per-process feeds only see their own worker's writes, so with several
+# workers each would serve other workers' changes up to FEED_TTL_SECONDS late.
+feeds_enabled = settings.FEED_ENABLED and (
+    feeds.shared or settings.WEB_CONCURRENCY <= 1
+)
+if settings.FEED_ENABLED and not feeds_enabled:
+    logger.warning(
+        "Blog feeds are disabled: CACHE_BACKEND=%s is per-process and "
+        "WEB_CONCURRENCY=%d; use a shared cache backend to enable them",
+        settings.CACHE_BACKEND,
+        settings.WEB_CONCURRENCY,
+    )
+
+_requested = TTLCache("feed_rebuilds", settings.FEED_MAX_FEEDS, REBUILD_RETRY_SECONDS)
+_rebuilding: Set[asyncio.Task] = set()
+
+
+def feed_name(owner_id: Optional[int] = None) -> str:
+    return ALL_FEED if owner_id is None else f"feed:owner:{owner_id}"
+
+
+def _score(created_at) -> int:
+    # Microseconds since the epoch; exact in a Redis sorted-set score.
+    if created_at is None:
+        return 0
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    return (created_at - EPOCH) // timedelta(microseconds=1)
+
+
+def _entries(items: Iterable[dict]) -> list:
+    return [(_score(item["created_at"]), item["id"], item) for item in items]
+
+
+async def blogs_added(owner_id: int, items: List[dict]) -> None:
+    """Push newly created blogs (``blog_item`` bodies) onto their feeds."""
+    if feeds_enabled:
+        entries = _entries(items)
+        for name in (ALL_FEED, feed_name(owner_id)):
+            await feeds.add(name, entries)
+
+
+async def blogs_changed(owner_id: int, changes: Dict[int, dict]) -> None:
+    """Apply changed fields of existing blogs to their feed items."""
+    if feeds_enabled:
+        for name in (ALL_FEED, feed_name(owner_id)):
+            await feeds.merge(name, changes)
+
+
+async def blogs_removed(owner_id: int, ids: Iterable[int]) -> None:
+    if feeds_enabled:
+        ids = list(ids)
+        for name in (ALL_FEED, feed_name(owner_id)):
+            await feeds.remove(name, ids)
+
+
+async def rebuild_feed(owner_id: Optional[int] = None, attempts: int = 3) -> None:
+    """Rebuild a feed from the ``blogs`` table.
+
+    Retried when a write lands between reading the table and storing the
+    result, since storing would drop that write. Cached pages are dropped
+    afterwards so they pick up the feed's ``total``.
+    """
+    name = feed_name(owner_id)
+    criteria = () if owner_id is None else (Blog.owner_id == owner_id,)
+    stmt = (
+        blog_listing(*criteria)
+        .order_by(*(column.desc() for column in BLOG_KEYSET))
+        .limit(settings.FEED_MAX_LENGTH)
+    )
+    count = select(func.count()).select_from(Blog).where(*criteria)
+    for _ in range(attempts):
+        version = await feeds.version(name)
+        async with session_scope() as db:
+            rows = (await db.execute(stmt)).all()
+            total = await db.scalar(count)
+        if await feeds.replace(name, _entries(map(blog_item, rows)), total, version):
+            await bump_generation(
+                ALL_BLOGS if owner_id is None else owner_blogs(owner_id)
+            )
+            return
+    raise RuntimeError(f"Feed {name} kept changing while being rebuilt")
+
+
+@jobs.handler(FEED_REBUILD)
+async def rebuild_feed_job(payload: dict) -> None:
+    await rebuild_feed(payload.get("owner_id"))
+
+
+async def _rebuild_in_process(owner_id: Optional[int]) -> None:
+    try:
+        await rebuild_feed(owner_id)
+    except Exception:
+        logger.exception("Rebuilding %s failed", feed_name(owner_id))
+
+
+async def request_rebuild(owner_id: Optional[int] = None) -> None:
+    """Have a feed rebuilt in the background.
+
+    Shared feeds go through the job queue. Per-process feeds are rebuilt by
+    a task in this process, since only its own copy would be filled.
+    """
+    name = feed_name(owner_id)
+    if _requested.get(name):
+        return
+    _requested.set(name, True)
+    if not feeds.shared:
+        task = asyncio.create_task(_rebuild_in_process(owner_id))
+        _rebuilding.add(task)
+        task.add_done_callback(_rebuilding.discard)
+        return
+    try:
+        async with session_scope() as db:
+            jobs.enqueue(db, FEED_REBUILD, {"owner_id": owner_id})
+            await db.commit()
+    except Exception:
+        logger.exception("Could not queue a rebuild of %s", name)
+
+
+async def listing_page(
+    db: AsyncSession,
+    stmt: Select,
+    params: CursorParams,
+    request: Request,
+    owner_id: Optional[int] = None,
+    include: FrozenSet[str] = frozenset(),
+) -> dict:
+    """A page of ``blog_item`` bodies with the listing's ``total``.
+
+    First pages of plain listings are served from the feed without
+    touching the database; other pages run ``stmt`` through keyset
+    pagination. ``total`` comes from the feed's count either way and is
+    ``None`` while the feed is being built.
+    """
+    snapshot = None
+    if feeds_enabled:
+        from_feed = not params.cursor and not include
+        snapshot = await feeds.read(
+            feed_name(owner_id), params.limit if from_feed else 0
+        )
+        if snapshot is None or from_feed and not snapshot.covers(params.limit):
+            await request_rebuild(owner_id)
+        elif from_feed:
+            items = snapshot.items[: params.limit]
+            page = {"items": items, "next": None, "prev": None}
+            if items and snapshot.total > len(items):
+                last = items[-1]
+                cursor = encode_cursor((last["created_at"], last["id"]))
+                page["next"] = str(request.url.include_query_params(cursor=cursor))
+            page["total"] = snapshot.total
+            return page
+
+    page = await paginate(db, stmt, BLOG_KEYSET, params, request)
+    page["items"] = [blog_item(blog) for blog in page["items"]]
+    page["total"] = snapshot and snapshot.total
+    return page
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -9,10 +9,17 @@ class Blog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    image = Column(String, index=True)
-    description = Column(String, index=True)
+    image = Column(String)
+    thumbnail = Column(String, nullable=True)
+    image_webp = Column(String, nullable=True)
+    description = Column(String)
     created_at = Column(DateTime, nullable=True)
     updated_at = Column(DateTime, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
 
     owner = relationship("User", back_populates="blogs")
+
+    __table_args__ = (
+        Index("ix_blogs_created_at_id", "created_at", "id"),
+        Index("ix_blogs_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
@@ -1,29 +1,92 @@
+from collections import defaultdict
 from datetime import datetime
-from fastapi import APIRouter, status, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.auth.model import User
+from typing import Iterable, List
 
-from app.blog.schema import Blog as BlogSchema, CreateBlog as CreateBlogSchema
-from app.database import get_db
+from fastapi import (
+    APIRouter,
+    status,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+)
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from app.auth.schema import AuthPrincipal
+
+from app.blog.cache import (
+    ALL_BLOGS,
+    blog_validators,
+    cache_blog,
+    cached_page,
+    get_cached_blog,
+    invalidate_blog,
+    invalidate_blogs,
+    owner_blogs,
+)
+from app.blog.feed import blogs_added, blogs_changed, blogs_removed, listing_page
+from app.blog.queries import BLOG_COLUMNS, blog_item, blog_listing
+from app.blog.schema import (
+    Blog as BlogSchema,
+    BlogWithOwner as BlogWithOwnerSchema,
+    BulkCreateBlogs as BulkCreateBlogsSchema,
+    BulkDeleteBlogs as BulkDeleteBlogsSchema,
+    BulkItemResult,
+    BulkResult,
+    BulkUpdateBlogs as BulkUpdateBlogsSchema,
+    CreateBlog as CreateBlogSchema,
+)
+from app.database import get_db, get_read_db
+from app.media.derivatives import queue_blog_images
+from app.media.model import Media
 from app.blog.model import Blog
-from app.utils.auth import get_current_user
-from app.utils.checks import get_blog_by_id
-from app.utils.upload import upload_file
+from app.pagination import CursorParams, Page
+from app.search import search_backend
+from app.search.schema import BlogSearchResult
+from app.utils.auth import get_current_principal
+from app.config import get_settings
+from app.utils.checks import get_blog_by_id, get_blog_row, get_blog_version
+from app.utils.conditional import (
+    conditional_response,
+    is_conditional,
+    not_modified,
+    not_modified_response,
+)
+from app.utils.query import include_param
+from app.utils.upload import remove_on_error, upload_file
 
 router = APIRouter(tags=["blogs"], prefix="/blogs")
 
+settings = get_settings()
+
+
+blog_includes = include_param("owner")
 
-@router.get("/", response_model=List[BlogSchema], status_code=status.HTTP_200_OK)
-def all_blogs(db: Session = Depends(get_db)):
-    return db.query(Blog).all()
+
+@router.get(
+    "/", response_model=Page[BlogWithOwnerSchema], status_code=status.HTTP_200_OK
+)
+async def all_blogs(
+    request: Request,
+    page: CursorParams = Depends(),
+    include: frozenset = Depends(blog_includes),
+    db: AsyncSession = Depends(get_read_db),
+):
+    stmt = blog_listing(include=include)
+    entry = await cached_page(
+        ALL_BLOGS,
+        request,
+        lambda: listing_page(db, stmt, page, request, include=include),
+    )
+    return conditional_response(request, entry, settings.BLOG_CACHE_CONTROL)
 
 
 @router.post("/", response_model=BlogSchema, status_code=status.HTTP_201_CREATED)
-def create_blog(
+async def create_blog(
     request: CreateBlogSchema,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
 ):
     blog = Blog(
         title=request.title,
@@ -31,34 +94,333 @@ def create_blog(
         created_at=datetime.now(),
         owner_id=user.id,
     )
-    blog.image = upload_file(request.image)
-    db.add(blog)
-    db.commit()
-    db.refresh(blog)
+    if request.media_id:
+        media = await db.get(Media, request.media_id)
+        if media is None or media.owner_id != user.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Media not found"
+            )
+        blog.image = media.path
+    elif not request.image:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either image or media_id is required",
+        )
+    with remove_on_error() as written:
+        if blog.image is None:
+            blog.image = await run_in_threadpool(
+                upload_file, request.image, max_bytes=settings.MEDIA_MAX_BYTES
+            )
+            written.append(blog.image)
+        db.add(blog)
+        await db.flush()
+        await search_backend.index(db, blog)
+        queue_blog_images(db, [blog.id], blog.image)
+        await db.commit()
+    await invalidate_blog(blog.id, blog.owner_id)
+    await blogs_added(blog.owner_id, [blog_item(blog)])
     return blog
 
 
 @router.get(
-    "/my-blogs", response_model=List[BlogSchema], status_code=status.HTTP_200_OK
+    "/my-blogs",
+    response_model=Page[BlogWithOwnerSchema],
+    status_code=status.HTTP_200_OK,
+)
+async def my_blogs(
+    request: Request,
+    page: CursorParams = Depends(),
+    include: frozenset = Depends(blog_includes),
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    stmt = blog_listing(Blog.owner_id == user.id, include=include)
+    entry = await cached_page(
+        owner_blogs(user.id),
+        request,
+        lambda: listing_page(db, stmt, page, request, user.id, include),
+    )
+    return conditional_response(request, entry, settings.PRIVATE_CACHE_CONTROL)
+
+
+@router.get(
+    "/search", response_model=Page[BlogSearchResult], status_code=status.HTTP_200_OK
 )
-def my_blogs(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(Blog).filter(Blog.owner_id == user.id)
+async def search_blogs(
+    request: Request,
+    q: str = Query(min_length=1, max_length=100),
+    limit: int = Query(
+        default=settings.PAGINATION_DEFAULT_LIMIT,
+        ge=1,
+        le=settings.PAGINATION_MAX_LIMIT,
+    ),
+    offset: int = Query(default=0, ge=0, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+):
+    rows = await search_backend.search(db, q, limit + 1, offset)
+    page = {"items": rows[:limit], "next": None, "prev": None}
+    if len(rows) > limit:
+        page["next"] = str(request.url.include_query_params(offset=offset + limit))
+    if offset:
+        page["prev"] = str(
+            request.url.include_query_params(offset=max(offset - limit, 0))
+        )
+    return page
+
+
+def _check_batch_size(size: int) -> None:
+    if size > settings.BLOG_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"At most {settings.BLOG_BULK_MAX_ITEMS} items per request",
+        )
+
+
+def _bulk_result(results: List[BulkItemResult]) -> BulkResult:
+    failed = sum(result.status >= 400 for result in results)
+    return BulkResult(succeeded=len(results) - failed, failed=failed, results=results)
+
+
+def _search_rows(rows: Iterable[dict]) -> List[dict]:
+    return [
+        {"id": row["id"], "title": row["title"], "description": row["description"]}
+        for row in rows
+    ]
+
+
+@router.post("/bulk", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_create_blogs(
+    request: BulkCreateBlogsSchema,
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    """Create many blogs in one transaction; failures are reported per item."""
+    _check_batch_size(len(request.items))
+    media_ids = {item.media_id for item in request.items if item.media_id}
+    media_paths = {}
+    if media_ids:
+        media_paths = dict(
+            (
+                await db.execute(
+                    select(Media.id, Media.path).where(
+                        Media.id.in_(media_ids), Media.owner_id == user.id
+                    )
+                )
+            ).all()
+        )
+
+    now = datetime.now()
+    results: List[BulkItemResult] = []
+    rows, row_results = [], []
+    with remove_on_error() as written:
+        for index, item in enumerate(request.items):
+            if item.media_id:
+                image = media_paths.get(item.media_id)
+                if image is None:
+                    results.append(
+                        BulkItemResult(
+                            index=index,
+                            status=status.HTTP_400_BAD_REQUEST,
+                            detail="Media not found",
+                        )
+                    )
+                    continue
+            elif item.image:
+                try:
+                    image = await run_in_threadpool(
+                        upload_file, item.image, max_bytes=settings.MEDIA_MAX_BYTES
+                    )
+                    written.append(image)
+                except HTTPException as exc:
+                    results.append(
+                        BulkItemResult(
+                            index=index, status=exc.status_code, detail=exc.detail
+                        )
+                    )
+                    continue
+            else:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        status=status.HTTP_400_BAD_REQUEST,
+                        detail="Either image or media_id is required",
+                    )
+                )
+                continue
+            rows.append(
+                {
+                    "title": item.title,
+                    "description": item.description,
+                    "image": image,
+                    "created_at": now,
+                    "owner_id": user.id,
+                }
+            )
+            row_results.append(
+                BulkItemResult(index=index, status=status.HTTP_201_CREATED)
+            )
+            results.append(row_results[-1])
+
+        if rows:
+            ids = (
+                await db.scalars(
+                    insert(Blog).returning(Blog.id, sort_by_parameter_order=True), rows
+                )
+            ).all()
+            by_image = defaultdict(list)
+            for row, result, id in zip(rows, row_results, ids):
+                row["id"] = result.id = id
+                by_image[row["image"]].append(id)
+            await search_backend.index_many(db, _search_rows(rows))
+            for path, blog_ids in by_image.items():
+                queue_blog_images(db, blog_ids, path)
+            await db.commit()
+    if rows:
+        await invalidate_blogs(ids, user.id)
+        await blogs_added(user.id, [blog_item(row) for row in rows])
+    return _bulk_result(results)
+
+
+@router.patch("/bulk", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_update_blogs(
+    request: BulkUpdateBlogsSchema,
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    """Update many blogs with one ownership query and one bulk UPDATE."""
+    _check_batch_size(len(request.items))
+    existing = {
+        row.id: row
+        for row in await db.execute(
+            select(Blog.id, Blog.owner_id, Blog.title, Blog.description).where(
+                Blog.id.in_({item.id for item in request.items})
+            )
+        )
+    }
+
+    now = datetime.now()
+    results: List[BulkItemResult] = []
+    updates = {}
+    for index, item in enumerate(request.items):
+        row = existing.get(item.id)
+        if row is None:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    id=item.id,
+                    status=status.HTTP_404_NOT_FOUND,
+                    detail="Blog not found",
+                )
+            )
+            continue
+        if row.owner_id != user.id:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    id=item.id,
+                    status=status.HTTP_403_FORBIDDEN,
+                    detail="You can not update this blog",
+                )
+            )
+            continue
+        values = updates.setdefault(
+            item.id,
+            {
+                "id": item.id,
+                "title": row.title,
+                "description": row.description,
+                "updated_at": now,
+            },
+        )
+        if item.title:
+            values["title"] = item.title
+        if item.description:
+            values["description"] = item.description
+        results.append(
+            BulkItemResult(index=index, id=item.id, status=status.HTTP_200_OK)
+        )
+
+    if updates:
+        await db.execute(update(Blog), list(updates.values()))
+        await search_backend.index_many(db, _search_rows(updates.values()))
+        await db.commit()
+        await invalidate_blogs(updates, user.id)
+        await blogs_changed(user.id, updates)
+    return _bulk_result(results)
+
+
+@router.post("/bulk/delete", response_model=BulkResult, status_code=status.HTTP_200_OK)
+async def bulk_delete_blogs(
+    request: BulkDeleteBlogsSchema,
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    """Delete many blogs with one ownership query and one DELETE."""
+    _check_batch_size(len(request.ids))
+    owners = dict(
+        (
+            await db.execute(
+                select(Blog.id, Blog.owner_id).where(Blog.id.in_(set(request.ids)))
+            )
+        ).all()
+    )
+
+    results: List[BulkItemResult] = []
+    deleted = set()
+    for index, id in enumerate(request.ids):
+        owner_id = owners.get(id)
+        if owner_id is None:
+            result = BulkItemResult(
+                index=index,
+                id=id,
+                status=status.HTTP_404_NOT_FOUND,
+                detail="Blog not found",
+            )
+        elif owner_id != user.id:
+            result = BulkItemResult(
+                index=index,
+                id=id,
+                status=status.HTTP_403_FORBIDDEN,
+                detail="You can not delete this blog",
+            )
+        else:
+            deleted.add(id)
+            result = BulkItemResult(
+                index=index, id=id, status=status.HTTP_204_NO_CONTENT
+            )
+        results.append(result)
+
+    if deleted:
+        await db.execute(delete(Blog).where(Blog.id.in_(deleted)))
+        await search_backend.remove_many(db, list(deleted))
+        await db.commit()
+        await invalidate_blogs(deleted, user.id)
+        await blogs_removed(user.id, deleted)
+    return _bulk_result(results)
 
 
 @router.get("/{id}", response_model=BlogSchema, status_code=status.HTTP_200_OK)
-def read_blog(id: int, db: Session = Depends(get_db)):
-    blog = get_blog_by_id(id, db)
-    return blog
+async def read_blog(id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    entry = await get_cached_blog(id)
+    if entry is None and is_conditional(request):
+        etag, last_modified = blog_validators(id, *await get_blog_version(id, db))
+        if not_modified(request, etag, last_modified):
+            return not_modified_response(
+                etag, last_modified, settings.BLOG_CACHE_CONTROL
+            )
+    if entry is None:
+        entry = await cache_blog(await get_blog_row(id, db, *BLOG_COLUMNS))
+    return conditional_response(request, entry, settings.BLOG_CACHE_CONTROL)
 
 
 @router.patch("/{id}", response_model=BlogSchema, status_code=status.HTTP_200_OK)
-def update_blogs(
+async def update_blogs(
     id: int,
     request: CreateBlogSchema,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
 ):
-    blog = get_blog_by_id(id, db)
+    blog = await get_blog_by_id(id, db)
     if blog.owner_id != user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="You can not update this blog"
@@ -69,19 +431,27 @@ def update_blogs(
         blog.description = request.description
     blog.updated_at = datetime.now()
     db.add(blog)
-    db.commit()
-    db.refresh(blog)
+    await search_backend.index(db, blog)
+    await db.commit()
+    await db.refresh(blog)
+    await invalidate_blog(blog.id, blog.owner_id)
+    await blogs_changed(blog.owner_id, {blog.id: blog_item(blog)})
     return blog
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_blogs(
-    id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)
+async def delete_blogs(
+    id: int,
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
 ):
-    blog = get_blog_by_id(id, db)
+    blog = await get_blog_by_id(id, db)
     if blog.owner_id != user.id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="You can not delete this blog"
         )
-    db.delete(blog)
-    db.commit()
+    await db.delete(blog)
+    await search_backend.remove(db, blog.id)
+    await db.commit()
+    await invalidate_blog(blog.id, blog.owner_id)
+    await blogs_removed(blog.owner_id, [blog.id])
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -11,14 +11,66 @@ class BlogBase(BaseModel):
 
 
 class CreateBlog(BlogBase):
-    image: str
+    image: Optional[str] = Field(
+        default=None, title="Base64 data URI of the image (compatibility mode)"
+    )
+    media_id: Optional[str] = Field(
+        default=None, title="Id of an image uploaded through POST /media/"
+    )
 
 
 class Blog(BlogBase):
     id: int
     image: str
+    thumbnail: Optional[str] = None
+    image_webp: Optional[str] = None
     created_at: datetime = None
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class BulkCreateBlogs(BaseModel):
+    items: List[CreateBlog] = Field(min_length=1)
+
+
+class UpdateBlogItem(BlogBase):
+    id: int
+
+
+class BulkUpdateBlogs(BaseModel):
+    items: List[UpdateBlogItem] = Field(min_length=1)
+
+
+class BulkDeleteBlogs(BaseModel):
+    ids: List[int] = Field(min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: int
+    detail: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class BlogOwner(BaseModel):
+    id: int
+    username: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BlogWithOwner(Blog):
+    owner: Optional[BlogOwner] = Field(
+        default=None, title="Only present with ?include=owner"
+    )
@@ -0,0 +1,16 @@
+from app.cache.backends import CacheBackend, MemoryBackend, RedisBackend
+from app.cache.lru import TTLCache, caches
+from app.cache.shared import bump_generation, cache, generation, get_json, set_json
+
+__all__ = [
+    "CacheBackend",
+    "MemoryBackend",
+    "RedisBackend",
+    "TTLCache",
+    "bump_generation",
+    "cache",
+    "caches",
+    "generation",
+    "get_json",
+    "set_json",
+]
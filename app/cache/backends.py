@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+from urllib.parse import urlparse
+
+from app.cache.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Byte-oriented key/value store shared by the read-through caches."""
+
+    # Whether every worker sees the same entries.
+    shared = False
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process stand-in for Redis; invalidations are not seen by other
+    workers, so entries can be stale there for up to their TTL."""
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._cache = TTLCache("shared", maxsize, ttl)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @staticmethod
+    def _encode(args: Sequence) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(parts)
+
+    async def _read_reply(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
+
+    async def execute(self, *args):
+        self.writer.write(self._encode(args))
+        await self.writer.drain()
+        return await self._read_reply()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client with a small connection pool.
+
+    Any network failure is logged and treated as a cache miss so an
+    unavailable cache never takes requests down with it.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, pool_size: int, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._pool: "asyncio.Queue[RedisConnection]" = asyncio.Queue()
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _connect(self) -> RedisConnection:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout
+        )
+        connection = RedisConnection(reader, writer)
+        if self.password:
+            await connection.execute("AUTH", self.password)
+        if self.db:
+            await connection.execute("SELECT", self.db)
+        return connection
+
+    async def execute(self, *args):
+        async with self._slots:
+            connection = (
+                self._pool.get_nowait()
+                if not self._pool.empty()
+                else await self._connect()
+            )
+            try:
+                reply = await asyncio.wait_for(connection.execute(*args), self.timeout)
+            except BaseException:
+                connection.close()
+                raise
+            self._pool.put_nowait(connection)
+            return reply
+
+    async def _safe_execute(self, *args):
+        try:
+            return await self.execute(*args)
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            logger.warning("cache command %s failed: %s", args[0], e)
+            return None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._safe_execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._safe_execute("SET", key, value, "EX", ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._safe_execute("DEL", *keys)
+
+    async def close(self) -> None:
+        connections: List[RedisConnection] = []
+        while not self._pool.empty():
+            connections.append(self._pool.get_nowait())
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,362 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.cache.backends import CacheBackend, RedisBackend, RedisError
+from app.cache.lru import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# (score, id, item): feeds are ordered by score, then id, newest first.
+Entry = Tuple[int, int, dict]
+
+
+@dataclass
+class FeedSlice:
+    items: List[dict]
+    total: int
+    stored: int
+
+    def covers(self, limit: int) -> bool:
+        """Whether the first ``limit`` items of the full listing are here."""
+        return len(self.items) >= limit or self.stored >= self.total
+
+
+class FeedStore:
+    """Bounded, newest-first lists of JSON items with an exact total.
+
+    Only the newest ``max_length`` items are kept, but ``total`` counts
+    every item, so a listing can report its size without ``COUNT(*)``.
+    A feed is built wholesale by ``replace`` and expires ``ttl`` seconds
+    later; ``add``, ``merge`` and ``remove`` patch a built feed in place
+    and are ignored for one that is not built. Each of them bumps the
+    feed's version, which ``replace`` checks so a rebuild that raced with
+    a write is rejected rather than stored stale.
+    """
+
+    # Whether every worker sees the same feeds.
+    shared = False
+
+    def __init__(self, max_length: int, ttl: int):
+        self.max_length = max_length
+        self.ttl = ttl
+
+    async def read(self, name: str, limit: int) -> Optional[FeedSlice]:
+        raise NotImplementedError
+
+    async def version(self, name: str) -> int:
+        raise NotImplementedError
+
+    async def replace(
+        self, name: str, entries: Sequence[Entry], total: int, version: int
+    ) -> bool:
+        raise NotImplementedError
+
+    async def add(self, name: str, entries: Sequence[Entry]) -> None:
+        raise NotImplementedError
+
+    async def merge(self, name: str, changes: Dict[int, dict]) -> None:
+        raise NotImplementedError
+
+    async def remove(self, name: str, ids: Iterable[int]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class _Feed:
+    def __init__(self, entries: Sequence[Entry], total: int):
+        # Sorted ascending on (-score, -id), i.e. newest first.
+        self.keys = sorted((-score, -id) for score, id, _ in entries)
+        self.items = {id: item for _, id, item in entries}
+        self.total = total
+
+
+class MemoryFeedStore(FeedStore):
+    """Per-process feeds. Writes made by other workers are not seen, so
+    these are only used when the app runs a single worker."""
+
+    def __init__(self, max_length: int, ttl: int, maxsize: int):
+        super().__init__(max_length, ttl)
+        self._feeds = TTLCache("feeds", maxsize, ttl)
+        self._versions = TTLCache("feed_versions", maxsize, ttl)
+
+    @staticmethod
+    def _normalize(item: dict) -> dict:
+        # Same JSON types the Redis store hands back.
+        return orjson.loads(orjson.dumps(item))
+
+    def _bump(self, name: str) -> Optional[_Feed]:
+        self._versions.set(name, self._versions.get(name, 0) + 1)
+        return self._feeds.get(name)
+
+    async def read(self, name: str, limit: int) -> Optional[FeedSlice]:
+        feed = self._feeds.get(name)
+        if feed is None:
+            return None
+        items = [feed.items[-id] for _, id in feed.keys[:limit]]
+        return FeedSlice(items, feed.total, len(feed.keys))
+
+    async def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    async def replace(
+        self, name: str, entries: Sequence[Entry], total: int, version: int
+    ) -> bool:
+        if self._versions.get(name, 0) != version:
+            return False
+        entries = [
+            (score, id, self._normalize(item))
+            for score, id, item in entries[: self.max_length]
+        ]
+        self._feeds.set(name, _Feed(entries, total))
+        return True
+
+    async def add(self, name: str, entries: Sequence[Entry]) -> None:
+        feed = self._bump(name)
+        if feed is None:
+            return
+        for score, id, item in entries:
+            if id not in feed.items:
+                bisect.insort(feed.keys, (-score, -id))
+                feed.total += 1
+            feed.items[id] = self._normalize(item)
+        for _, id in feed.keys[self.max_length :]:
+            del feed.items[-id]
+        del feed.keys[self.max_length :]
+
+    async def merge(self, name: str, changes: Dict[int, dict]) -> None:
+        feed = self._bump(name)
+        if feed is None:
+            return
+        for id, fields in changes.items():
+            if id in feed.items:
+                feed.items[id] = {**feed.items[id], **self._normalize(fields)}
+
+    async def remove(self, name: str, ids: Iterable[int]) -> None:
+        feed = self._bump(name)
+        if feed is None:
+            return
+        ids = set(ids)
+        feed.keys = [key for key in feed.keys if -key[1] not in ids]
+        for id in ids:
+            feed.items.pop(id, None)
+        feed.total = max(0, feed.total - len(ids))
+
+
+# Keys per feed: ``<name>:ids`` (sorted set of zero-padded ids scored by
+# ``score``; equal scores then order by id), ``<name>:items`` (hash of id to
+# item JSON) and ``<name>:meta`` (hash with ``total`` once built, and
+# ``version``). Only ``replace`` sets the expiry of a built feed.
+FEED_PRELUDE = """
+local ids, items, meta = KEYS[1], KEYS[2], KEYS[3]
+local function touch()
+  redis.call('HINCRBY', meta, 'version', 1)
+  if redis.call('PTTL', meta) < 0 then
+    redis.call('PEXPIRE', meta, ARGV[1] * 1000)
+  end
+  return redis.call('HEXISTS', meta, 'total') == 1
+end
+"""
+
+FEED_SCRIPTS = {
+    "read": """
+local total = redis.call('HGET', KEYS[3], 'total')
+if not total then
+  return false
+end
+local limit, values = tonumber(ARGV[1]), {}
+if limit > 0 then
+  local members = redis.call('ZREVRANGE', KEYS[1], 0, limit - 1)
+  if #members > 0 then
+    values = redis.call('HMGET', KEYS[2], unpack(members))
+  end
+end
+return {tonumber(total), redis.call('ZCARD', KEYS[1]), values}
+""",
+    "replace": """
+local version = redis.call('HGET', KEYS[3], 'version') or '0'
+if version ~= ARGV[2] then
+  return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+for i = 4, #ARGV, 3 do
+  redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+  redis.call('HSET', KEYS[2], ARGV[i + 1], ARGV[i + 2])
+end
+redis.call('HSET', KEYS[3], 'total', ARGV[3])
+for i = 1, 3 do
+  redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+return 1
+""",
+    "add": FEED_PRELUDE
+    + """
+if not touch() then
+  return 0
+end
+for i = 3, #ARGV, 3 do
+  if redis.call('ZADD', ids, ARGV[i], ARGV[i + 1]) == 1 then
+    redis.call('HINCRBY', meta, 'total', 1)
+  end
+  redis.call('HSET', items, ARGV[i + 1], ARGV[i + 2])
+end
+local extra = redis.call('ZCARD', ids) - tonumber(ARGV[2])
+if extra > 0 then
+  local dropped = redis.call('ZRANGE', ids, 0, extra - 1)
+  redis.call('ZREMRANGEBYRANK', ids, 0, extra - 1)
+  redis.call('HDEL', items, unpack(dropped))
+end
+-- A feed built empty had no ids/items keys; give new ones its expiry.
+local ttl = redis.call('PTTL', meta)
+for _, key in ipairs({ids, items}) do
+  if ttl > 0 and redis.call('PTTL', key) == -1 then
+    redis.call('PEXPIRE', key, ttl)
+  end
+end
+return 1
+""",
+    "merge": FEED_PRELUDE
+    + """
+if not touch() then
+  return 0
+end
+for i = 2, #ARGV, 2 do
+  local item = redis.call('HGET', items, ARGV[i])
+  if item then
+    local merged = cjson.decode(item)
+    for field, value in pairs(cjson.decode(ARGV[i + 1])) do
+      merged[field] = value
+    end
+    redis.call('HSET', items, ARGV[i], cjson.encode(merged))
+  end
+end
+return 1
+""",
+    "remove": FEED_PRELUDE
+    + """
+if not touch() then
+  return 0
+end
+for i = 2, #ARGV do
+  redis.call('ZREM', ids, ARGV[i])
+  redis.call('HDEL', items, ARGV[i])
+end
+local total = redis.call('HINCRBY', meta, 'total', 1 - #ARGV)
+if total < 0 then
+  redis.call('HSET', meta, 'total', 0)
+end
+return 1
+""",
+}
+
+
+def _member(id: int) -> str:
+    return "%012d" % id
+
+
+class RedisFeedStore(FeedStore):
+    """Feeds shared by every worker, kept in sorted sets next to the cache.
+
+    Each operation is one Lua script, so concurrent writers cannot lose
+    each other's updates. Failures are logged and a failed ``read`` is a
+    miss, like the cache it sits beside.
+    """
+
+    shared = True
+
+    def __init__(self, redis: RedisBackend, max_length: int, ttl: int):
+        super().__init__(max_length, ttl)
+        self._redis = redis
+        self._shas = {
+            name: hashlib.sha1(script.encode()).hexdigest()
+            for name, script in FEED_SCRIPTS.items()
+        }
+
+    @staticmethod
+    def _keys(name: str) -> tuple:
+        return f"{name}:ids", f"{name}:items", f"{name}:meta"
+
+    async def _eval(self, script: str, name: str, *args):
+        keys = self._keys(name)
+        try:
+            try:
+                return await self._redis.execute(
+                    "EVALSHA", self._shas[script], len(keys), *keys, *args
+                )
+            except RedisError as e:
+                if not str(e).startswith("NOSCRIPT"):
+                    raise
+                return await self._redis.execute(
+                    "EVAL", FEED_SCRIPTS[script], len(keys), *keys, *args
+                )
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            logger.warning("feed %s of %s failed: %s", script, name, e)
+            return None
+
+    @staticmethod
+    def _flatten(entries: Sequence[Entry]) -> list:
+        args = []
+        for score, id, item in entries:
+            args += [score, _member(id), orjson.dumps(item)]
+        return args
+
+    async def read(self, name: str, limit: int) -> Optional[FeedSlice]:
+        reply = await self._eval("read", name, limit)
+        if reply is None:
+            return None
+        total, stored, values = reply
+        items = [orjson.loads(value) for value in values if value is not None]
+        return FeedSlice(items, total, stored)
+
+    async def version(self, name: str) -> int:
+        try:
+            value = await self._redis.execute("HGET", self._keys(name)[2], "version")
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            logger.warning("feed version of %s failed: %s", name, e)
+            return -1
+        return int(value or 0)
+
+    async def replace(
+        self, name: str, entries: Sequence[Entry], total: int, version: int
+    ) -> bool:
+        reply = await self._eval(
+            "replace",
+            name,
+            self.ttl,
+            version,
+            total,
+            *self._flatten(entries[: self.max_length]),
+        )
+        return reply == 1
+
+    async def add(self, name: str, entries: Sequence[Entry]) -> None:
+        await self._eval(
+            "add", name, self.ttl, self.max_length, *self._flatten(entries)
+        )
+
+    async def merge(self, name: str, changes: Dict[int, dict]) -> None:
+        args = []
+        for id, fields in changes.items():
+            args += [_member(id), orjson.dumps(fields)]
+        await self._eval("merge", name, self.ttl, *args)
+
+    async def remove(self, name: str, ids: Iterable[int]) -> None:
+        members = [_member(id) for id in ids]
+        if members:
+            await self._eval("remove", name, self.ttl, *members)
+
+
+def create_feed_store(
+    cache: CacheBackend, max_length: int, ttl: int, maxsize: int
+) -> FeedStore:
+    """Feeds live wherever the shared cache does."""
+    if isinstance(cache, RedisBackend):
+        return RedisFeedStore(cache, max_length, ttl)
+    return MemoryFeedStore(max_length, ttl, maxsize)
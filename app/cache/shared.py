@@ -0,0 +1,56 @@
+import uuid
+from typing import Any, Optional
+
+import orjson
+
+from app.cache.backends import CacheBackend, MemoryBackend, RedisBackend
+from app.config import get_settings
+
+settings = get_settings()
+
+# Generation keys must outlive every entry that embeds them.
+GENERATION_TTL_SECONDS = 24 * 60 * 60
+
+
+def create_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.CACHE_URL, settings.CACHE_POOL_SIZE)
+    raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}")
+
+
+cache = create_backend()
+
+
+async def get_json(key: str) -> Optional[Any]:
+    value = await cache.get(key)
+    return None if value is None else orjson.loads(value)
+
+
+async def set_json(key: str, value: Any, ttl: Optional[int] = None) -> None:
+    await cache.set(
+        key, orjson.dumps(value), settings.CACHE_TTL_SECONDS if ttl is None else ttl
+    )
+
+
+async def generation(name: str) -> str:
+    """Current generation token for a group of cache keys.
+
+    Groups are invalidated by swapping in a fresh random token rather than
+    deleting keys, so a lost or expired generation can never make an old
+    entry reachable again.
+    """
+    key = f"gen:{name}"
+    value = await cache.get(key)
+    if value is None:
+        value = uuid.uuid4().hex.encode()
+        await cache.set(key, value, GENERATION_TTL_SECONDS)
+    return value.decode()
+
+
+async def bump_generation(*names: str) -> None:
+    for name in names:
+        await cache.set(
+            f"gen:{name}", uuid.uuid4().hex.encode(), GENERATION_TTL_SECONDS
+        )
@@ -0,0 +1,4 @@
+from app.compression.codecs import available_encodings, negotiate
+from app.compression.middleware import CompressionMiddleware
+
+__all__ = ["CompressionMiddleware", "available_encodings", "negotiate"]
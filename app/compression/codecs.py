@@ -0,0 +1,99 @@
+import zlib
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install zstandard
+    zstandard = None
+
+# compress(chunk) and finish() of one compression stream.
+Stream = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+# Levels by encoding and content class. JSON is mostly compressed per
+# request, so it gets cheap levels; text assets are immutable and cached
+# compressed by ETag, so they can afford to spend more once.
+LEVELS: Dict[str, Dict[str, int]] = {
+    "gzip": {"json": 5, "text": 9},
+    "br": {"json": 4, "text": 9},
+    "zstd": {"json": 3, "text": 12},
+}
+
+TEXT_TYPES = {"application/javascript", "application/xml"}
+
+
+def _gzip(level: int) -> Stream:
+    stream = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return stream.compress, stream.flush
+
+
+def _brotli(level: int) -> Stream:
+    stream = brotli.Compressor(quality=level)
+    return stream.process, stream.finish
+
+
+def _zstd(level: int) -> Stream:
+    stream = zstandard.ZstdCompressor(level=level).compressobj()
+    return stream.compress, stream.flush
+
+
+ENCODERS: Dict[str, Callable[[int], Stream]] = {"gzip": _gzip}
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd
+
+
+def available_encodings(preference: Sequence[str]) -> Tuple[str, ...]:
+    """``preference`` without the encodings whose library is not installed."""
+    return tuple(name for name in preference if name in ENCODERS)
+
+
+def content_class(content_type: Optional[str]) -> Optional[str]:
+    """``json``, ``text`` or ``None`` for types not worth compressing."""
+    if not content_type:
+        return None
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "application/json" or media_type.endswith("+json"):
+        return "json"
+    if (
+        media_type.startswith("text/")
+        or media_type.endswith("+xml")
+        or media_type in TEXT_TYPES
+    ):
+        return "text"
+    return None
+
+
+def open_stream(encoding: str, content: str) -> Stream:
+    return ENCODERS[encoding](LEVELS[encoding][content])
+
+
+def negotiate(accept_encoding: str, encodings: Sequence[str]) -> Optional[str]:
+    """The client's highest-weighted encoding, ties going to the order of
+    ``encodings``; ``None`` when it accepts none of them."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in encodings:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
@@ -0,0 +1,243 @@
+from typing import List, Optional, Sequence
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.cache.lru import TTLCache
+from app.compression.codecs import content_class, negotiate, open_stream
+from app.metrics.instruments import compressed_responses
+
+# Chunks at least this large are compressed off the event loop; zlib,
+# brotli and zstd all release the GIL while they work.
+OFFLOAD_BYTES = 64 * 1024
+# Read size when a zero-copy (sendfile) body has to be compressed instead.
+ZEROCOPY_CHUNK = 64 * 1024
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+    if "accept-encoding" not in vary and "*" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+
+def _weaken_etag(headers: MutableHeaders) -> None:
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing JSON and text responses.
+
+    The encoding is negotiated from ``Accept-Encoding``. Responses that are
+    partial, already encoded, marked ``no-transform`` or smaller than
+    ``minimum_size`` pass through unchanged. A body sent in one message is
+    compressed in one go and kept only if it got smaller; a streamed body
+    is compressed chunk by chunk. Compressed bodies of responses with an
+    ``ETag`` are cached per URL, ETag and encoding so a hot page is only
+    compressed once per version. The ETag of a compressed response is made
+    weak, since its bytes differ from the identity representation.
+
+    HEAD and 304 responses have no body to compress but get the same
+    ``Vary`` and, when the client negotiated an encoding, the same weak
+    ``ETag`` as the full response would.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: Sequence[str],
+        minimum_size: int = 1024,
+        cache: Optional[TTLCache] = None,
+        cache_max_body: int = 256 * 1024,
+    ):
+        self.app = app
+        self.encodings = tuple(encodings)
+        self.minimum_size = minimum_size
+        self.cache = cache
+        self.cache_max_body = cache_max_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding", ""), self.encodings
+        )
+        responder = CompressionResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        middleware: CompressionMiddleware,
+        scope: Scope,
+        encoding: Optional[str],
+        send: Send,
+    ):
+        self.middleware = middleware
+        self.scope = scope
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        # pass, pending (start held back), stream, or drain (served from
+        # the cache; the app's own body is discarded).
+        self.mode = "pass"
+        self.content = None
+        self.cache_key: Optional[str] = None
+        self.collected: Optional[List[bytes]] = None
+        self.stream = None
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            await self._start(message)
+        elif self.mode == "pass":
+            await self._send(message)
+        elif self.mode == "drain":
+            return
+        elif kind == "http.response.zerocopy":
+            await self._zerocopy(message)
+        elif kind == "http.response.body":
+            await self._body(message.get("body", b""), message.get("more_body", False))
+        else:
+            await self._send(message)
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        if self.start["status"] != 200 or self.content is None:
+            return False
+        if "content-encoding" in headers or "content-range" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", ""):
+            return False
+        length = headers.get("content-length")
+        return not (length and length.isdigit() and int(length) < self._minimum)
+
+    @property
+    def _minimum(self) -> int:
+        return self.middleware.minimum_size
+
+    async def _start(self, message: Message) -> None:
+        self.start = message
+        headers = MutableHeaders(scope=message)
+        self.content = content_class(headers.get("content-type"))
+        not_modified = message["status"] == 304
+        if self.content is not None or not_modified:
+            _add_vary(headers)
+        if not_modified or self.scope["method"] == "HEAD":
+            # A 304 carries no Content-Type to judge by; a weak validator is
+            # never wrong, a strong one on compressed bytes would be.
+            if (
+                self.encoding is not None
+                and (self.content is not None or not_modified)
+                and "content-encoding" not in headers
+            ):
+                _weaken_etag(headers)
+            await self._send(message)
+            return
+        if self.encoding is None or not self._eligible(headers):
+            await self._send(message)
+            return
+
+        cache = self.middleware.cache
+        etag = headers.get("etag")
+        if cache is not None and etag:
+            path = self.scope["path"]
+            query = self.scope["query_string"].decode("latin-1")
+            self.cache_key = f"{self.encoding}:{path}?{query}:{etag}"
+            body = cache.get(self.cache_key)
+            if body is not None:
+                self.mode = "drain"
+                self._encoded_headers(headers, len(body))
+                compressed_responses.inc(1, self.encoding, "cache")
+                await self._send(message)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            self.collected = []
+        self.mode = "pending"
+
+    def _encoded_headers(self, headers: MutableHeaders, length: Optional[int]):
+        headers["Content-Encoding"] = self.encoding
+        _weaken_etag(headers)
+        if "accept-ranges" in headers:
+            del headers["Accept-Ranges"]
+        if length is None:
+            if "content-length" in headers:
+                del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(length)
+
+    async def _run(self, func, data: bytes) -> bytes:
+        if len(data) >= OFFLOAD_BYTES:
+            return await anyio.to_thread.run_sync(func, data)
+        return func(data)
+
+    async def _body(self, body: bytes, more_body: bool) -> None:
+        headers = MutableHeaders(scope=self.start)
+        if self.mode == "pending":
+            if not more_body:
+                await self._whole(headers, body)
+                return
+            self.mode = "stream"
+            self.stream = open_stream(self.encoding, self.content)
+            self._encoded_headers(headers, None)
+            compressed_responses.inc(1, self.encoding, "stream")
+            await self._send(self.start)
+
+        compress, finish = self.stream
+        data = await self._run(compress, body) if body else b""
+        if not more_body:
+            data += finish()
+        if self.collected is not None:
+            self.collected.append(data)
+            if sum(map(len, self.collected)) > self.middleware.cache_max_body:
+                self.collected = None
+            elif not more_body:
+                self._store(b"".join(self.collected))
+        if data or not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+    async def _whole(self, headers: MutableHeaders, body: bytes) -> None:
+        self.mode = "pass"
+        if len(body) < self._minimum:
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+        compress, finish = open_stream(self.encoding, self.content)
+        compressed = await self._run(compress, body) + finish()
+        if len(compressed) >= len(body):
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+        if self.collected is not None:
+            if len(compressed) <= self.middleware.cache_max_body:
+                self._store(compressed)
+        self._encoded_headers(headers, len(compressed))
+        compressed_responses.inc(1, self.encoding, "whole")
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    def _store(self, body: bytes) -> None:
+        self.middleware.cache.set(self.cache_key, body)
+
+    async def _zerocopy(self, message: Message) -> None:
+        # sendfile cannot compress; read the range and compress it instead.
+        file, offset = message["file"], message.get("offset")
+        remaining = message.get("count")
+        if offset is not None:
+            await anyio.to_thread.run_sync(file.seek, offset)
+        while remaining is None or remaining > 0:
+            size = (
+                ZEROCOPY_CHUNK if remaining is None else min(ZEROCOPY_CHUNK, remaining)
+            )
+            chunk = await anyio.to_thread.run_sync(file.read, size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            await self._body(chunk, True)
+        await self._body(b"", message.get("more_body", False))
@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,5 +12,120 @@ class Settings(BaseSettings):
     JWT_VERIFICATION_TOKEN: str
     JWT_RESET_TOKEN: str
     ALGORITHM: str
+    # EdDSA or ES256 signs access tokens with the rotating keyring in
+    # JWT_KEYS_DIR and publishes it at /.well-known/jwks.json; unset keeps
+    # them on ALGORITHM with JWT_SECRET_KEY.
+    ACCESS_TOKEN_ALGORITHM: Optional[str] = None
+    JWT_KEYS_DIR: str = "keys"
+    JWT_KEY_ROTATION_DAYS: int = 30
+    JWT_KEY_OVERLAP_MINUTES: int = 60
+    JWKS_CACHE_CONTROL: str = "public, max-age=300"
+
+    DATABASE_URL: str = "sqlite:///./sql_app.db"
+    DATABASE_READ_URL: Optional[str] = None
+    DATABASE_ASYNC: bool = False
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_RECYCLE: int = 1800
+    DATABASE_POOL_TIMEOUT: int = 30
+    DATABASE_CONNECT_TIMEOUT: int = 10
+
+    SQLITE_TUNING: bool = True
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_CACHE_SIZE: int = -64000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+
+    AUTH_STATELESS_TOKENS: bool = True
+    TOKEN_VERSION_CACHE_SECONDS: int = 30
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_SWEEP_SECONDS: int = 300
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # "memory" is per-process: with WEB_CONCURRENCY > 1 blog responses are
+    # not cached at all, so use "redis" there.
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_POOL_SIZE: int = 10
+
+    BLOG_CACHE_CONTROL: str = "public, max-age=30, stale-while-revalidate=60"
+    PRIVATE_CACHE_CONTROL: str = "private, no-cache"
+
+    # Number of server processes; run.sh exports what it passes to uvicorn.
+    WEB_CONCURRENCY: int = 1
+
+    # Feeds need a shared CACHE_BACKEND when WEB_CONCURRENCY > 1, since each
+    # worker would otherwise serve its own copy; they are turned off then.
+    FEED_ENABLED: bool = True
+    FEED_MAX_LENGTH: int = 200
+    FEED_TTL_SECONDS: int = 600
+    FEED_MAX_FEEDS: int = 1000
+
+    MEDIA_MAX_BYTES: int = 20 * 1024 * 1024
+    MEDIA_PRECOMPRESSED: bool = True
+    MEDIA_DERIVATIVE_WORKERS: int = 2
+
+    # bcrypt processes per server process; 0 splits the cores evenly
+    # between the WEB_CONCURRENCY workers.
+    HASHING_WORKERS: int = 0
+    HASHING_MAX_PENDING: int = 64
+    HASHING_RETRY_AFTER_SECONDS: int = 1
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_IP: str = "30/minute"
+    RATE_LIMIT_SIGNUP_IP: str = "10/hour"
+    RATE_LIMIT_EMAIL: str = "5/minute"
+    RATE_LIMIT_ROUTE: Optional[str] = None
+
+    JOBS_ENABLED: bool = True
+    JOBS_CONCURRENCY: int = 4
+    JOBS_POLL_SECONDS: float = 1.0
+    JOBS_LEASE_SECONDS: int = 120
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_SECONDS: float = 2.0
+    JOBS_BACKOFF_MAX_SECONDS: float = 600.0
+
+    # smtp, console (log only) or memory (kept in app.mail.outbox for tests).
+    EMAIL_BACKEND: str = "console"
+    EMAIL_SENDER: str = "no-reply@localhost"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT_SECONDS: int = 10
+
+    PAGINATION_DEFAULT_LIMIT: int = 20
+    PAGINATION_MAX_LIMIT: int = 100
+
+    BLOG_BULK_MAX_ITEMS: int = 1000
+
+    STARTUP_WARMUP: bool = True
+    STARTUP_PROFILE_LOG: bool = True
+
+    COMPRESSION_ENABLED: bool = True
+    # Preference order; br and zstd are used when brotli/zstandard are installed.
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CACHE_ENTRIES: int = 1000
+    COMPRESSION_CACHE_TTL_SECONDS: int = 3600
+    COMPRESSION_CACHE_MAX_BODY: int = 256 * 1024
+
+    METRICS_ENABLED: bool = True
+    METRICS_SERVER_TIMING: bool = False
 
     model_config = SettingsConfigDict(env_file=".env")
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
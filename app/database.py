@@ -1,20 +1,253 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
+
+from app.config import get_settings
+from app.metrics.db import instrument_engine
+
+settings = get_settings()
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+SQLALCHEMY_READ_DATABASE_URL = settings.DATABASE_READ_URL or SQLALCHEMY_DATABASE_URL
+
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite/asyncpg)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str) -> dict:
+    """Pool and connect settings from ``Settings`` for the given URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    options = {}
+    if not _is_memory_sqlite(url):
+        options.update(
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+        if url.get_driver_name() == "aiosqlite":
+            # aiosqlite defaults to NullPool, which would reconnect (and
+            # re-run the pragmas) on every checkout.
+            options["poolclass"] = AsyncAdaptedQueuePool
+    if backend == "sqlite":
+        options["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": settings.DATABASE_CONNECT_TIMEOUT,
+        }
+    elif url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"timeout": settings.DATABASE_CONNECT_TIMEOUT}
+    elif backend == "postgresql":
+        options["connect_args"] = {"connect_timeout": settings.DATABASE_CONNECT_TIMEOUT}
+    return options
+
+
+def sqlite_pragmas() -> dict:
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+    }
+
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas().items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+
+def tune_engine(engine: Engine) -> Engine:
+    if settings.SQLITE_TUNING and engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine)
+    return engine
+
+
+def build_engine(url: str) -> Engine:
+    return tune_engine(create_engine(url, **engine_options(url)))
+
+
+def build_async_engine(url: str):
+    url = async_database_url(url)
+    async_engine = create_async_engine(url, **engine_options(url))
+    tune_engine(async_engine.sync_engine)
+    return async_engine
+
+
+engine = build_engine(SQLALCHEMY_DATABASE_URL)
+read_engine = (
+    engine
+    if SQLALCHEMY_READ_DATABASE_URL == SQLALCHEMY_DATABASE_URL
+    else build_engine(SQLALCHEMY_READ_DATABASE_URL)
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=read_engine
+)
+
+async_engine = None
+async_read_engine = None
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+if settings.DATABASE_ASYNC:
+    async_engine = build_async_engine(SQLALCHEMY_DATABASE_URL)
+    async_read_engine = (
+        async_engine
+        if SQLALCHEMY_READ_DATABASE_URL == SQLALCHEMY_DATABASE_URL
+        else build_async_engine(SQLALCHEMY_READ_DATABASE_URL)
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        async_read_engine, autoflush=False, expire_on_commit=False
+    )
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
+async def dispose_engines() -> None:
+    for async_pool in {async_engine, async_read_engine} - {None}:
+        await async_pool.dispose()
+    for sync_pool in {engine, read_engine}:
+        sync_pool.dispose()
+
+
+def _prewarm_engine(engine: Engine, connections: int) -> None:
+    opened = [engine.connect() for _ in range(connections)]
+    for connection in opened:
+        connection.exec_driver_sql("SELECT 1")
+        connection.close()
+
+
+async def prewarm_pools(connections: int) -> None:
+    """Open ``connections`` connections in each pool the app uses, so the
+    first requests skip connecting (and the SQLite pragmas)."""
+    if async_engine is not None:
+        for async_pool in {async_engine, async_read_engine}:
+            opened = [await async_pool.connect() for _ in range(connections)]
+            for connection in opened:
+                await connection.exec_driver_sql("SELECT 1")
+                await connection.close()
+        return
+    for sync_pool in {engine, read_engine}:
+        await run_in_threadpool(_prewarm_engine, sync_pool, connections)
+
+
+class ThreadedSession:
+    """Sync ``Session`` exposed through the ``AsyncSession`` API.
+
+    Every statement is run on the AnyIO threadpool, so request handlers are
+    written once against the async API and the sync driver is only used
+    when ``DATABASE_ASYNC`` is disabled.
+    """
+
+    def __init__(self, session: Session):
+        self.sync_session = session
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.execute, statement, params, **kwargs
+        )
+
+    async def scalar(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.scalar, statement, params, **kwargs
+        )
+
+    async def scalars(self, statement, params=None, **kwargs):
+        return await run_in_threadpool(
+            self.sync_session.scalars, statement, params, **kwargs
+        )
+
+    async def get(self, entity, ident, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, entity, ident, **kwargs)
+
+    async def delete(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def refresh(self, instance) -> None:
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    @asynccontextmanager
+    async def begin_nested(self):
+        """SAVEPOINT, released on exit and rolled back on an exception."""
+        savepoint = await run_in_threadpool(self.sync_session.begin_nested)
+        try:
+            yield savepoint
+            await run_in_threadpool(self.sync_session.flush)
+        except BaseException:
+            await run_in_threadpool(savepoint.rollback)
+            raise
+        await run_in_threadpool(savepoint.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
+@asynccontextmanager
+async def session_scope(read_only: bool = False) -> AsyncIterator[AsyncSession]:
+    """Session on the primary, or on the read replica when ``read_only``."""
+    async_factory = AsyncReadSessionLocal if read_only else AsyncSessionLocal
+    if async_factory is not None:
+        async with async_factory() as db:
+            yield db
+        return
+    db = ThreadedSession((ReadSessionLocal if read_only else SessionLocal)())
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+async def get_db():
+    async with session_scope() as db:
+        yield db
+
+
+async def get_read_db():
+    async with session_scope(read_only=True) as db:
+        yield db
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, status
+from fastapi.responses import ORJSONResponse
+
+from app.lifespan import readiness
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health", include_in_schema=False)
+def health():
+    """Liveness: the process is up and serving."""
+    return {"status": "ok"}
+
+
+@router.get("/ready", include_in_schema=False)
+def ready():
+    """Readiness: startup and warmup have finished."""
+    if not readiness.ready:
+        return ORJSONResponse(
+            {"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return {"status": "ready", "startup": readiness.profile.report()}
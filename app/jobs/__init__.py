@@ -0,0 +1,4 @@
+from app.jobs.model import Job
+from app.jobs.queue import JobQueue, jobs
+
+__all__ = ["Job", "JobQueue", "jobs"]
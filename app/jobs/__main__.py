@@ -0,0 +1,29 @@
+"""Run a standalone job worker: ``python -m app.jobs``.
+
+Useful with ``JOBS_ENABLED=false`` on the web workers, so emails and image
+processing run in their own process.
+"""
+import asyncio
+import logging
+import signal
+
+from app.database import dispose_engines
+from app.jobs.queue import jobs
+
+
+async def main() -> None:
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+    await jobs.start()
+    try:
+        await stopping.wait()
+    finally:
+        await jobs.stop()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from app.database import Base
+
+PENDING = "pending"
+RUNNING = "running"
+FAILED = "failed"
+
+
+class Job(Base):
+    """Outbox row for deferred work.
+
+    Rows are written in the same transaction as the change that caused
+    them and deleted once their handler succeeds; ``failed`` rows are kept
+    for inspection after ``max_attempts``.
+    """
+
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default=PENDING)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime, nullable=False)
+    locked_until = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
@@ -0,0 +1,270 @@
+import asyncio
+import importlib
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import orjson
+from sqlalchemy import and_, delete, event, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import session_scope
+from app.jobs.model import FAILED, PENDING, RUNNING, Job
+from app.metrics.instruments import job_duration, jobs_processed
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+Handler = Callable[[dict], Awaitable[None]]
+
+# Modules that register handlers; imported when a worker starts so a
+# standalone worker (``python -m app.jobs``) knows every kind.
+HANDLER_MODULES = (
+    "app.auth.emails",
+    "app.blog.feed",
+    "app.mail",
+    "app.media.derivatives",
+)
+
+# Session.info flag set when the current transaction enqueued jobs.
+ENQUEUED_KEY = "jobs_enqueued"
+
+
+class JobQueue:
+    """Database-backed job queue drained by in-process async workers.
+
+    ``enqueue`` only adds an outbox row to the caller's transaction, so a
+    job exists exactly when the change that caused it was committed. The
+    worker claims due rows with a lease (``locked_until``), runs at most
+    ``concurrency`` handlers at once and retries failures with jittered
+    exponential backoff. A job whose worker died is claimed again once its
+    lease expires, so handlers must be safe to run twice.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        poll_seconds: float,
+        lease_seconds: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+    ):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self._handlers: Dict[str, Handler] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def handler(self, kind: str) -> Callable[[Handler], Handler]:
+        """Register the coroutine that runs jobs of ``kind``."""
+
+        def register(func: Handler) -> Handler:
+            self._handlers[kind] = func
+            return func
+
+        return register
+
+    def enqueue(
+        self,
+        db: AsyncSession,
+        kind: str,
+        payload: dict,
+        delay: float = 0,
+        max_attempts: Optional[int] = None,
+    ) -> Job:
+        """Stage a job in ``db``'s transaction; it runs after the commit."""
+        now = datetime.utcnow()
+        job = Job(
+            kind=kind,
+            payload=orjson.dumps(payload).decode(),
+            status=PENDING,
+            attempts=0,
+            max_attempts=max_attempts or self.max_attempts,
+            run_at=now + timedelta(seconds=delay),
+            created_at=now,
+            updated_at=now,
+        )
+        db.add(job)
+        db.sync_session.info[ENQUEUED_KEY] = True
+        return job
+
+    def notify(self) -> None:
+        """Wake the worker early; safe to call from any thread."""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(
+            self.backoff_max_seconds, self.backoff_seconds * 2 ** (attempts - 1)
+        )
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _claim(self, limit: int) -> list:
+        now = datetime.utcnow()
+        due = or_(
+            and_(Job.status == PENDING, Job.run_at <= now),
+            and_(Job.status == RUNNING, Job.locked_until < now),
+        )
+        ids = select(Job.id).where(due).order_by(Job.run_at).limit(limit)
+        # ``due`` is repeated on the UPDATE so a row claimed by another
+        # worker between the two evaluations is skipped.
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(ids.scalar_subquery()), due)
+            .values(
+                status=RUNNING,
+                attempts=Job.attempts + 1,
+                locked_until=now + timedelta(seconds=self.lease_seconds),
+                updated_at=now,
+            )
+            .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+            .execution_options(synchronize_session=False)
+        )
+        async with session_scope() as db:
+            rows = (await db.execute(stmt)).all()
+            await db.commit()
+        return rows
+
+    async def _finish(self, id: int, **values) -> None:
+        async with session_scope() as db:
+            if values:
+                await db.execute(
+                    update(Job)
+                    .where(Job.id == id)
+                    .values(updated_at=datetime.utcnow(), **values)
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                await db.execute(
+                    delete(Job)
+                    .where(Job.id == id)
+                    .execution_options(synchronize_session=False)
+                )
+            await db.commit()
+
+    async def run_job(
+        self, id: int, kind: str, payload: str, attempts: int, max_attempts: int
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            handler = self._handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind {kind!r}")
+            await asyncio.wait_for(handler(orjson.loads(payload)), self.lease_seconds)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:2000]
+            if attempts >= max_attempts or isinstance(e, LookupError):
+                logger.error("Job %s (%s) failed for good: %s", id, kind, error)
+                await self._finish(
+                    id, status=FAILED, locked_until=None, last_error=error
+                )
+                jobs_processed.inc(1, kind, "failed")
+            else:
+                delay = self.backoff(attempts)
+                logger.warning(
+                    "Job %s (%s) failed, retrying in %.1fs: %s", id, kind, delay, error
+                )
+                await self._finish(
+                    id,
+                    status=PENDING,
+                    locked_until=None,
+                    run_at=datetime.utcnow() + timedelta(seconds=delay),
+                    last_error=error,
+                )
+                jobs_processed.inc(1, kind, "retried")
+        else:
+            await self._finish(id)
+            jobs_processed.inc(1, kind, "done")
+        finally:
+            job_duration.observe(time.perf_counter() - started, kind)
+
+    def _spawn(self, row) -> None:
+        task = asyncio.create_task(self.run_job(*row))
+        self._running.add(task)
+
+        def done(task: asyncio.Task) -> None:
+            self._running.discard(task)
+            if self._wakeup is not None:
+                self._wakeup.set()
+            if not task.cancelled() and task.exception() is not None:
+                logger.error("Job runner crashed", exc_info=task.exception())
+
+        task.add_done_callback(done)
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._running)
+            claimed = []
+            if free > 0:
+                try:
+                    claimed = await self._claim(free)
+                except Exception:
+                    logger.exception("Could not claim jobs")
+                for row in claimed:
+                    self._spawn(row)
+            if len(claimed) < free or free <= 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def start(self) -> None:
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5) -> None:
+        """Stop claiming and give running jobs ``timeout`` seconds; any still
+        running are cancelled and picked up again when their lease expires."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._running:
+            _, pending = await asyncio.wait(set(self._running), timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._loop = self._wakeup = None
+
+
+jobs = JobQueue(
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_seconds=settings.JOBS_POLL_SECONDS,
+    lease_seconds=settings.JOBS_LEASE_SECONDS,
+    max_attempts=settings.JOBS_MAX_ATTEMPTS,
+    backoff_seconds=settings.JOBS_BACKOFF_SECONDS,
+    backoff_max_seconds=settings.JOBS_BACKOFF_MAX_SECONDS,
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker(session: Session) -> None:
+    if session.info.pop(ENQUEUED_KEY, False):
+        jobs.notify()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_enqueued(session: Session, previous_transaction) -> None:
+    # Rolling back a SAVEPOINT keeps what the outer transaction staged.
+    if previous_transaction.parent is None:
+        session.info.pop(ENQUEUED_KEY, None)
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+
+from fastapi import FastAPI
+
+from app import IMPORT_STARTED_AT
+from app.cache import cache
+from app.config import get_settings
+from app.database import dispose_engines, prewarm_pools
+from app.jobs import jobs
+from app.media.derivatives import derivative_pool
+from app.ratelimit import limiter
+from app.utils.hashing import hashing_service
+from app.utils.revocation import revocations
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class StartupProfile:
+    """Milliseconds spent in each startup phase, measured from the first
+    ``app`` import."""
+
+    def __init__(self):
+        self.steps: Dict[str, float] = {"imports": self._since(IMPORT_STARTED_AT)}
+        self.ready_after_ms: Optional[float] = None
+
+    @staticmethod
+    def _since(started: float) -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[name] = self._since(started)
+
+    def finish(self) -> None:
+        self.ready_after_ms = self._since(IMPORT_STARTED_AT)
+
+    def report(self) -> dict:
+        return {"steps_ms": dict(self.steps), "ready_after_ms": self.ready_after_ms}
+
+
+class Readiness:
+    """Flips to ready once startup and warmup are done, and back on shutdown."""
+
+    def __init__(self):
+        self.ready = False
+        self.profile: Optional[StartupProfile] = None
+
+
+readiness = Readiness()
+
+
+async def _until_reachable(profile: StartupProfile, name: str, run) -> None:
+    """Retry a database-bound startup step until the database answers."""
+    delay = 0.5
+    while True:
+        try:
+            with profile.step(name):
+                await run()
+            return
+        except Exception as e:
+            logger.warning("Database not reachable yet (%s); retrying", e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5)
+
+
+def _warm_tokens() -> None:
+    from app.utils.auth import (
+        create_access_token,
+        create_refresh_token,
+        decode_token,
+        keyring,
+    )
+
+    if keyring is not None:
+        keyring.reload()
+    # Imports python-jose and its backend, and runs the sign/verify paths once.
+    decode_token(create_access_token("warmup"), check_revoked=False)
+    decode_token(create_refresh_token("warmup"), "refresh", check_revoked=False)
+
+
+async def warmup(app: FastAPI, profile: StartupProfile) -> None:
+    """Pay first-request costs before the pod reports ready."""
+    steps = {
+        "hashing": hashing_service.warmup,
+        "tokens": lambda: asyncio.to_thread(_warm_tokens),
+        # Validators are compiled when the schemas are defined; the OpenAPI
+        # document is the schema work FastAPI still defers to first use.
+        "openapi": lambda: asyncio.to_thread(app.openapi),
+        "cache": lambda: cache.get("warmup"),
+    }
+    for name, run in steps.items():
+        try:
+            with profile.step(name):
+                await run()
+        except Exception:
+            logger.exception("Warmup step %s failed", name)
+
+
+async def _finish_startup(app: FastAPI, profile: StartupProfile) -> None:
+    if settings.STARTUP_WARMUP:
+        await _until_reachable(
+            profile, "database", lambda: prewarm_pools(settings.DATABASE_POOL_SIZE)
+        )
+        await warmup(app, profile)
+    profile.finish()
+    readiness.profile = profile
+    readiness.ready = True
+    if settings.STARTUP_PROFILE_LOG:
+        logger.info("Startup profile: %s", profile.report())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services, then warm up while already serving.
+
+    The server accepts connections as soon as the block before ``yield``
+    finishes, so the revocations are loaded there: tokens must not be
+    accepted before them. ``/ready`` answers 503 until the warmup task
+    is done.
+    """
+    profile = StartupProfile()
+    await _until_reachable(profile, "revocations", revocations.start)
+    if settings.JOBS_ENABLED:
+        with profile.step("jobs"):
+            await jobs.start()
+    finishing = asyncio.create_task(_finish_startup(app, profile))
+    try:
+        yield
+    finally:
+        readiness.ready = False
+        finishing.cancel()
+        await asyncio.gather(finishing, return_exceptions=True)
+        if settings.JOBS_ENABLED:
+            await jobs.stop()
+        await revocations.stop()
+        # Waits for bcrypt calls already running, so keep it off the loop.
+        await asyncio.to_thread(hashing_service.shutdown)
+        derivative_pool.shutdown()
+        await limiter.close()
+        await cache.close()
+        await dispose_engines()
@@ -0,0 +1,62 @@
+from email.message import EmailMessage
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.jobs import jobs
+from app.mail.backends import (
+    ConsoleBackend,
+    EmailBackend,
+    MemoryBackend,
+    SMTPBackend,
+)
+
+settings = get_settings()
+
+SEND_EMAIL = "email.send"
+
+
+def create_backend() -> EmailBackend:
+    if settings.EMAIL_BACKEND == "smtp":
+        return SMTPBackend(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.SMTP_USERNAME,
+            settings.SMTP_PASSWORD,
+            settings.SMTP_STARTTLS,
+            settings.SMTP_TIMEOUT_SECONDS,
+        )
+    if settings.EMAIL_BACKEND == "console":
+        return ConsoleBackend()
+    if settings.EMAIL_BACKEND == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown EMAIL_BACKEND {settings.EMAIL_BACKEND!r}")
+
+
+mailer = create_backend()
+
+
+def queue_email(db: AsyncSession, to: str, subject: str, body: str) -> None:
+    """Stage an email in ``db``'s transaction; it is sent after the commit."""
+    jobs.enqueue(db, SEND_EMAIL, {"to": to, "subject": subject, "body": body})
+
+
+@jobs.handler(SEND_EMAIL)
+async def send_email(payload: dict) -> None:
+    message = EmailMessage()
+    message["From"] = settings.EMAIL_SENDER
+    message["To"] = payload["to"]
+    message["Subject"] = payload["subject"]
+    message.set_content(payload["body"])
+    await mailer.send(message)
+
+
+__all__ = [
+    "ConsoleBackend",
+    "EmailBackend",
+    "MemoryBackend",
+    "SMTPBackend",
+    "mailer",
+    "queue_email",
+    "send_email",
+]
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import smtplib
+from email.message import EmailMessage
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+
+class EmailBackend:
+    async def send(self, message: EmailMessage) -> None:
+        raise NotImplementedError
+
+
+class SMTPBackend(EmailBackend):
+    """Delivers through an SMTP relay; smtplib runs on a worker thread."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = None,
+        password: str = None,
+        starttls: bool = False,
+        timeout: float = 10,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def _send(self, message: EmailMessage) -> None:
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(message)
+
+    async def send(self, message: EmailMessage) -> None:
+        await asyncio.to_thread(self._send, message)
+
+
+class ConsoleBackend(EmailBackend):
+    async def send(self, message: EmailMessage) -> None:
+        logger.info(
+            "Email to %s: %s\n%s",
+            message["To"],
+            message["Subject"],
+            message.get_content(),
+        )
+
+
+class MemoryBackend(EmailBackend):
+    """Keeps sent messages in ``outbox`` instead of delivering them."""
+
+    def __init__(self):
+        self.outbox: List[EmailMessage] = []
+
+    async def send(self, message: EmailMessage) -> None:
+        self.outbox.append(message)
@@ -0,0 +1,81 @@
+"""Local SMTP stand-in: ``python -m app.mail.stub --port 1025``.
+
+Accepts every message, prints it and keeps it in ``messages``, so the SMTP
+backend can be exercised end to end without a real relay.
+"""
+import argparse
+import asyncio
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from typing import List, Optional
+
+
+class SMTPStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, echo: bool = False):
+        self.host = host
+        self.port = port
+        self.echo = echo
+        self.messages: List[EmailMessage] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        await self._reply(writer, "220 localhost SMTP stub")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("HELO", "EHLO")):
+                    await self._reply(writer, "250 localhost")
+                elif command == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                        data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    message = message_from_bytes(b"".join(data), policy=policy.default)
+                    self.messages.append(message)
+                    if self.echo:
+                        print(message, flush=True)
+                    await self._reply(writer, "250 OK")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP: everything is accepted.
+                    await self._reply(writer, "250 OK")
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+
+async def _serve(host: str, port: int) -> None:
+    stub = SMTPStub(host, port, echo=True)
+    await stub.start()
+    print(f"SMTP stub listening on {host}:{port}", flush=True)
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.mail.stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
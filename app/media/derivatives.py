@@ -0,0 +1,114 @@
+import asyncio
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.jobs import jobs
+
+settings = get_settings()
+
+BLOG_DERIVATIVES = "blog.derivatives"
+
+THUMBNAIL_SIZE = (320, 320)
+WEBP_QUALITY = 80
+# Served as they are; Pillow cannot rasterize them.
+VECTOR_EXTENSIONS = {".svg"}
+
+
+def generate_derivatives(path: str) -> dict:
+    """Write a WebP thumbnail and a WebP copy next to ``path``.
+
+    Runs inside the derivative pool; Pillow is imported here so the web
+    workers never load it.
+    """
+    from PIL import Image
+
+    base, ext = os.path.splitext(path)
+    derivatives = {"thumbnail": f"{base}_thumb.webp", "image_webp": f"{base}.webp"}
+    with Image.open(path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        thumbnail = image.copy()
+        thumbnail.thumbnail(THUMBNAIL_SIZE)
+        thumbnail.save(derivatives["thumbnail"], "WEBP", quality=WEBP_QUALITY)
+        if ext.lower() == ".webp":
+            derivatives["image_webp"] = path
+        else:
+            image.save(derivatives["image_webp"], "WEBP", quality=WEBP_QUALITY)
+    return derivatives
+
+
+class DerivativePool:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def generate(self, path: str) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, generate_derivatives, path)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+derivative_pool = DerivativePool(settings.MEDIA_DERIVATIVE_WORKERS)
+
+
+def queue_blog_images(db: AsyncSession, blog_ids: List[int], path: str) -> None:
+    """Stage derivative generation for ``path`` in ``db``'s transaction."""
+    if os.path.splitext(path)[1].lower() in VECTOR_EXTENSIONS:
+        return
+    jobs.enqueue(db, BLOG_DERIVATIVES, {"blog_ids": list(blog_ids), "path": path})
+
+
+@jobs.handler(BLOG_DERIVATIVES)
+async def blog_images_job(payload: dict) -> None:
+    await process_blog_images(payload["blog_ids"], payload["path"])
+
+
+async def process_blog_images(blog_ids: List[int], path: str) -> None:
+    """Build derivatives for ``path`` once and record them on every blog in
+    ``blog_ids`` that still uses it. Failures propagate so the job retries."""
+    from app.blog.cache import invalidate_blogs
+    from app.blog.feed import blogs_changed
+    from app.blog.model import Blog
+    from app.database import session_scope
+
+    derivatives = await derivative_pool.generate(path)
+    async with session_scope() as db:
+        updated = (
+            await db.execute(
+                update(Blog)
+                .where(Blog.id.in_(blog_ids), Blog.image == path)
+                .values(
+                    thumbnail=derivatives["thumbnail"],
+                    image_webp=derivatives["image_webp"],
+                )
+                .returning(Blog.id, Blog.owner_id)
+            )
+        ).all()
+        await db.commit()
+    by_owner = defaultdict(list)
+    for id, owner_id in updated:
+        by_owner[owner_id].append(id)
+    for owner_id, ids in by_owner.items():
+        await invalidate_blogs(ids, owner_id)
+        await blogs_changed(owner_id, {id: derivatives for id in ids})
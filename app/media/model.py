@@ -0,0 +1,14 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+
+from app.database import Base
+
+
+class Media(Base):
+    __tablename__ = "media"
+
+    id = Column(String, primary_key=True)
+    path = Column(String)
+    content_type = Column(String)
+    size = Column(Integer)
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    created_at = Column(DateTime, nullable=True)
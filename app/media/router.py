@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.schema import AuthPrincipal
+from app.config import get_settings
+from app.database import get_db
+from app.media.model import Media
+from app.media.schema import Media as MediaSchema
+from app.media.serving import media_response
+from app.media.storage import save_stream
+from app.utils.auth import get_current_principal
+
+router = APIRouter(tags=["media"], prefix="/media")
+
+settings = get_settings()
+
+
+@router.post("/", response_model=MediaSchema, status_code=status.HTTP_201_CREATED)
+async def upload_media(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: AuthPrincipal = Depends(get_current_principal),
+):
+    """Upload an image as the raw request body, streamed straight to disk.
+
+    The returned ``id`` can be passed as ``media_id`` when creating a blog.
+    """
+    content_length = request.headers.get("content-length")
+    if (
+        content_length
+        and content_length.isdigit()
+        and (int(content_length) > settings.MEDIA_MAX_BYTES)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {settings.MEDIA_MAX_BYTES} bytes",
+        )
+    media_id, path, content_type, size = await save_stream(
+        request.stream(), settings.MEDIA_MAX_BYTES
+    )
+    media = Media(
+        id=media_id,
+        path=path,
+        content_type=content_type,
+        size=size,
+        owner_id=user.id,
+        created_at=datetime.now(),
+    )
+    db.add(media)
+    await db.commit()
+    return media
+
+
+@router.api_route("/{name}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_media(name: str, request: Request):
+    return await media_response(request, name, settings.MEDIA_PRECOMPRESSED)
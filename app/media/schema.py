@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class Media(BaseModel):
+    id: str
+    path: str
+    content_type: str
+    size: int
+    created_at: datetime = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,204 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, Response, status
+from starlette.types import Receive, Scope, Send
+
+from app.media.storage import MEDIA_DIR
+
+SAFE_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+# upload_file and save_stream name files after a fresh uuid (derivatives
+# add a suffix), so their content never changes under the same URL.
+IMMUTABLE_NAME = re.compile(
+    r"^[0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12}"
+    r"(_[a-z]+)?\.[A-Za-z0-9]+$"
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def resolve_media_path(name: str, base_dir: str = MEDIA_DIR) -> str:
+    """Map a URL file name onto a path that is guaranteed to be in base_dir."""
+    not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    if not SAFE_NAME.match(name):
+        raise not_found
+    root = os.path.realpath(base_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.dirname(path) != root:
+        raise not_found
+    return path
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into inclusive offsets.
+
+    Returns None for anything unsatisfiable; multi-range requests are not
+    supported and are treated the same way.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class MediaFileResponse(Response):
+    """Send ``count`` bytes of a file starting at ``offset``.
+
+    Uses the ASGI ``http.response.zerocopy`` extension (sendfile) when the
+    server offers it and falls back to chunked async reads otherwise.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        count: int,
+        status_code: int = status.HTTP_200_OK,
+        headers: Optional[dict] = None,
+        media_type: Optional[str] = None,
+    ):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.body = b""
+        self.init_headers(headers)
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": file,
+                        "offset": self.offset,
+                        "count": self.count,
+                    }
+                )
+            return
+        async with await anyio.open_file(self.path, "rb") as file:
+            await file.seek(self.offset)
+            remaining = self.count
+            while remaining:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0,
+                    }
+                )
+            if remaining:
+                await send({"type": "http.response.body", "body": b""})
+
+
+async def _find_sidecar(path: str, accept_encoding: str):
+    accepted = {value.split(";")[0].strip() for value in accept_encoding.split(",")}
+    for encoding, suffix in SIDECARS:
+        if encoding in accepted:
+            try:
+                return (
+                    encoding,
+                    path + suffix,
+                    await anyio.to_thread.run_sync(os.stat, path + suffix),
+                )
+            except FileNotFoundError:
+                continue
+    return None
+
+
+async def media_response(
+    request: Request, name: str, precompressed: bool = True
+) -> Response:
+    path = resolve_media_path(name)
+    try:
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL
+        if IMMUTABLE_NAME.match(name)
+        else DEFAULT_CACHE_CONTROL,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+    if precompressed:
+        headers["Vary"] = "Accept-Encoding"
+        sidecar = await _find_sidecar(path, request.headers.get("accept-encoding", ""))
+        if sidecar is not None:
+            encoding, path, stat_result = sidecar
+            headers["Content-Encoding"] = encoding
+            del headers["Accept-Ranges"]
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers["ETag"] = etag
+    size = stat_result.st_size
+
+    # Weak comparison: a compressed copy of this response carries W/<etag>.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in {
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    }:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if (
+        range_header
+        and "Accept-Ranges" in headers
+        and (if_range is None or if_range == etag)
+    ):
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers=headers,
+            )
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return MediaFileResponse(
+            path,
+            start,
+            end - start + 1,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            headers=headers,
+            media_type=media_type,
+        )
+    return MediaFileResponse(path, 0, size, headers=headers, media_type=media_type)
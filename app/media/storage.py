@@ -0,0 +1,76 @@
+import os
+import uuid
+from typing import AsyncIterator, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, status
+
+MEDIA_DIR = "media"
+
+# (magic prefix, offset, content type, extension)
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png", "png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg", "jpg"),
+    (b"GIF87a", 0, "image/gif", "gif"),
+    (b"GIF89a", 0, "image/gif", "gif"),
+    (b"WEBP", 8, "image/webp", "webp"),
+)
+SNIFF_BYTES = 16
+
+
+def sniff_content_type(head: bytes) -> Optional[Tuple[str, str]]:
+    for magic, offset, content_type, ext in SIGNATURES:
+        if head[offset : offset + len(magic)] == magic:
+            if ext == "webp" and not head.startswith(b"RIFF"):
+                continue
+            return content_type, ext
+    return None
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File is larger than {max_bytes} bytes",
+    )
+
+
+async def save_stream(
+    chunks: AsyncIterator[bytes], max_bytes: int, base_dir: str = MEDIA_DIR
+) -> Tuple[str, str, str, int]:
+    """Write an incoming byte stream to ``base_dir`` as it arrives.
+
+    The content type is sniffed from the first bytes, and the size limit is
+    enforced per chunk so an oversized upload is cut off without ever being
+    buffered. Returns ``(media_id, path, content_type, size)``.
+    """
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= SNIFF_BYTES:
+            break
+    detected = sniff_content_type(head)
+    if detected is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported image type",
+        )
+    content_type, ext = detected
+    if len(head) > max_bytes:
+        raise _too_large(max_bytes)
+
+    os.makedirs(base_dir, exist_ok=True)
+    media_id = uuid.uuid4().hex
+    path = f"{base_dir}/{media_id}.{ext}"
+    size = len(head)
+    try:
+        async with await anyio.open_file(path, "wb") as out:
+            await out.write(head)
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                await out.write(chunk)
+    except BaseException:
+        await anyio.Path(path).unlink(missing_ok=True)
+        raise
+    return media_id, path, content_type, size
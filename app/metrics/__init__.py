@@ -0,0 +1,12 @@
+from app.metrics.context import RequestTimings, current_timings
+from app.metrics.registry import Counter, Gauge, Histogram, Registry, registry
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "RequestTimings",
+    "current_timings",
+    "registry",
+]
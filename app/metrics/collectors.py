@@ -0,0 +1,32 @@
+from typing import Iterable
+
+from app.cache import caches
+from app.metrics.registry import registry
+from app.utils.hashing import hashing_service
+
+
+def cache_metrics() -> Iterable[str]:
+    yield "# HELP cache_events_total In-process cache lookups and evictions"
+    yield "# TYPE cache_events_total counter"
+    for name, cache in sorted(caches.items()):
+        stats = cache.stats()
+        for event in ("hits", "misses", "evictions"):
+            yield f'cache_events_total{{cache="{name}",event="{event}"}} {stats[event]}'
+    yield "# HELP cache_entries Entries currently held by in-process caches"
+    yield "# TYPE cache_entries gauge"
+    for name, cache in sorted(caches.items()):
+        yield f'cache_entries{{cache="{name}"}} {cache.stats()["size"]}'
+
+
+def hashing_metrics() -> Iterable[str]:
+    stats = hashing_service.stats.snapshot()
+    yield "# HELP password_hashing_pending bcrypt jobs queued or running"
+    yield "# TYPE password_hashing_pending gauge"
+    yield f"password_hashing_pending {hashing_service.pending}"
+    yield "# HELP password_hashing_rejected_total bcrypt jobs rejected with 503"
+    yield "# TYPE password_hashing_rejected_total counter"
+    yield f"password_hashing_rejected_total {stats['rejected']}"
+
+
+registry.add_collector(cache_metrics)
+registry.add_collector(hashing_metrics)
@@ -0,0 +1,18 @@
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestTimings:
+    """Per-request accumulator shared with DB event hooks and hashing."""
+
+    __slots__ = ("db_queries", "db_seconds", "hash_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
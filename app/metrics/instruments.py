@@ -0,0 +1,59 @@
+from app.metrics.registry import SIZE_BUCKETS, registry
+
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being served"
+)
+request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency by route",
+    labels=("method", "route", "status"),
+)
+response_size = registry.histogram(
+    "http_response_size_bytes",
+    "Response body size by route",
+    labels=("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    labels=("route",),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+request_db_duration = registry.histogram(
+    "http_request_db_seconds",
+    "Database time spent per request",
+    labels=("route",),
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Duration of individual database statements"
+)
+hashing_queue_duration = registry.histogram(
+    "password_hashing_queue_seconds",
+    "Time bcrypt jobs wait for a pool worker",
+    labels=("operation",),
+)
+hashing_run_duration = registry.histogram(
+    "password_hashing_run_seconds",
+    "Time bcrypt jobs spend running in a pool worker",
+    labels=("operation",),
+)
+rate_limit_rejections = registry.counter(
+    "rate_limit_rejections_total",
+    "Requests rejected with 429 by the rate limiter",
+    labels=("route", "key"),
+)
+jobs_processed = registry.counter(
+    "jobs_processed_total",
+    "Background jobs by outcome (done, retried, failed)",
+    labels=("kind", "outcome"),
+)
+job_duration = registry.histogram(
+    "job_duration_seconds", "Background job run time", labels=("kind",)
+)
+compressed_responses = registry.counter(
+    "compressed_responses_total",
+    "Compressed responses by encoding and how the body was produced "
+    "(whole, stream, cache)",
+    labels=("encoding", "source"),
+)
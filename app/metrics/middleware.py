@@ -0,0 +1,69 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics.context import RequestTimings, current_timings
+from app.metrics.instruments import (
+    request_db_duration,
+    request_db_queries,
+    request_duration,
+    requests_in_flight,
+    response_size,
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency, size and DB work.
+
+    With ``server_timing`` enabled the response also carries a
+    ``Server-Timing`` header with app, db and hashing durations.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started_at = time.perf_counter()
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    elapsed = (time.perf_counter() - started_at) * 1000
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        f"app;dur={elapsed:.1f}, "
+                        f'db;dur={timings.db_seconds * 1000:.1f};desc="'
+                        f'{timings.db_queries} queries", '
+                        f"hash;dur={timings.hash_seconds * 1000:.1f}",
+                    )
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec()
+            current_timings.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            request_duration.observe(
+                time.perf_counter() - started_at, method, route_path, str(status_code)
+            )
+            response_size.observe(body_size, method, route_path)
+            request_db_queries.observe(timings.db_queries, route_path)
+            request_db_duration.observe(timings.db_seconds, route_path)
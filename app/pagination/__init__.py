@@ -0,0 +1,5 @@
+from app.pagination.cursor import decode_cursor, encode_cursor
+from app.pagination.keyset import CursorParams, paginate
+from app.pagination.schema import Page
+
+__all__ = ["CursorParams", "Page", "decode_cursor", "encode_cursor", "paginate"]
@@ -0,0 +1,64 @@
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime
+from typing import Any, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Column, DateTime
+
+from app.config import get_settings
+
+NEXT = "next"
+PREV = "prev"
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    secret = get_settings().JWT_SECRET_KEY.encode()
+    return hmac.new(secret, payload, hashlib.sha256).digest()[:16]
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load(column: Column, value: Any) -> Any:
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values: Sequence[Any], direction: str = NEXT) -> str:
+    payload = json.dumps(
+        {"d": direction, "k": [_dump(value) for value in values]},
+        separators=(",", ":"),
+    ).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, keyset: Sequence[Column]) -> Tuple[str, tuple]:
+    try:
+        encoded_payload, encoded_signature = cursor.split(".")
+        payload = _b64decode(encoded_payload)
+        if not hmac.compare_digest(_b64decode(encoded_signature), _sign(payload)):
+            raise ValueError("Bad signature")
+        data = json.loads(payload)
+        if data["d"] not in (NEXT, PREV) or len(data["k"]) != len(keyset):
+            raise ValueError("Bad cursor payload")
+        values = tuple(_load(column, value) for column, value in zip(keyset, data["k"]))
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return data["d"], values
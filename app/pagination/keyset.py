@@ -0,0 +1,78 @@
+from typing import Any, Optional, Sequence
+
+from fastapi import Query, Request
+from sqlalchemy import Column, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.pagination.cursor import NEXT, PREV, decode_cursor, encode_cursor
+
+settings = get_settings()
+
+
+class CursorParams:
+    def __init__(
+        self,
+        limit: int = Query(
+            default=settings.PAGINATION_DEFAULT_LIMIT,
+            ge=1,
+            le=settings.PAGINATION_MAX_LIMIT,
+        ),
+        cursor: Optional[str] = Query(default=None),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+
+def _key_of(row: Any, keyset: Sequence[Column]) -> tuple:
+    mapping = getattr(row, "_mapping", None)
+    if mapping is not None:
+        return tuple(mapping[column.key] for column in keyset)
+    return tuple(getattr(row, column.key) for column in keyset)
+
+
+def _link(request: Request, cursor: str) -> str:
+    return str(request.url.include_query_params(cursor=cursor))
+
+
+async def paginate(
+    db: AsyncSession,
+    stmt: Select,
+    keyset: Sequence[Column],
+    params: CursorParams,
+    request: Request,
+) -> dict:
+    """Newest-first keyset pagination over ``keyset`` (e.g. created_at, id).
+
+    Every page is a single index range scan of ``limit + 1`` rows, so the
+    cost does not grow with how deep the client has scrolled.
+    """
+    direction, after = NEXT, None
+    if params.cursor:
+        direction, after = decode_cursor(params.cursor, keyset)
+
+    key = tuple_(*keyset)
+    if direction == NEXT:
+        if after is not None:
+            stmt = stmt.where(key < tuple_(*after))
+        stmt = stmt.order_by(*(column.desc() for column in keyset))
+    else:
+        stmt = stmt.where(key > tuple_(*after))
+        stmt = stmt.order_by(*(column.asc() for column in keyset))
+
+    result = await db.execute(stmt.limit(params.limit + 1))
+    single_entity = len(stmt.column_descriptions) == 1
+    rows = result.scalars().all() if single_entity else result.all()
+    has_more = len(rows) > params.limit
+    rows = rows[: params.limit]
+    if direction == PREV:
+        rows.reverse()
+
+    has_next = has_more if direction == NEXT else True
+    has_prev = after is not None if direction == NEXT else has_more
+    page = {"items": rows, "next": None, "prev": None}
+    if rows and has_next:
+        page["next"] = _link(request, encode_cursor(_key_of(rows[-1], keyset), NEXT))
+    if rows and has_prev:
+        page["prev"] = _link(request, encode_cursor(_key_of(rows[0], keyset), PREV))
+    return page
@@ -0,0 +1,27 @@
+from app.ratelimit.algorithms import Decision, Rate, parse_rate
+from app.ratelimit.backends import (
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+)
+from app.ratelimit.limiter import (
+    RateLimiter,
+    Rule,
+    keep_rate_limit_headers,
+    limiter,
+    rate_limit,
+)
+
+__all__ = [
+    "Decision",
+    "MemoryRateLimitBackend",
+    "Rate",
+    "RateLimitBackend",
+    "RateLimiter",
+    "RedisRateLimitBackend",
+    "Rule",
+    "keep_rate_limit_headers",
+    "limiter",
+    "parse_rate",
+    "rate_limit",
+]
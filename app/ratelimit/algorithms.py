@@ -0,0 +1,129 @@
+import math
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: float
+
+    def __str__(self) -> str:
+        return f"{self.limit};w={math.ceil(self.period)}"
+
+
+def parse_rate(value: str) -> Rate:
+    """Parse ``"5/minute"`` or ``"100/30s"`` into a ``Rate``."""
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d*)\s*(\w+)\s*", value)
+    if match is None:
+        raise ValueError(f"Invalid rate {value!r}")
+    limit, multiplier, unit = match.groups()
+    unit = unit.rstrip("s") if unit != "s" else "second"
+    if unit not in PERIODS:
+        raise ValueError(f"Invalid rate period {value!r}")
+    return Rate(int(limit), int(multiplier or 1) * PERIODS[unit])
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int = 0
+
+    def headers(self) -> dict:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": str(self.reset),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+# Token bucket: ``limit`` tokens refilled evenly over ``period``, so bursts
+# up to ``limit`` pass and sustained traffic is held to the average rate.
+# State is ``(tokens, updated_at)``.
+BucketState = Tuple[float, float]
+
+
+def token_bucket(
+    state: Optional[BucketState], rate: Rate, now: float
+) -> Tuple[BucketState, bool]:
+    tokens, updated_at = state or (rate.limit, now)
+    refill = max(0.0, now - updated_at) * rate.limit / rate.period
+    tokens = min(float(rate.limit), tokens + refill)
+    allowed = tokens >= 1
+    if allowed:
+        tokens -= 1
+    return (tokens, now), allowed
+
+
+def bucket_decision(rate: Rate, tokens: float, allowed: bool) -> Decision:
+    per_token = rate.period / rate.limit
+    return Decision(
+        allowed=allowed,
+        limit=rate.limit,
+        remaining=int(tokens),
+        reset=math.ceil((rate.limit - tokens) * per_token),
+        retry_after=0 if allowed else math.ceil((1 - tokens) * per_token),
+    )
+
+
+# Sliding window counter: the previous fixed window's count is weighted by
+# how much of it still overlaps the trailing ``period``, which bounds the
+# burst at a window boundary without storing one entry per request.
+# State is ``(window_start, current_count, previous_count)``.
+WindowState = Tuple[float, int, int]
+
+
+def _estimate(state: WindowState, rate: Rate, now: float) -> float:
+    start, current, previous = state
+    return previous * (1 - (now - start) / rate.period) + current
+
+
+def sliding_window(
+    state: Optional[WindowState], rate: Rate, now: float
+) -> Tuple[WindowState, bool]:
+    window = now - now % rate.period
+    start, current, previous = state or (window, 0, 0)
+    if window - start >= 2 * rate.period:
+        start, current, previous = window, 0, 0
+    elif window > start:
+        start, current, previous = window, 0, current
+    allowed = _estimate((start, current, previous), rate, now) + 1 <= rate.limit
+    if allowed:
+        current += 1
+    return (start, current, previous), allowed
+
+
+def window_decision(
+    rate: Rate, state: WindowState, allowed: bool, now: float
+) -> Decision:
+    start, current, previous = state
+    elapsed = now - start
+    retry_after = 0.0
+    if not allowed:
+        if current + 1 <= rate.limit:
+            # Wait for enough of the previous window to slide out.
+            retry_after = (
+                rate.period * (1 - (rate.limit - current - 1) / previous) - elapsed
+            )
+        else:
+            # Wait for the next window, where this one's count is weighted.
+            retry_after = (rate.period - elapsed) + max(
+                0.0, rate.period * (1 - (rate.limit - 1) / current)
+            )
+    retry_after = max(1, math.ceil(retry_after)) if not allowed else 0
+    return Decision(
+        allowed=allowed,
+        limit=rate.limit,
+        remaining=max(0, math.floor(rate.limit - _estimate(state, rate, now))),
+        reset=max(math.ceil(rate.period - elapsed), retry_after),
+        retry_after=retry_after,
+    )
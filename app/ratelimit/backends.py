@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Optional
+
+from app.cache.backends import RedisBackend, RedisError
+from app.cache.lru import TTLCache
+from app.ratelimit.algorithms import (
+    Decision,
+    Rate,
+    bucket_decision,
+    sliding_window,
+    token_bucket,
+    window_decision,
+)
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ("token_bucket", "sliding_window")
+
+
+class RateLimitBackend:
+    """Applies a rate to a key and reports whether this hit is allowed."""
+
+    async def hit(self, key: str, rate: Rate, algorithm: str) -> Decision:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters; each worker enforces its own share of a limit.
+
+    Keys live in a bounded LRU so a flood of distinct IPs or emails evicts
+    the oldest counters instead of growing memory.
+    """
+
+    def __init__(self, maxsize: int):
+        self._state = TTLCache("ratelimit", maxsize, 2 * 86400)
+
+    async def hit(self, key: str, rate: Rate, algorithm: str) -> Decision:
+        now = time.time()
+        state = self._state.get(key)
+        if algorithm == "token_bucket":
+            state, allowed = token_bucket(state, rate, now)
+            self._state.set(key, state, ttl=rate.period)
+            return bucket_decision(rate, state[0], allowed)
+        state, allowed = sliding_window(state, rate, now)
+        self._state.set(key, state, ttl=2 * rate.period)
+        return window_decision(rate, state, allowed, now)
+
+
+# Same arithmetic as ``token_bucket``/``sliding_window``, run atomically in
+# Redis. The caller's clock is passed in so memory and Redis agree.
+TOKEN_BUCKET_SCRIPT = """
+local limit, period, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or limit
+local ts = tonumber(state[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - ts) * limit / period)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(period * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+SLIDING_WINDOW_SCRIPT = """
+local limit, period, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local window = now - math.fmod(now, period)
+local state = redis.call('HMGET', KEYS[1], 'start', 'current', 'previous')
+local start = tonumber(state[1]) or window
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+if window - start >= 2 * period then
+  start, current, previous = window, 0, 0
+elseif window > start then
+  start, current, previous = window, 0, current
+end
+local allowed = 0
+if previous * (1 - (now - start) / period) + current + 1 <= limit then
+  current = current + 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'start', tostring(start), 'current', current,
+  'previous', previous)
+redis.call('PEXPIRE', KEYS[1], math.ceil(2 * period * 1000))
+return {allowed, tostring(start), current, previous}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Counters shared by every worker through Redis.
+
+    If Redis is unreachable the hit is allowed and logged, like a cache
+    miss: an outage of the limiter must not lock every user out.
+    """
+
+    def __init__(self, url: str, pool_size: int, prefix: str = "rl:"):
+        self._redis = RedisBackend(url, pool_size)
+        self.prefix = prefix
+        self._scripts = {
+            "token_bucket": TOKEN_BUCKET_SCRIPT,
+            "sliding_window": SLIDING_WINDOW_SCRIPT,
+        }
+        self._shas = {
+            name: hashlib.sha1(script.encode()).hexdigest()
+            for name, script in self._scripts.items()
+        }
+
+    async def _eval(self, algorithm: str, key: str, *args) -> Optional[list]:
+        try:
+            try:
+                return await self._redis.execute(
+                    "EVALSHA", self._shas[algorithm], 1, key, *args
+                )
+            except RedisError as e:
+                if not str(e).startswith("NOSCRIPT"):
+                    raise
+                return await self._redis.execute(
+                    "EVAL", self._scripts[algorithm], 1, key, *args
+                )
+        except (OSError, asyncio.TimeoutError, RedisError) as e:
+            logger.warning("rate limit check failed: %s", e)
+            return None
+
+    async def hit(self, key: str, rate: Rate, algorithm: str) -> Decision:
+        now = time.time()
+        reply = await self._eval(
+            algorithm, self.prefix + key, rate.limit, rate.period, repr(now)
+        )
+        if reply is None:
+            return Decision(True, rate.limit, rate.limit, 0)
+        allowed = bool(reply[0])
+        if algorithm == "token_bucket":
+            return bucket_decision(rate, float(reply[1]), allowed)
+        state = (float(reply[1]), int(reply[2]), int(reply[3]))
+        return window_decision(rate, state, allowed, now)
+
+    async def close(self) -> None:
+        await self._redis.close()
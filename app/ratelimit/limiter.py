@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.config import get_settings
+from app.metrics.instruments import rate_limit_rejections
+from app.ratelimit.algorithms import Decision, Rate, parse_rate
+from app.ratelimit.backends import (
+    ALGORITHMS,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RedisRateLimitBackend,
+)
+
+settings = get_settings()
+
+# request.state attribute holding the headers of the last allowed decision.
+HEADERS_STATE = "rate_limit_headers"
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Limit ``rate`` per value of ``key`` ("ip", "email" or "route")."""
+
+    key: str
+    rate: Rate
+    algorithm: str
+
+    def __post_init__(self):
+        if self.algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm {self.algorithm!r}")
+
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def body_email(request: Request) -> Optional[str]:
+    # FastAPI has already read the body, so this only re-parses the bytes.
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower()[:254] if isinstance(email, str) else None
+
+
+class RateLimiter:
+    """Checks a route's rules in order and rejects with 429 on the first
+    exhausted one. Only hits up to the rejecting rule are counted."""
+
+    def __init__(self, backend: RateLimitBackend, rules: Dict[str, List[Rule]]):
+        self.backend = backend
+        self.rules = rules
+
+    async def _value(self, rule: Rule, request: Request) -> Optional[str]:
+        if rule.key == "ip":
+            return client_ip(request)
+        if rule.key == "email":
+            return await body_email(request)
+        return "*"
+
+    async def check(self, route: str, request: Request) -> Optional[Decision]:
+        """The tightest decision across ``route``'s rules."""
+        tightest = None
+        for rule in self.rules.get(route, ()):
+            value = await self._value(rule, request)
+            if value is None:
+                continue
+            decision = await self.backend.hit(
+                f"{route}:{rule.key}:{value}", rule.rate, rule.algorithm
+            )
+            if not decision.allowed:
+                rate_limit_rejections.inc(1, route, rule.key)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, please retry later",
+                    headers=decision.headers(),
+                )
+            if tightest is None or decision.remaining < tightest.remaining:
+                tightest = decision
+        return tightest
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_limiter() -> RateLimiter:
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        backend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+    elif settings.RATE_LIMIT_BACKEND == "redis":
+        backend = RedisRateLimitBackend(settings.CACHE_URL, settings.CACHE_POOL_SIZE)
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {settings.RATE_LIMIT_BACKEND!r}")
+
+    # IPs get a bucket so a shared NAT can burst; emails get a window so
+    # guesses against one account are capped whichever IPs they come from.
+    per_ip = Rule("ip", parse_rate(settings.RATE_LIMIT_IP), "token_bucket")
+    per_email = Rule("email", parse_rate(settings.RATE_LIMIT_EMAIL), "sliding_window")
+    per_route = (
+        [Rule("route", parse_rate(settings.RATE_LIMIT_ROUTE), "token_bucket")]
+        if settings.RATE_LIMIT_ROUTE
+        else []
+    )
+    rules = {
+        "signin": [per_ip, per_email, *per_route],
+        "signup": [
+            Rule("ip", parse_rate(settings.RATE_LIMIT_SIGNUP_IP), "token_bucket"),
+            per_email,
+            *per_route,
+        ],
+        "forgot-password": [per_ip, per_email, *per_route],
+        "resend-email": [per_ip, per_email, *per_route],
+    }
+    return RateLimiter(backend, rules)
+
+
+limiter = create_limiter()
+
+
+def rate_limit(route: str) -> Callable:
+    """Dependency enforcing ``route``'s rules before the endpoint runs."""
+
+    async def dependency(request: Request, response: Response) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        decision = await limiter.check(route, request)
+        if decision is not None:
+            response.headers.update(decision.headers())
+            # The injected response is discarded when the endpoint raises.
+            setattr(request.state, HEADERS_STATE, decision.headers())
+
+    return dependency
+
+
+def keep_rate_limit_headers(
+    handler: Callable[[Request, Exception], Awaitable[Response]]
+) -> Callable[[Request, Exception], Awaitable[Response]]:
+    """Wrap an exception handler so error responses of rate limited routes
+    still carry the ``RateLimit-*`` headers."""
+
+    async def wrapped(request: Request, exc: Exception) -> Response:
+        response = await handler(request, exc)
+        for name, value in getattr(request.state, HEADERS_STATE, {}).items():
+            response.headers.setdefault(name, value)
+        return response
+
+    return wrapped
@@ -0,0 +1,17 @@
+from app.database import engine
+from app.search.backends import (
+    PostgresSearchBackend,
+    SearchBackend,
+    SQLiteFTSBackend,
+    create_search_backend,
+)
+
+search_backend = create_search_backend(engine.dialect.name)
+
+__all__ = [
+    "PostgresSearchBackend",
+    "SQLiteFTSBackend",
+    "SearchBackend",
+    "create_search_backend",
+    "search_backend",
+]
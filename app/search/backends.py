@@ -0,0 +1,151 @@
+import re
+from typing import List
+
+from sqlalchemy import bindparam, column, func, literal_column, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.blog.model import Blog
+
+SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS = "<mark>", "</mark>", "…"
+SNIPPET_TOKENS = 12
+
+
+class SearchBackend:
+    """Full-text index over blog titles and descriptions; the tables and
+    columns behind it are created by migration 0003.
+
+    ``index``/``remove`` run on the caller's session so the index changes
+    commit or roll back together with the blog write.
+    """
+
+    async def index(self, db: AsyncSession, blog: Blog) -> None:
+        await self.index_many(
+            db, [{"id": blog.id, "title": blog.title, "description": blog.description}]
+        )
+
+    async def remove(self, db: AsyncSession, id: int) -> None:
+        await self.remove_many(db, [id])
+
+    async def index_many(self, db: AsyncSession, rows: List[dict]) -> None:
+        """(Re)index ``rows`` of ``id``/``title``/``description`` in one batch."""
+        raise NotImplementedError
+
+    async def remove_many(self, db: AsyncSession, ids: List[int]) -> None:
+        raise NotImplementedError
+
+    async def search(
+        self, db: AsyncSession, query: str, limit: int, offset: int
+    ) -> List[dict]:
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(SearchBackend):
+    fts = table("blogs_fts", column("rowid"), column("title"), column("description"))
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """Turn free text into an FTS5 query: every word must match and the
+        last one may be a prefix. Quoting keeps FTS5 syntax out of user hands.
+        """
+        words = re.findall(r"\w+", query)
+        terms = [f'"{word}"' for word in words]
+        if terms:
+            terms[-1] += "*"
+        return " ".join(terms)
+
+    async def index_many(self, db: AsyncSession, rows: List[dict]) -> None:
+        if not rows:
+            return
+        await self.remove_many(db, [row["id"] for row in rows])
+        await db.execute(
+            text(
+                "INSERT INTO blogs_fts (rowid, title, description) "
+                "VALUES (:id, :title, :description)"
+            ),
+            rows,
+        )
+
+    async def remove_many(self, db: AsyncSession, ids: List[int]) -> None:
+        if not ids:
+            return
+        await db.execute(
+            text("DELETE FROM blogs_fts WHERE rowid IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            ),
+            {"ids": list(ids)},
+        )
+
+    async def search(
+        self, db: AsyncSession, query: str, limit: int, offset: int
+    ) -> List[dict]:
+        match = self.match_expression(query)
+        if not match:
+            return []
+        fts_table = literal_column("blogs_fts")
+        bm25 = func.bm25(fts_table)
+        stmt = (
+            select(
+                *Blog.__table__.c,
+                func.snippet(
+                    fts_table,
+                    -1,
+                    SNIPPET_START,
+                    SNIPPET_END,
+                    SNIPPET_ELLIPSIS,
+                    SNIPPET_TOKENS,
+                ).label("snippet"),
+                (-bm25).label("rank"),
+            )
+            .select_from(self.fts.join(Blog, Blog.id == self.fts.c.rowid))
+            .where(fts_table.op("MATCH")(match))
+            .order_by(bm25)
+            .limit(limit)
+            .offset(offset)
+        )
+        return [dict(row._mapping) for row in await db.execute(stmt)]
+
+
+class PostgresSearchBackend(SearchBackend):
+    """tsvector backend: a generated, GIN-indexed column keeps itself in
+    sync, so ``index``/``remove`` have nothing to do."""
+
+    config = "english"
+
+    async def index_many(self, db: AsyncSession, rows: List[dict]) -> None:
+        pass
+
+    async def remove_many(self, db: AsyncSession, ids: List[int]) -> None:
+        pass
+
+    async def search(
+        self, db: AsyncSession, query: str, limit: int, offset: int
+    ) -> List[dict]:
+        ts_query = func.websearch_to_tsquery(self.config, query)
+        search_vector = literal_column("blogs.search_vector")
+        rank = func.ts_rank(search_vector, ts_query)
+        stmt = (
+            select(
+                *Blog.__table__.c,
+                func.ts_headline(
+                    self.config,
+                    func.coalesce(Blog.description, ""),
+                    ts_query,
+                    f"StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, "
+                    f"MaxWords={SNIPPET_TOKENS}, MinWords=3",
+                ).label("snippet"),
+                rank.label("rank"),
+            )
+            .where(search_vector.op("@@")(ts_query))
+            .order_by(rank.desc())
+            .limit(limit)
+            .offset(offset)
+        )
+        return [dict(row._mapping) for row in await db.execute(stmt)]
+
+
+def create_search_backend(dialect: str) -> SearchBackend:
+    if dialect == "sqlite":
+        return SQLiteFTSBackend()
+    if dialect == "postgresql":
+        return PostgresSearchBackend()
+    raise ValueError(f"Full-text search is not supported on {dialect!r}")
@@ -0,0 +1,8 @@
+from typing import Optional
+
+from app.blog.schema import Blog
+
+
+class BlogSearchResult(Blog):
+    snippet: Optional[str] = None
+    rank: float
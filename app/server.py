@@ -1,16 +1,28 @@
-from fastapi import FastAPI, status, HTTPException, Request
-from fastapi.responses import FileResponse
+from fastapi import FastAPI
+from fastapi.exception_handlers import (
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.blog.router import router as blog_router
 from app.auth.router import router as auth_router
-from app.blog import model as blog_model
-from app.auth import model as auth_model
-from app.database import engine
-
-blog_model.Base.metadata.create_all(bind=engine)
-auth_model.Base.metadata.create_all(bind=engine)
+from app.auth.jwks import router as jwks_router
+from app.cache import TTLCache
+from app.compression import CompressionMiddleware, available_encodings
+from app.media.router import router as media_router
+from app.metrics.router import router as metrics_router
+from app.health.router import router as health_router
+from app.config import get_settings
+from app.lifespan import lifespan
+from app.metrics.middleware import MetricsMiddleware
+from app.ratelimit import keep_rate_limit_headers
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/api/docs",
     redoc_url="/api/redocs",
     description="Api using FastAPI",
@@ -26,26 +38,48 @@ app = FastAPI(
     ],
 )
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    print("Middleware start...")
-    response = await call_next(request)
-    print("Middleware end...")
-    return response
+
+settings = get_settings()
+
+# Added first so it runs inside the metrics middleware, which then sees the
+# bytes actually sent.
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=available_encodings(
+            [name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",")]
+        ),
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        cache=TTLCache(
+            "compressed",
+            settings.COMPRESSION_CACHE_ENTRIES,
+            settings.COMPRESSION_CACHE_TTL_SECONDS,
+        ),
+        cache_max_body=settings.COMPRESSION_CACHE_MAX_BODY,
+    )
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
+app.add_exception_handler(
+    StarletteHTTPException, keep_rate_limit_headers(http_exception_handler)
+)
+app.add_exception_handler(
+    RequestValidationError,
+    keep_rate_limit_headers(request_validation_exception_handler),
+)
 
 
 app.include_router(auth_router)
+app.include_router(jwks_router)
+app.include_router(health_router)
 app.include_router(blog_router)
+app.include_router(media_router)
+
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
-
-
-@app.get("/{directory}/{file}", status_code=status.HTTP_200_OK)
-def show_uploaded_file(directory: str, file: str):
-    try:
-        return FileResponse(f"{directory}/{file}")
-    except Exception:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not found")
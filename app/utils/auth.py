@@ -1,19 +1,33 @@
+import hashlib
+import logging
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Union, Any, Optional
-from jose import jwt
-from sqlalchemy.orm import Session
+from typing import Optional, Union, Any
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 
 from pydantic import ValidationError
-from app.auth.schema import RefreshTokenSchema, TokenPayload, VerificationTokenPayload
+from app.auth.schema import (
+    AuthPrincipal,
+    RefreshTokenSchema,
+    TokenPayload,
+    VerificationTokenPayload,
+)
+from app.cache import TTLCache
 from app.database import get_db
 from app.auth.model import User
-from app.config import Settings
+from app.config import get_settings
+from app.utils.revocation import revocations
 
-settings = Settings()
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
 
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_MINUTES = settings.REFRESH_TOKEN_EXPIRE_MINUTES
@@ -23,37 +37,173 @@ JWT_REFRESH_SECRET_KEY = settings.JWT_REFRESH_SECRET_KEY
 JWT_VERIFICATION_TOKEN = settings.JWT_VERIFICATION_TOKEN
 JWT_RESET_TOKEN = settings.JWT_RESET_TOKEN
 
+keyring = None
+if settings.ACCESS_TOKEN_ALGORITHM:
+    from app.utils.keys import KeyRing
+
+    keyring = KeyRing(
+        settings.JWT_KEYS_DIR,
+        settings.ACCESS_TOKEN_ALGORITHM,
+        rotation=settings.JWT_KEY_ROTATION_DAYS * 86400,
+        overlap=settings.JWT_KEY_OVERLAP_MINUTES * 60,
+        token_lifetime=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
 reuseable_oauth = HTTPBearer(scheme_name="JWT Bearer")
 
 
-def create_access_token(subject: Union[str, Any], expires_delta: int = None) -> str:
+def jose_jwt():
+    """``jose.jwt``, imported on first use (or by the startup warmup) since
+    it loads python-jose's cryptography backend."""
+    from jose import jwt
+
+    return jwt
+
+
+class TokenVersionRegistry:
+    """Per-process view of ``User.token_version`` used to reject stale tokens.
+
+    Versions are reloaded from the database at most once every ``ttl``
+    seconds per user, and bumped locally as soon as this process changes a
+    password, so other workers converge within ``ttl``.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self._versions = TTLCache("token_versions", maxsize, ttl)
+
+    async def current(self, user_id: int, db: AsyncSession) -> Optional[int]:
+        version = self._versions.get(user_id)
+        if version is not None:
+            return version
+        version = await db.scalar(select(User.token_version).where(User.id == user_id))
+        if version is not None:
+            self.bump(user_id, version)
+        return version
+
+    def bump(self, user_id: int, version: int) -> None:
+        self._versions.set(user_id, version)
+
+
+token_versions = TokenVersionRegistry(
+    settings.USER_CACHE_SIZE, settings.TOKEN_VERSION_CACHE_SECONDS
+)
+token_cache = TTLCache(
+    "tokens", settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL_SECONDS
+)
+user_cache = TTLCache(
+    "users", settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS
+)
+
+
+def cache_user(user: AuthPrincipal) -> None:
+    user_cache.set(("id", user.id), user)
+    user_cache.set(("username", user.username), user)
+
+
+def invalidate_user(user: User) -> None:
+    user_cache.delete(("id", user.id))
+    user_cache.delete(("username", user.username))
+    token_versions.bump(user.id, user.token_version)
+
+
+async def get_user_by_username(
+    username: str, db: AsyncSession
+) -> Optional[AuthPrincipal]:
+    """The user's principal, cached as plain values.
+
+    A cached principal is only used while its ``token_version`` matches
+    ``token_versions``, so a password change or logout-everywhere in
+    another worker also drops this worker's copy within that registry's
+    ttl instead of the user cache's.
+    """
+    user = user_cache.get(("username", username))
+    if user is not None and user.token_version == await token_versions.current(
+        user.id, db
+    ):
+        return user
+    row = await db.scalar(select(User).where(User.username == username))
+    if row is None:
+        return None
+    user = AuthPrincipal.model_validate(row, from_attributes=True)
+    cache_user(user)
+    token_versions.bump(user.id, user.token_version)
+    return user
+
+
+def principal_claims(user: User) -> dict:
+    """Claims ``get_current_principal`` trusts without loading the user.
+
+    Changing any of these columns must bump ``token_version`` (as password
+    changes and email verification do), or existing tokens keep the old
+    values until they expire.
+    """
+    return {
+        "uid": user.id,
+        "ver": user.token_version,
+        "verified": user.verified,
+        "active": user.active,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+    }
+
+
+def version_claims(user: User) -> dict:
+    return {"uid": user.id, "ver": user.token_version}
+
+
+def create_access_token(
+    subject: Union[str, Any], expires_delta: int = None, claims: dict = None
+) -> str:
     if expires_delta is not None:
         expires_delta = datetime.utcnow() + expires_delta
     else:
         expires_delta = datetime.utcnow() + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expires_delta, "sub": str(subject), "token_type": "access"}
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, ALGORITHM)
+    to_encode = {
+        "exp": expires_delta,
+        "sub": str(subject),
+        "token_type": "access",
+        "jti": uuid.uuid4().hex,
+    }
+    to_encode.update(claims or {})
+    if keyring is not None:
+        return keyring.encode(to_encode)
+    encoded_jwt = jose_jwt().encode(to_encode, JWT_SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
 
-def create_refresh_token(subject: Union[str, Any], expires_delta: int = None) -> str:
+def create_refresh_token(
+    subject: Union[str, Any], expires_delta: int = None, claims: dict = None
+) -> str:
     if expires_delta is not None:
         expires_delta = datetime.utcnow() + expires_delta
     else:
         expires_delta = datetime.utcnow() + timedelta(
             minutes=REFRESH_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expires_delta, "sub": str(subject), "token_type": "refresh"}
-    encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
+    to_encode = {
+        "exp": expires_delta,
+        "sub": str(subject),
+        "token_type": "refresh",
+        "jti": uuid.uuid4().hex,
+    }
+    to_encode.update(claims or {})
+    encoded_jwt = jose_jwt().encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
 
-def get_user(token: str, db: Optional[Session] = None, check_for: str = "access"):
+def _decode_payload(token: str, check_for: str) -> dict:
+    if check_for == "access" and keyring is not None:
+        return keyring.decode(token)
     SECRET_KEY = JWT_SECRET_KEY if check_for == "access" else JWT_REFRESH_SECRET_KEY
+    return jose_jwt().decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def _verify_token(token: str, check_for: str) -> TokenPayload:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_payload(token, check_for)
         token_data = TokenPayload(**payload)
 
         if datetime.fromtimestamp(token_data.exp) < datetime.now():
@@ -62,38 +212,147 @@ def get_user(token: str, db: Optional[Session] = None, check_for: str = "access"
                 detail="Token expired",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-    except (jwt.JWTError, ValidationError):
+    except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return token_data
+
+
+def _token_revoked() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def decode_token(
+    token: str, check_for: str = "access", check_revoked: bool = True
+) -> TokenPayload:
+    cache_key = (check_for, hashlib.sha256(token.encode()).digest())
+    token_data = token_cache.get(cache_key)
+    if token_data is None:
+        token_data = _verify_token(token, check_for)
+        token_cache.set(cache_key, token_data, ttl=token_data.exp - time.time())
     if token_data.token_type != check_for:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Wrong token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if check_revoked and token_data.jti and revocations.is_revoked(token_data.jti):
+        raise _token_revoked()
+    return token_data
+
+
+async def get_user(token: str, db: AsyncSession, check_for: str = "access"):
+    return await _user_for_token(decode_token(token, check_for), db)
+
 
-    if db is None:
-        db: Session = next(get_db())
-    user = db.query(User).filter(User.username == token_data.sub).first()
+async def _user_for_token(token_data: TokenPayload, db: AsyncSession) -> AuthPrincipal:
+    user = await get_user_by_username(token_data.sub, db)
 
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not find user",
         )
+    if token_data.ver is not None and token_data.ver != user.token_version:
+        raise _token_revoked()
 
     return user
 
 
-def get_current_user(token: HTTPAuthorizationCredentials = Depends(reuseable_oauth)):
-    return get_user(token.credentials, check_for="access")
+async def get_current_user(
+    token: HTTPAuthorizationCredentials = Depends(reuseable_oauth),
+    db: AsyncSession = Depends(get_db),
+):
+    return await get_user(token.credentials, db, check_for="access")
 
 
-def validate_refresh_token(token: RefreshTokenSchema, db: Session):
-    return get_user(token.refresh_token, db, check_for="refresh")
+async def get_current_principal(
+    token: HTTPAuthorizationCredentials = Depends(reuseable_oauth),
+    db: AsyncSession = Depends(get_db),
+) -> AuthPrincipal:
+    """Authorize from access token claims without loading the user row.
+
+    Only the token version is checked, against ``token_versions``; the
+    verified and active flags come from the claims, which every change to
+    them invalidates by bumping the version. Tokens minted before principal
+    claims existed, or with ``AUTH_STATELESS_TOKENS`` disabled, fall back
+    to the user lookup.
+    """
+    token_data = decode_token(token.credentials, check_for="access")
+    if not settings.AUTH_STATELESS_TOKENS or token_data.uid is None:
+        return _usable(await get_user(token.credentials, db, check_for="access"))
+
+    principal = AuthPrincipal(
+        id=token_data.uid,
+        username=token_data.sub,
+        first_name=token_data.first_name,
+        last_name=token_data.last_name,
+        email=token_data.email,
+        verified=token_data.verified,
+        active=token_data.active,
+        token_version=token_data.ver,
+    )
+    if principal.token_version != await token_versions.current(principal.id, db):
+        raise _token_revoked()
+    return _usable(principal)
+
+
+def _usable(principal: AuthPrincipal) -> AuthPrincipal:
+    if not principal.verified:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Please verify your email"
+        )
+    if not principal.active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="User is not active"
+        )
+    return principal
+
+
+async def rotate_refresh_token(
+    token: RefreshTokenSchema, db: AsyncSession
+) -> AuthPrincipal:
+    """Validate a refresh token and revoke it, so it can be exchanged once.
+
+    Presenting a token that was already rotated means it leaked: every
+    session of the user is ended by bumping their token version.
+    """
+    token_data = decode_token(token.refresh_token, "refresh", check_revoked=False)
+    user = await _user_for_token(token_data, db)
+    if token_data.jti is None:
+        return user
+    if await revocations.consume(
+        db, token_data.jti, "refresh", token_data.exp, user.id
+    ):
+        await db.commit()
+        return user
+    auth_user = await db.get(User, user.id)
+    auth_user.token_version += 1
+    await db.commit()
+    invalidate_user(auth_user)
+    raise _token_revoked()
+
+
+async def revoke_token(
+    token: str, db: AsyncSession, check_for: str, user_id: int
+) -> None:
+    """Stage revocation of ``token`` if it belongs to ``user_id``."""
+    token_data = decode_token(token, check_for, check_revoked=False)
+    if token_data.jti is None or revocations.is_revoked(token_data.jti):
+        return
+    if token_data.uid is not None and token_data.uid != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    revocations.revoke(db, token_data.jti, check_for, token_data.exp, user_id)
 
 
 def create_verification_token(username: str, token_type: str = "verification"):
@@ -101,17 +360,19 @@ def create_verification_token(username: str, token_type: str = "verification"):
         JWT_VERIFICATION_TOKEN if token_type == "verification" else JWT_RESET_TOKEN
     )
     expires_delta = datetime.utcnow() + timedelta(minutes=15)
-    to_encode = {"exp": expires_delta, "sub": str(username)}
-    token = jwt.encode(to_encode, SECRET_KEY, ALGORITHM)
+    to_encode = {"exp": expires_delta, "sub": str(username), "jti": uuid.uuid4().hex}
+    token = jose_jwt().encode(to_encode, SECRET_KEY, ALGORITHM)
     return token
 
 
-def verify_verification_token(token: str, token_type: str = "verification"):
+async def verify_verification_token(
+    token: str, db: AsyncSession, token_type: str = "verification"
+):
     SECRET_KEY = (
         JWT_VERIFICATION_TOKEN if token_type == "verification" else JWT_RESET_TOKEN
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jose_jwt().decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         token_data = VerificationTokenPayload(**payload)
 
         if datetime.fromtimestamp(token_data.exp) < datetime.now():
@@ -120,21 +381,28 @@ def verify_verification_token(token: str, token_type: str = "verification"):
                 detail="Token expired",
                 headers={"WWW-Authenticate": "Bearer"},
             )
-    except (jwt.JWTError, ValidationError) as e:
-        print(str(e))
+    except (JWTError, ValidationError) as e:
+        logger.debug("Rejected %s token: %s", token_type, e)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    db: Session = next(get_db())
-    user = db.query(User).filter(User.username == token_data.sub).first()
+    user = await get_user_by_username(token_data.sub, db)
 
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not find user",
         )
+    if token_data.jti is not None and not await revocations.consume(
+        db, token_data.jti, token_type, token_data.exp, user.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token already used",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     return user
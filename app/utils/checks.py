@@ -1,13 +1,38 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
 from app.blog.model import Blog
 
 
-def get_blog_by_id(id: int, db: Session) -> Blog:
-    blog = db.query(Blog).filter(Blog.id == id)
-    if blog.first() is None:
+async def first_or_404(db: AsyncSession, stmt: Select, detail: str = "Not found"):
+    """First row of ``stmt`` in a single query, or a 404 with ``detail``."""
+    row = (await db.execute(stmt.limit(1))).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return row
+
+
+async def get_blog_by_id(id: int, db: AsyncSession) -> Blog:
+    blog = await db.get(Blog, id)
+    if blog is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found"
         )
-    return blog.first()
+    return blog
+
+
+async def get_blog_row(id: int, db: AsyncSession, *columns):
+    """Just ``columns`` of one blog, for handlers that never modify it."""
+    return await first_or_404(
+        db, select(*columns).where(Blog.id == id), "Blog not found"
+    )
+
+
+async def get_blog_version(id: int, db: AsyncSession) -> tuple:
+    """Fetch only the columns that make up a blog's validators."""
+    return tuple(
+        await get_blog_row(
+            id, db, Blog.created_at, Blog.updated_at, Blog.thumbnail, Blog.image_webp
+        )
+    )
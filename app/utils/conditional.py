@@ -0,0 +1,70 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Iterable, Optional
+
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+
+
+def make_etag(parts: Iterable[Any]) -> str:
+    digest = hashlib.sha1(repr(tuple(parts)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(
+                if_modified_since
+            )
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def validator_headers(
+    etag: str, last_modified: Optional[str], cache_control: str
+) -> dict:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def not_modified_response(
+    etag: str, last_modified: Optional[str], cache_control: str
+) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers=validator_headers(etag, last_modified, cache_control),
+    )
+
+
+def conditional_response(request: Request, entry: dict, cache_control: str) -> Response:
+    """Answer with 304 when the client's validators still match ``entry``.
+
+    ``entry`` holds an already serialized ``body`` plus its ``etag`` and
+    ``last_modified`` so a 304 never touches serialization.
+    """
+    etag, last_modified = entry["etag"], entry["last_modified"]
+    if not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, cache_control)
+    return ORJSONResponse(
+        entry["body"], headers=validator_headers(etag, last_modified, cache_control)
+    )
@@ -1,11 +1,194 @@
-from passlib.context import CryptContext
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.config import get_settings
+from app.metrics.context import current_timings
+from app.metrics.instruments import hashing_queue_duration, hashing_run_duration
+
+logger = logging.getLogger(__name__)
 
 
 class HashPassword:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    _pwd_context = None
+
+    @property
+    def pwd_context(self):
+        # passlib is only needed inside the pool workers, so the web process
+        # never pays for importing it.
+        if HashPassword._pwd_context is None:
+            from passlib.context import CryptContext
+
+            HashPassword._pwd_context = CryptContext(
+                schemes=["bcrypt"], deprecated="auto"
+            )
+        return HashPassword._pwd_context
 
     def get_hash_password(self, password):
         return self.pwd_context.hash(password)
 
     def verify_hash_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash_in_worker(password: str, submitted_at: float) -> Tuple[str, float, float]:
+    started_at = time.monotonic()
+    hashed = HashPassword().get_hash_password(password)
+    return hashed, started_at - submitted_at, time.monotonic() - started_at
+
+
+def _warm_worker() -> int:
+    """Load passlib and the bcrypt backend with a cheap low-round hash."""
+    HashPassword().pwd_context.handler("bcrypt").using(rounds=4).hash("warmup")
+    return os.getpid()
+
+
+def _verify_in_worker(
+    plain_password: str, hashed_password: str, submitted_at: float
+) -> Tuple[bool, float, float]:
+    started_at = time.monotonic()
+    matched = HashPassword().verify_hash_password(plain_password, hashed_password)
+    return matched, started_at - submitted_at, time.monotonic() - started_at
+
+
+class HashingStats:
+    def __init__(self):
+        self.calls = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def observe(self, queue_seconds: float, run_seconds: float) -> None:
+        self.calls += 1
+        self.queue_seconds_total += queue_seconds
+        self.queue_seconds_max = max(self.queue_seconds_max, queue_seconds)
+        self.run_seconds_total += run_seconds
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "rejected": self.rejected,
+            "queue_seconds_total": self.queue_seconds_total,
+            "queue_seconds_max": self.queue_seconds_max,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+
+class HashingService:
+    """Runs bcrypt hash/verify in a dedicated process pool.
+
+    At most ``max_pending`` operations may be queued or running; beyond that
+    callers get a 503 with ``Retry-After`` instead of piling onto the pool.
+    Time spent waiting for a pool worker is tracked separately from bcrypt
+    run time in ``stats``.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self.pending = 0
+        self.stats = HashingStats()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a pool whose worker died so the next call starts a new one."""
+        if self._executor is executor:
+            logger.warning("hashing pool is broken, starting a new one")
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, func, *args):
+        """Run ``func`` in the pool, once more on a fresh pool if it broke."""
+        loop = asyncio.get_running_loop()
+        for _ in range(2):
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(
+                    executor, func, *args, time.monotonic()
+                )
+            except BrokenProcessPool:
+                self._discard(executor)
+        raise self._unavailable()
+
+    async def _submit(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.stats.rejected += 1
+            raise self._unavailable()
+        self.pending += 1
+        try:
+            result, queue_seconds, run_seconds = await self._run(func, *args)
+        finally:
+            self.pending -= 1
+        self.stats.observe(queue_seconds, run_seconds)
+        operation = "hash" if func is _hash_in_worker else "verify"
+        hashing_queue_duration.observe(queue_seconds, operation)
+        hashing_run_duration.observe(run_seconds, operation)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.hash_seconds += queue_seconds + run_seconds
+        logger.debug(
+            "hashing %s: queued %.1fms, ran %.1fms",
+            func.__name__,
+            queue_seconds * 1000,
+            run_seconds * 1000,
+        )
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash_in_worker, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify_in_worker, plain_password, hashed_password)
+
+    async def warmup(self) -> int:
+        """Start one pool worker and load bcrypt in it; returns its pid.
+
+        Spawned pools start the other workers only as load needs them.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, _warm_worker)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def default_workers(web_concurrency: int) -> int:
+    """This server process's share of the cores, so that all web workers
+    together run at most one bcrypt process per core."""
+    return max(1, (os.cpu_count() or 1) // max(1, web_concurrency))
+
+
+settings = get_settings()
+
+hashing_service = HashingService(
+    max_workers=settings.HASHING_WORKERS or default_workers(settings.WEB_CONCURRENCY),
+    max_pending=settings.HASHING_MAX_PENDING,
+    retry_after=settings.HASHING_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,318 @@
+import base64
+import calendar
+import fcntl
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+from cryptography.exceptions import InvalidSignature, UnsupportedAlgorithm
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+from jose import JWTError
+
+logger = logging.getLogger(__name__)
+
+ALGORITHMS = ("EdDSA", "ES256")
+KEY_TYPES = {
+    "EdDSA": ed25519.Ed25519PrivateKey,
+    "ES256": ec.EllipticCurvePrivateKey,
+}
+# How often the keys directory is re-read for keys made by other workers.
+RELOAD_SECONDS = 60
+
+
+class KeyRingError(JWTError):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _numeric_date(value):
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple())
+    return value
+
+
+@dataclass
+class SigningKey:
+    kid: str
+    alg: str
+    created_at: float
+    private_key: object
+
+    def __post_init__(self):
+        self.public_key = self.private_key.public_key()
+
+    def sign(self, data: bytes) -> bytes:
+        if self.alg == "EdDSA":
+            return self.private_key.sign(data)
+        r, s = decode_dss_signature(
+            self.private_key.sign(data, ec.ECDSA(hashes.SHA256()))
+        )
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    def verify(self, signature: bytes, data: bytes) -> None:
+        if self.alg == "EdDSA":
+            self.public_key.verify(signature, data)
+            return
+        if len(signature) != 64:
+            raise InvalidSignature()
+        self.public_key.verify(
+            encode_dss_signature(
+                int.from_bytes(signature[:32], "big"),
+                int.from_bytes(signature[32:], "big"),
+            ),
+            data,
+            ec.ECDSA(hashes.SHA256()),
+        )
+
+    def jwk(self) -> dict:
+        jwk = {"kid": self.kid, "alg": self.alg, "use": "sig"}
+        if self.alg == "EdDSA":
+            raw = self.public_key.public_bytes(
+                serialization.Encoding.Raw, serialization.PublicFormat.Raw
+            )
+            jwk.update(kty="OKP", crv="Ed25519", x=_b64encode(raw))
+        else:
+            numbers = self.public_key.public_numbers()
+            jwk.update(
+                kty="EC",
+                crv="P-256",
+                x=_b64encode(numbers.x.to_bytes(32, "big")),
+                y=_b64encode(numbers.y.to_bytes(32, "big")),
+            )
+        return jwk
+
+
+def generate_private_key(alg: str):
+    if alg == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    return ec.generate_private_key(ec.SECP256R1())
+
+
+class KeyRing:
+    """Rotating set of asymmetric signing keys stored as PEM files.
+
+    Each file is ``<created_at>-<kid>.pem``. A new key is created
+    ``overlap`` seconds before the current one reaches ``rotation`` seconds
+    of age and is only published (via JWKS) until then, so verifiers that
+    cache the key set see it before any token is signed with it. A
+    superseded key keeps verifying for ``overlap`` plus ``token_lifetime``
+    seconds and is then deleted. Parsed key objects are cached; the
+    directory is re-read at most every ``RELOAD_SECONDS`` or when a token
+    names an unknown ``kid``. Only the first load happens in the caller;
+    later ones run on a background thread so request handlers never wait
+    on the directory or its lock.
+
+    Workers share the directory: changes to it are made under an exclusive
+    ``flock`` on ``.lock``, new keys appear atomically by rename, and a file
+    that cannot be read or parsed is skipped rather than failing requests.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        alg: str,
+        rotation: int,
+        overlap: int,
+        token_lifetime: int,
+    ):
+        if alg not in ALGORITHMS:
+            raise ValueError(f"Unsupported signing algorithm {alg!r}")
+        self.directory = directory
+        self.alg = alg
+        self.rotation = rotation
+        self.overlap = overlap
+        self.token_lifetime = token_lifetime
+        self._keys: Dict[str, SigningKey] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def _load_file(self, name: str) -> Optional[SigningKey]:
+        stem, ext = os.path.splitext(name)
+        created_at, _, kid = stem.partition("-")
+        if ext != ".pem" or not kid or not created_at.isdigit():
+            return None
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        try:
+            with open(os.path.join(self.directory, name), "rb") as pem:
+                private_key = serialization.load_pem_private_key(pem.read(), None)
+        except (OSError, ValueError, TypeError, UnsupportedAlgorithm) as e:
+            # Removed while scanning, or not a usable key.
+            logger.warning("Skipping signing key %s: %s", name, e)
+            return None
+        if not isinstance(private_key, KEY_TYPES[self.alg]):
+            logger.warning("Skipping signing key %s: not an %s key", name, self.alg)
+            return None
+        return SigningKey(kid, self.alg, float(created_at), private_key)
+
+    def _create(self, now: float) -> None:
+        key = generate_private_key(self.alg)
+        name = f"{int(now)}-{secrets.token_hex(8)}.pem"
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        # Written under a name scans skip, then renamed into place, so
+        # other workers never read a half-written key.
+        path = os.path.join(self.directory, name)
+        partial = os.path.join(self.directory, f".{name}.tmp")
+        fd = os.open(partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(pem)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(partial, path)
+        except BaseException:
+            os.remove(partial)
+            raise
+
+    def _scan(self) -> List[SigningKey]:
+        keys = filter(None, map(self._load_file, os.listdir(self.directory)))
+        return sorted(keys, key=lambda key: key.created_at)
+
+    def _retire(self, keys: List[SigningKey], now: float) -> List[SigningKey]:
+        live = []
+        for older, newer in zip(keys, keys[1:] + [None]):
+            if newer is not None:
+                superseded_at = newer.created_at + self.overlap
+                if now > superseded_at + self.overlap + self.token_lifetime:
+                    name = f"{int(older.created_at)}-{older.kid}.pem"
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except FileNotFoundError:
+                        pass
+                    continue
+            live.append(older)
+        return live
+
+    @contextmanager
+    def _directory_lock(self):
+        fd = os.open(
+            os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o600
+        )
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def reload(self, now: Optional[float] = None) -> None:
+        """Re-read the directory, creating and retiring keys as scheduled."""
+        now = time.time() if now is None else now
+        with self._lock:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with self._directory_lock():
+                self._update(now)
+
+    def _update(self, now: float) -> None:
+        keys = self._scan()
+        if not keys or now - keys[-1].created_at >= self.rotation - self.overlap:
+            self._create(now)
+            keys = self._scan()
+        self._keys = {key.kid: key for key in self._retire(keys, now)}
+        self._loaded_at = time.monotonic()
+
+    def _refresh(self) -> None:
+        try:
+            self.reload()
+        except Exception:
+            if not self._keys:
+                raise
+            # Keep serving the keys we have; retried after max_age.
+            logger.exception("Reloading signing keys failed")
+            self._loaded_at = time.monotonic()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._refresh()
+        finally:
+            self._refreshing.release()
+
+    def _ensure_loaded(self, max_age: float = RELOAD_SECONDS) -> None:
+        if time.monotonic() - self._loaded_at <= max_age:
+            return
+        if not self._keys:
+            self._refresh()
+        elif self._refreshing.acquire(blocking=False):
+            threading.Thread(
+                target=self._refresh_in_background, name="keyring", daemon=True
+            ).start()
+
+    def current(self) -> SigningKey:
+        """Newest key that has been published for at least ``overlap``."""
+        self._ensure_loaded()
+        now = time.time()
+        keys = sorted(self._keys.values(), key=lambda key: key.created_at)
+        for key in reversed(keys):
+            if now - key.created_at >= self.overlap:
+                return key
+        # Fresh keyring: nothing has been published long enough yet.
+        return keys[0]
+
+    def jwks(self) -> dict:
+        self._ensure_loaded()
+        return {"keys": [key.jwk() for key in self._keys.values()]}
+
+    def encode(self, claims: dict) -> str:
+        key = self.current()
+        header = {"alg": key.alg, "typ": "JWT", "kid": key.kid}
+        payload = {name: _numeric_date(value) for name, value in claims.items()}
+        signing_input = (
+            f"{_b64encode(orjson.dumps(header))}.{_b64encode(orjson.dumps(payload))}"
+        )
+        signature = key.sign(signing_input.encode())
+        return f"{signing_input}.{_b64encode(signature)}"
+
+    def decode(self, token: str) -> dict:
+        """Verify ``token``'s signature and return its claims.
+
+        Expiry is left to the caller, like the HS path.
+        """
+        try:
+            header_segment, payload_segment, signature_segment = token.split(".")
+            header = orjson.loads(_b64decode(header_segment))
+            signature = _b64decode(signature_segment)
+        except (ValueError, orjson.JSONDecodeError):
+            raise KeyRingError("Malformed token")
+        kid = header.get("kid") if isinstance(header, dict) else None
+        self._ensure_loaded()
+        key = self._keys.get(kid)
+        if key is None and isinstance(kid, str):
+            # Keys are published ``overlap`` before they sign anything, so
+            # this is rare; the refresh is bounded so unknown kids cannot
+            # turn every request into a directory scan.
+            self._ensure_loaded(max_age=1)
+            key = self._keys.get(kid)
+        if key is None or header.get("alg") != key.alg:
+            raise KeyRingError("Unknown signing key")
+        try:
+            key.verify(signature, f"{header_segment}.{payload_segment}".encode())
+            claims = orjson.loads(_b64decode(payload_segment))
+        except (InvalidSignature, ValueError, orjson.JSONDecodeError):
+            raise KeyRingError("Invalid signature")
+        if not isinstance(claims, dict):
+            raise KeyRingError("Claims are not an object")
+        return claims
@@ -0,0 +1,40 @@
+from typing import Callable, FrozenSet, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def schema_columns(model, schema: Type[BaseModel]) -> Tuple[InstrumentedAttribute]:
+    """Columns of ``model`` backing the fields of ``schema``, in schema order.
+
+    Selecting these instead of the entity loads just what the response
+    needs and yields plain rows that can be serialized as-is.
+    """
+    return tuple(
+        getattr(model, name)
+        for name in schema.model_fields
+        if isinstance(getattr(model, name, None), InstrumentedAttribute)
+    )
+
+
+def include_param(*allowed: str) -> Callable[..., FrozenSet[str]]:
+    """Dependency parsing ``?include=a,b`` against the ``allowed`` relations."""
+
+    def includes(
+        include: Optional[str] = Query(
+            default=None, description=f"Comma-separated: {', '.join(allowed)}"
+        )
+    ) -> FrozenSet[str]:
+        requested = frozenset(
+            part.strip() for part in (include or "").split(",") if part.strip()
+        )
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown include: {', '.join(sorted(unknown))}",
+            )
+        return requested
+
+    return includes
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.auth.model import RevokedToken
+from app.config import get_settings
+from app.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Session.info key holding revocations staged in the current transaction.
+PENDING_KEY = "revoked_tokens"
+
+
+def _key(jti: str) -> bytes:
+    try:
+        return bytes.fromhex(jti)
+    except ValueError:
+        return jti.encode()
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationStore:
+    """Denylist of token ids backed by the ``revoked_tokens`` table.
+
+    Lookups hit an in-process dict keyed by the 16-byte ``jti`` and never
+    touch the database. Revocations are written in the caller's
+    transaction and enter the dict once it commits; revocations made by
+    other workers are pulled in every ``sync_seconds``, and expired
+    entries are swept from both every ``sweep_seconds``.
+    """
+
+    def __init__(self, sync_seconds: int, sweep_seconds: int):
+        self.sync_seconds = sync_seconds
+        self.sweep_seconds = sweep_seconds
+        self._revoked: Dict[bytes, float] = {}
+        self._synced_at: Optional[datetime] = None
+        self._swept_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, jti: str) -> bool:
+        return _key(jti) in self._revoked
+
+    def remember(self, jti: str, exp: float) -> None:
+        self._revoked[_key(jti)] = exp
+
+    def revoke(
+        self,
+        db: AsyncSession,
+        jti: str,
+        token_type: str,
+        exp: float,
+        user_id: Optional[int] = None,
+    ) -> None:
+        """Stage a revocation in ``db``'s transaction."""
+        db.add(
+            RevokedToken(
+                jti=jti,
+                token_type=token_type,
+                user_id=user_id,
+                expires_at=_utc(exp),
+                revoked_at=datetime.utcnow(),
+            )
+        )
+        db.sync_session.info.setdefault(PENDING_KEY, []).append((jti, exp))
+
+    async def consume(
+        self,
+        db: AsyncSession,
+        jti: str,
+        token_type: str,
+        exp: float,
+        user_id: Optional[int] = None,
+    ) -> bool:
+        """Claim a single-use token; ``False`` if it was already used.
+
+        The primary key on ``jti`` settles races between workers. The insert
+        runs in a SAVEPOINT so losing the race leaves the rest of the
+        caller's transaction intact.
+        """
+        if self.is_revoked(jti):
+            return False
+        try:
+            async with db.begin_nested():
+                self.revoke(db, jti, token_type, exp, user_id)
+        except IntegrityError:
+            self.remember(jti, exp)
+            return False
+        return True
+
+    async def sync(self) -> None:
+        """Load revocations made since the last sync (all of them at first)."""
+        now = datetime.utcnow()
+        stmt = select(RevokedToken.jti, RevokedToken.expires_at).where(
+            RevokedToken.expires_at > now
+        )
+        if self._synced_at is not None:
+            # Overlap the previous window to tolerate clock skew between workers.
+            since = self._synced_at - timedelta(seconds=self.sync_seconds)
+            stmt = stmt.where(RevokedToken.revoked_at >= since)
+        async with session_scope(read_only=True) as db:
+            for jti, expires_at in await db.execute(stmt):
+                self.remember(jti, _timestamp(expires_at))
+        self._synced_at = now
+
+    async def sweep(self) -> None:
+        """Forget expired entries; expired tokens fail validation anyway."""
+        now = time.time()
+        self._revoked = {key: exp for key, exp in self._revoked.items() if exp > now}
+        async with session_scope() as db:
+            await db.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= _utc(now))
+            )
+            await db.commit()
+        self._swept_at = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await self.sync()
+                if time.monotonic() - self._swept_at >= self.sweep_seconds:
+                    await self.sweep()
+            except Exception:
+                logger.exception("Token revocation sync failed")
+
+    async def start(self) -> None:
+        await self.sync()
+        self._swept_at = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocations = RevocationStore(
+    settings.REVOCATION_SYNC_SECONDS, settings.REVOCATION_SWEEP_SECONDS
+)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending_revocations(session: Session) -> None:
+    for jti, exp in session.info.pop(PENDING_KEY, ()):
+        revocations.remember(jti, exp)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_revocations(session: Session, previous_transaction) -> None:
+    # Rolling back a SAVEPOINT keeps what the outer transaction staged.
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_KEY, None)
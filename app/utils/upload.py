@@ -1,13 +1,99 @@
-import uuid
 import base64
+import binascii
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from fastapi import HTTPException, status
+
+from app.media.storage import SIGNATURES, SNIFF_BYTES, sniff_content_type
+
+# Multiple of 4 so every slice of the base64 text decodes on its own.
+DECODE_CHUNK_SIZE = 64 * 1024
+
+DATA_URI = re.compile(r"data:(image/[A-Za-z0-9.+-]+);base64, ?")
+SVG = "image/svg+xml"
+CONTENT_TYPES = {content_type for _, _, content_type, _ in SIGNATURES} | {SVG}
+ALIASES = {"image/jpg": "image/jpeg"}
+WHITESPACE = re.compile(r"\s+")
+# How far into an SVG document the root element may start.
+SVG_SNIFF_BYTES = 1024
+
 
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
 
-def upload_file(base64_data, base_dir="media"):
-    eliminator, data = base64_data.split("base64, ")
-    ext = eliminator.split("/")[1].replace(";", "")
-    file_name = uuid.uuid4()
-    file_dir = f"{base_dir}/{file_name}.{ext}"
 
-    with open(file_dir, "wb") as out:
-        out.write(base64.b64decode(data))
+def _sniff(head: bytes):
+    """``(content_type, extension)`` of the decoded bytes, if supported."""
+    detected = sniff_content_type(head[:SNIFF_BYTES])
+    if detected is not None:
+        return detected
+    text = head[:SVG_SNIFF_BYTES].lstrip(b"\xef\xbb\xbf \t\r\n")
+    if text.startswith(b"<") and b"<svg" in text:
+        return SVG, "svg"
+    return None
+
+
+def upload_file(base64_data, base_dir="media", max_bytes=None):
+    """Decode a ``data:image/...;base64,`` URI into a new file in base_dir.
+
+    The declared type must be a supported image type (PNG, JPEG, GIF,
+    WebP or SVG) and match the decoded bytes; anything else is a 400 and
+    leaves no file behind. Line breaks and spaces in the base64 text are
+    ignored, as MIME-style wrapped payloads contain them.
+    """
+    match = DATA_URI.match(base64_data) if isinstance(base64_data, str) else None
+    if match is None:
+        raise _bad_request("Image must be a base64 data URI")
+    content_type = match.group(1).lower()
+    content_type = ALIASES.get(content_type, content_type)
+    if content_type not in CONTENT_TYPES:
+        raise _bad_request("Unsupported image type")
+    data = WHITESPACE.sub("", base64_data[match.end() :])
+    if max_bytes is not None and len(data) // 4 * 3 > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File is larger than {max_bytes} bytes",
+        )
+    try:
+        head = base64.b64decode(data[:DECODE_CHUNK_SIZE], validate=True)
+    except binascii.Error:
+        raise _bad_request("Image is not valid base64")
+    detected = _sniff(head)
+    if detected is None or detected[0] != content_type:
+        raise _bad_request(f"Image is not a valid {content_type}")
+
+    file_dir = f"{base_dir}/{uuid.uuid4()}.{detected[1]}"
+    os.makedirs(base_dir, exist_ok=True)
+    try:
+        with open(file_dir, "wb") as out:
+            out.write(head)
+            for start in range(DECODE_CHUNK_SIZE, len(data), DECODE_CHUNK_SIZE):
+                chunk = data[start : start + DECODE_CHUNK_SIZE]
+                out.write(base64.b64decode(chunk, validate=True))
+    except binascii.Error:
+        os.remove(file_dir)
+        raise _bad_request("Image is not valid base64")
+    except BaseException:
+        os.remove(file_dir)
+        raise
     return file_dir
+
+
+@contextmanager
+def remove_on_error() -> Iterator[List[str]]:
+    """Collect paths of files written in the block and delete them if it
+    raises, so a failed request leaves no orphaned uploads behind."""
+    written: List[str] = []
+    try:
+        yield written
+    except BaseException:
+        for path in written:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        raise
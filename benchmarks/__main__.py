@@ -0,0 +1,154 @@
+"""Run the benchmark suite: ``python -m benchmarks run --output results.json``.
+
+Compare two result files with ``python -m benchmarks compare old.json new.json``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from benchmarks import environment
+from benchmarks.seed import Dataset
+
+MODES = ("inprocess", "uvicorn")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"],
+            cwd=environment.REPO_ROOT,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> dict:
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = environment.prepare(args.workdir)
+
+    from benchmarks.compression import run_compression
+    from benchmarks.load import SCENARIOS, Context, run_inprocess, run_uvicorn
+    from benchmarks.micro import run_micro
+    from benchmarks.serialization import run_serialization
+    from benchmarks.tokens import run_tokens
+    from benchmarks.seed import seed
+
+    dataset = Dataset(
+        users=args.users,
+        blogs=args.blogs,
+        images=args.images,
+        image_size=args.image_size,
+        seed=args.seed,
+    )
+    print(f"seeding {dataset} into {workdir}", file=sys.stderr)
+    fixtures = seed(dataset)
+    ctx = Context(fixtures)
+    names = args.scenarios or list(SCENARIOS)
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": vars(dataset),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "load": {},
+    }
+    load_args = (ctx, names, args.concurrency, args.requests, args.seed)
+    if "inprocess" in args.modes:
+        print("inprocess:", file=sys.stderr)
+        results["load"]["inprocess"] = asyncio.run(run_inprocess(*load_args))
+    if "uvicorn" in args.modes:
+        print(f"uvicorn ({args.workers} workers):", file=sys.stderr)
+        results["load"]["uvicorn"] = asyncio.run(
+            run_uvicorn(*load_args, workers=args.workers)
+        )
+    if args.micro:
+        print("micro:", file=sys.stderr)
+        results["micro"] = run_micro(fixtures, args.micro_iterations)
+        results["serialization"] = run_serialization(args.micro_iterations)
+        results["tokens"] = run_tokens(args.micro_iterations)
+        results["compression"] = run_compression(args.micro_iterations)
+
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if output:
+        with open(output, "w") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+    return results
+
+
+def _flatten(results: dict) -> dict:
+    rows = {}
+    for mode, scenarios in results.get("load", {}).items():
+        for name, stats in scenarios.items():
+            rows[f"{mode}/{name}"] = stats
+    for group in ("micro", "serialization", "tokens", "compression"):
+        for name, stats in results.get(group, {}).items():
+            rows[f"{group}/{name}"] = stats
+    return rows
+
+
+def compare(args) -> None:
+    with open(args.baseline) as base_file, open(args.candidate) as new_file:
+        baseline, candidate = _flatten(json.load(base_file)), _flatten(
+            json.load(new_file)
+        )
+    print(f"{'benchmark':32} {'p50 ms':>18} {'p99 ms':>18} {'change p50':>11}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        change = (
+            (new["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+            if old["p50_ms"]
+            else 0.0
+        )
+        print(
+            f"{key:32} {old['p50_ms']:>8.2f} → {new['p50_ms']:<8.2f}"
+            f"{old['p99_ms']:>8.2f} → {new['p99_ms']:<8.2f} {change:>+10.1f}%"
+        )
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed a database and benchmark it")
+    run_parser.add_argument("--users", type=int, default=50)
+    run_parser.add_argument("--blogs", type=int, default=2000)
+    run_parser.add_argument("--images", type=int, default=20)
+    run_parser.add_argument("--image-size", type=int, default=640)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--concurrency", type=int, default=16)
+    run_parser.add_argument("--requests", type=int, default=1000)
+    run_parser.add_argument("--workers", type=int, default=1)
+    run_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    run_parser.add_argument("--scenarios", nargs="+")
+    run_parser.add_argument("--no-micro", dest="micro", action="store_false")
+    run_parser.add_argument("--micro-iterations", type=int, default=1000)
+    run_parser.add_argument("--workdir", help="defaults to a new temp directory")
+    run_parser.add_argument("--output", help="write JSON here instead of stdout")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="diff two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from benchmarks.micro import _time_calls
+from benchmarks.serialization import _blog_rows
+
+
+def run_compression(iterations: int, page_size: int = 100) -> dict:
+    """Compress a full blog listing page with every installed encoding at
+    the levels the middleware uses for JSON, reporting the size ratio."""
+    import orjson
+
+    from app.compression.codecs import ENCODERS, open_stream
+
+    body = orjson.dumps({"items": _blog_rows(page_size), "next": None})
+    results = {}
+    for encoding in ENCODERS:
+
+        def compress():
+            compress, finish = open_stream(encoding, "json")
+            return compress(body) + finish()
+
+        results[encoding] = _time_calls(compress, iterations)
+        results[encoding]["ratio"] = round(len(compress()) / len(body), 3)
+    return results
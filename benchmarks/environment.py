@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings without defaults; benchmarks never talk to real clients, so fixed
+# throwaway secrets are fine unless the caller exported their own.
+DEFAULT_ENV = {
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "60",
+    "REFRESH_TOKEN_EXPIRE_MINUTES": "600",
+    "ALGORITHM": "HS256",
+    "JWT_SECRET_KEY": "benchmark-access",
+    "JWT_REFRESH_SECRET_KEY": "benchmark-refresh",
+    "JWT_VERIFICATION_TOKEN": "benchmark-verification",
+    "JWT_RESET_TOKEN": "benchmark-reset",
+    # Every load client shares one IP; set RATE_LIMIT_ENABLED=true to
+    # measure the limiter itself.
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+def prepare(workdir: str = None) -> str:
+    """Point the app at a throwaway database and media directory.
+
+    Must run before anything under ``app`` is imported, since settings and
+    engines are built at import time. Returns the working directory.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix="fastapi-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    for key, value in DEFAULT_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.pop("DATABASE_READ_URL", None)
+    os.chdir(workdir)
+    return workdir
+
+
+def server_env() -> dict:
+    """Environment for a uvicorn subprocess serving the prepared database."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (REPO_ROOT, env.get("PYTHONPATH")) if path
+    )
+    return env
@@ -0,0 +1,270 @@
+import asyncio
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.environment import server_env
+from benchmarks.seed import PASSWORD, Fixtures
+from benchmarks.stats import summarize
+
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[["Context", random.Random], Request]
+    # bcrypt-bound scenarios run a fraction of the requested volume
+    scale: float = 1.0
+
+
+class Context:
+    """Seeded fixtures plus access tokens minted for every seeded user."""
+
+    def __init__(self, fixtures: Fixtures):
+        from app.auth.model import User
+        from app.database import SessionLocal
+        from app.utils.auth import (
+            create_access_token,
+            create_refresh_token,
+            principal_claims,
+            version_claims,
+        )
+
+        self.fixtures = fixtures
+        self.access: Dict[str, str] = {}
+        self.refresh_claims: Dict[str, tuple] = {}
+        self._create_refresh_token = create_refresh_token
+        with SessionLocal() as db:
+            for user in db.query(User).filter(User.id.in_(fixtures.user_ids)):
+                self.access[user.email] = create_access_token(
+                    user.username, claims=principal_claims(user)
+                )
+                self.refresh_claims[user.email] = (
+                    user.username,
+                    version_claims(user),
+                )
+
+    def user(self, rng: random.Random) -> str:
+        return rng.choice(self.fixtures.emails)
+
+    def auth(self, email: str) -> dict:
+        return {"Authorization": f"Bearer {self.access[email]}"}
+
+    def refresh_token(self, email: str) -> str:
+        """A fresh refresh token; each one can only be exchanged once."""
+        username, claims = self.refresh_claims[email]
+        return self._create_refresh_token(username, claims=claims)
+
+
+def _signin(ctx: Context, rng: random.Random) -> Request:
+    return (
+        "POST",
+        "/auth/signin",
+        {"json": {"email": ctx.user(rng), "password": PASSWORD}},
+    )
+
+
+def _refresh(ctx: Context, rng: random.Random) -> Request:
+    email = ctx.user(rng)
+    return (
+        "POST",
+        "/auth/token/refresh",
+        {"json": {"refresh_token": ctx.refresh_token(email)}},
+    )
+
+
+def _me(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/auth/me", {"headers": ctx.auth(ctx.user(rng))}
+
+
+def _blog_list(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/blogs/", {"params": {"limit": 20}}
+
+
+def _blog_read(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/blogs/{rng.choice(ctx.fixtures.blog_ids)}", {}
+
+
+def _blog_create(ctx: Context, rng: random.Random) -> Request:
+    email = ctx.user(rng)
+    body = {
+        "title": "Benchmark post",
+        "description": "Created by the benchmark suite",
+        "media_id": ctx.fixtures.media_ids[email],
+    }
+    return "POST", "/blogs/", {"json": body, "headers": ctx.auth(email)}
+
+
+def _media_upload(ctx: Context, rng: random.Random) -> Request:
+    return (
+        "POST",
+        "/media/",
+        {
+            "content": ctx.fixtures.image_bytes,
+            "headers": ctx.auth(ctx.user(rng)),
+        },
+    )
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("signin", _signin, scale=0.1),
+        Scenario("token_refresh", _refresh),
+        Scenario("me", _me),
+        Scenario("blog_list", _blog_list),
+        Scenario("blog_read", _blog_read),
+        Scenario("blog_create", _blog_create),
+        Scenario("media_upload", _media_upload),
+    )
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: Context,
+    concurrency: int,
+    requests: int,
+    seed: int,
+    warmup: int = 10,
+) -> dict:
+    """Drive ``scenario`` with ``concurrency`` workers until ``requests`` finish."""
+    rng = random.Random(seed)
+    total = max(int(requests * scenario.scale), concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    for _ in range(warmup):
+        method, url, kwargs = scenario.build(ctx, rng)
+        await client.request(method, url, **kwargs)
+
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = scenario.build(ctx, rng)
+            started_at = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started_at)
+            errors += failed
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started_at)
+
+
+async def run_all(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    names: List[str],
+    concurrency: int,
+    requests: int,
+    seed: int,
+) -> dict:
+    results = {}
+    for name in names:
+        results[name] = await run_scenario(
+            client, SCENARIOS[name], ctx, concurrency, requests, seed
+        )
+        print(f"  {name}: {results[name]}", file=sys.stderr)
+    return results
+
+
+async def _wait_until_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    # Startup warmup runs after the server is up; measure the warmed app.
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if (await client.get("/ready")).status_code == 200:
+            return
+        await asyncio.sleep(0.1)
+    raise RuntimeError("app did not become ready in time")
+
+
+async def run_inprocess(ctx: Context, names, concurrency, requests, seed) -> dict:
+    """Call the ASGI app directly, without sockets or a server process."""
+    from app.server import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            await _wait_until_ready(client, timeout=60)
+            return await run_all(client, ctx, names, concurrency, requests, seed)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_until_up(client: httpx.AsyncClient, process, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            await client.get("/health")
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not start in time")
+
+
+async def run_uvicorn(
+    ctx: Context,
+    names,
+    concurrency,
+    requests,
+    seed,
+    workers: int = 1,
+    port: Optional[int] = None,
+) -> dict:
+    """Serve the app from a local uvicorn process and load it over HTTP."""
+    port = port or _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.server:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=server_env(),
+    )
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+        ) as client:
+            await _wait_until_up(client, process, timeout=30)
+            await _wait_until_ready(client, timeout=60)
+            return await run_all(client, ctx, names, concurrency, requests, seed)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
@@ -0,0 +1,70 @@
+import asyncio
+import base64
+import time
+from typing import Callable, List
+
+from benchmarks.seed import PASSWORD, Fixtures
+from benchmarks.stats import summarize
+
+
+def _time_calls(func: Callable[[], object], iterations: int) -> dict:
+    func()
+    latencies: List[float] = []
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        call_started_at = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started_at)
+    result = summarize(latencies, 0, time.perf_counter() - started_at)
+    result["ops"] = result.pop("rps")
+    del result["errors"]
+    return result
+
+
+def run_micro(fixtures: Fixtures, iterations: int) -> dict:
+    """Time the hot helpers directly, outside of any HTTP handling."""
+    from app.database import session_scope
+    from app.utils.auth import create_access_token, get_user, user_cache
+    from app.utils.hashing import HashPassword
+    from app.utils.upload import upload_file
+
+    hasher = HashPassword()
+    hashed = hasher.get_hash_password(PASSWORD)
+    token = create_access_token("bench000000")
+    data_uri = (
+        "data:image/png;base64, " + base64.b64encode(fixtures.image_bytes).decode()
+    )
+    loop = asyncio.new_event_loop()
+
+    async def lookup():
+        async with session_scope(read_only=True) as db:
+            return await get_user(token, db)
+
+    def lookup_cold():
+        user_cache.clear()
+        return loop.run_until_complete(lookup())
+
+    # bcrypt is deliberately slow; a handful of rounds is enough
+    bcrypt_iterations = max(iterations // 100, 5)
+    try:
+        return {
+            "create_access_token": _time_calls(
+                lambda: create_access_token("bench000000"), iterations
+            ),
+            "get_user_cached": _time_calls(
+                lambda: loop.run_until_complete(lookup()), iterations
+            ),
+            "get_user_uncached": _time_calls(lookup_cold, iterations),
+            "hash_password": _time_calls(
+                lambda: hasher.get_hash_password(PASSWORD), bcrypt_iterations
+            ),
+            "verify_password": _time_calls(
+                lambda: hasher.verify_hash_password(PASSWORD, hashed),
+                bcrypt_iterations,
+            ),
+            "upload_file": _time_calls(
+                lambda: upload_file(data_uri, base_dir="media/micro"), iterations
+            ),
+        }
+    finally:
+        loop.close()
@@ -0,0 +1,127 @@
+import io
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from alembic import command
+from alembic.config import Config
+
+from benchmarks.environment import REPO_ROOT
+
+PASSWORD = "benchmark-pass"
+
+
+@dataclass
+class Dataset:
+    users: int = 50
+    blogs: int = 2000
+    images: int = 20
+    image_size: int = 640
+    seed: int = 42
+
+
+@dataclass
+class Fixtures:
+    emails: List[str] = field(default_factory=list)
+    user_ids: List[int] = field(default_factory=list)
+    blog_ids: List[int] = field(default_factory=list)
+    # media id per user, usable as ``media_id`` when creating blogs
+    media_ids: dict = field(default_factory=dict)
+    image_bytes: bytes = b""
+
+
+def migrate(database_url: str) -> None:
+    config = Config(os.path.join(REPO_ROOT, "alembic.ini"))
+    config.attributes["database_url"] = database_url
+    command.upgrade(config, "head")
+
+
+def make_image(size: int, rng: random.Random) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def seed(dataset: Dataset) -> Fixtures:
+    """Migrate the prepared database and fill it with ``dataset``.
+
+    Every user shares one bcrypt hash of ``PASSWORD`` so seeding cost does
+    not grow with the number of users.
+    """
+    from app.auth.model import User
+    from app.blog.model import Blog
+    from app.database import SQLALCHEMY_DATABASE_URL, SessionLocal
+    from app.media.model import Media
+    from app.media.storage import MEDIA_DIR
+    from app.utils.hashing import HashPassword
+
+    migrate(SQLALCHEMY_DATABASE_URL)
+    rng = random.Random(dataset.seed)
+    fixtures = Fixtures()
+    hashed = HashPassword().get_hash_password(PASSWORD)
+    now = datetime.now()
+
+    os.makedirs(MEDIA_DIR, exist_ok=True)
+    images = []
+    for _ in range(max(dataset.images, 1)):
+        data = make_image(dataset.image_size, rng)
+        path = f"{MEDIA_DIR}/{uuid.uuid4()}.png"
+        with open(path, "wb") as out:
+            out.write(data)
+        images.append((path, len(data)))
+    fixtures.image_bytes = data
+
+    with SessionLocal() as db:
+        users = [
+            User(
+                first_name="Bench",
+                last_name=f"User{index}",
+                username=f"bench{index:06d}",
+                email=f"bench{index}@example.com",
+                password=hashed,
+                verified=True,
+                active=True,
+                created_at=now,
+            )
+            for index in range(dataset.users)
+        ]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            path, size = images[user.id % len(images)]
+            media = Media(
+                id=str(uuid.uuid4()),
+                path=path,
+                content_type="image/png",
+                size=size,
+                owner_id=user.id,
+                created_at=now,
+            )
+            db.add(media)
+            fixtures.media_ids[user.email] = media.id
+            fixtures.emails.append(user.email)
+            fixtures.user_ids.append(user.id)
+
+        blogs = [
+            Blog(
+                title=f"Benchmark blog {index}",
+                description=" ".join(
+                    rng.choice(("fast", "api", "python", "cache", "query", "index"))
+                    for _ in range(30)
+                ),
+                image=images[index % len(images)][0],
+                created_at=now - timedelta(seconds=index),
+                owner_id=users[index % len(users)].id,
+            )
+            for index in range(dataset.blogs)
+        ]
+        db.add_all(blogs)
+        db.commit()
+        fixtures.blog_ids = [blog.id for blog in blogs]
+    return fixtures
@@ -0,0 +1,71 @@
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+from benchmarks.micro import _time_calls
+
+
+def _blog_rows(count: int) -> List[dict]:
+    now = datetime.now()
+    return [
+        {
+            "title": f"Benchmark blog {index}",
+            "description": "fast api python cache query index " * 8,
+            "id": index,
+            "image": f"media/{index:032x}.png",
+            "thumbnail": f"media/{index:032x}_thumb.webp",
+            "image_webp": f"media/{index:032x}.webp",
+            "created_at": now - timedelta(seconds=index),
+            "updated_at": None,
+        }
+        for index in range(count)
+    ]
+
+
+def run_serialization(iterations: int, page_size: int = 100) -> dict:
+    """Old response path (schema validation, jsonable_encoder, json) against
+    the row/orjson path used by the blog listings and ``/auth/me``."""
+    import orjson
+    from fastapi.encoders import jsonable_encoder
+
+    from app.auth.router import ME_FIELDS
+    from app.auth.schema import AuthPrincipal, AuthUserSchema
+    from app.blog.model import Blog
+    from app.blog.schema import Blog as BlogSchema
+    from app.pagination import Page
+
+    rows = _blog_rows(page_size)
+    blogs = [Blog(**row) for row in rows]
+    principal = AuthPrincipal(
+        id=1,
+        username="bench000000",
+        first_name="Bench",
+        last_name="User",
+        email="bench0@example.com",
+        verified=True,
+        active=True,
+        token_version=0,
+    )
+
+    def page_via_schema():
+        page = Page[BlogSchema].model_validate(
+            {"items": blogs, "next": None, "prev": None}
+        )
+        return json.dumps(jsonable_encoder(page)).encode()
+
+    def page_via_rows():
+        return orjson.dumps({"items": rows, "next": None, "prev": None})
+
+    def me_via_schema():
+        user = AuthUserSchema.model_validate(principal, from_attributes=True)
+        return json.dumps(jsonable_encoder(user)).encode()
+
+    def me_direct():
+        return orjson.dumps({field: getattr(principal, field) for field in ME_FIELDS})
+
+    return {
+        f"blog_page_{page_size}_schema": _time_calls(page_via_schema, iterations),
+        f"blog_page_{page_size}_rows": _time_calls(page_via_rows, iterations),
+        "me_schema": _time_calls(me_via_schema, iterations),
+        "me_direct": _time_calls(me_direct, iterations),
+    }
@@ -0,0 +1,54 @@
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks.micro import _time_calls
+
+
+def _claims() -> dict:
+    return {
+        "exp": datetime.utcnow() + timedelta(minutes=30),
+        "sub": "bench000000",
+        "token_type": "access",
+        "jti": uuid.uuid4().hex,
+        "uid": 1,
+        "ver": 0,
+        "verified": True,
+        "active": True,
+        "first_name": "Bench",
+        "last_name": "User",
+        "email": "bench0@example.com",
+    }
+
+
+def run_tokens(iterations: int) -> dict:
+    """Sign/verify cost of the HS path (python-jose) against the EdDSA and
+    ES256 keyrings, each with its key objects already loaded."""
+    from jose import jwt
+
+    from app.utils.keys import KeyRing
+
+    secret = "benchmark-access-secret"
+    results = {}
+
+    token = jwt.encode(_claims(), secret, "HS256")
+    results["hs256_sign"] = _time_calls(
+        lambda: jwt.encode(_claims(), secret, "HS256"), iterations
+    )
+    results["hs256_verify"] = _time_calls(
+        lambda: jwt.decode(token, secret, algorithms=["HS256"]), iterations
+    )
+    for alg in ("EdDSA", "ES256"):
+        with tempfile.TemporaryDirectory() as directory:
+            keyring = KeyRing(
+                directory, alg, rotation=86400, overlap=0, token_lifetime=1800
+            )
+            token = keyring.encode(_claims())
+            name = alg.lower()
+            results[f"{name}_sign"] = _time_calls(
+                lambda: keyring.encode(_claims()), iterations
+            )
+            results[f"{name}_verify"] = _time_calls(
+                lambda: keyring.decode(token), iterations
+            )
+    return results
@@ -0,0 +1,4 @@
+#! /usr/bin/bash
+
+alembic upgrade head
+uvicorn app.server:app --host 0.0.0.0 --port 3000 --reload
@@ -0,0 +1,48 @@
+from logging.config import fileConfig
+
+from alembic import context
+from app.auth import model as auth_model  # noqa: F401
+from app.blog import model as blog_model  # noqa: F401
+from app.database import SQLALCHEMY_DATABASE_URL, Base, build_engine
+from app.jobs import model as jobs_model  # noqa: F401
+from app.media import model as media_model  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Lets callers (tests, benchmarks) point migrations at a throwaway database.
+database_url = config.attributes.get("database_url", SQLALCHEMY_DATABASE_URL)
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = build_engine(database_url)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,93 @@
+"""baseline schema
+
+Creates the schema ``metadata.create_all`` used to build at import time.
+Databases that were created that way are adopted in place: existing
+tables are kept and only columns added since then are filled in.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector, table: str) -> set:
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if "users" not in tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("first_name", sa.String()),
+            sa.Column("last_name", sa.String()),
+            sa.Column("username", sa.String()),
+            sa.Column("email", sa.String()),
+            sa.Column("password", sa.String()),
+            sa.Column("verified", sa.Boolean()),
+            sa.Column("active", sa.Boolean()),
+            sa.Column(
+                "token_version", sa.Integer(), nullable=False, server_default="0"
+            ),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+    elif "token_version" not in _columns(inspector, "users"):
+        op.add_column(
+            "users",
+            sa.Column(
+                "token_version", sa.Integer(), nullable=False, server_default="0"
+            ),
+        )
+
+    if "blogs" not in tables:
+        op.create_table(
+            "blogs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String()),
+            sa.Column("image", sa.String()),
+            sa.Column("thumbnail", sa.String(), nullable=True),
+            sa.Column("image_webp", sa.String(), nullable=True),
+            sa.Column("description", sa.String()),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        )
+        op.create_index("ix_blogs_id", "blogs", ["id"])
+        op.create_index("ix_blogs_title", "blogs", ["title"])
+        op.create_index("ix_blogs_image", "blogs", ["image"])
+        op.create_index("ix_blogs_description", "blogs", ["description"])
+    else:
+        columns = _columns(inspector, "blogs")
+        for name in ("thumbnail", "image_webp"):
+            if name not in columns:
+                op.add_column("blogs", sa.Column(name, sa.String(), nullable=True))
+
+    if "media" not in tables:
+        op.create_table(
+            "media",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("path", sa.String()),
+            sa.Column("content_type", sa.String()),
+            sa.Column("size", sa.Integer()),
+            sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_media_owner_id", "media", ["owner_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("media")
+    op.drop_table("blogs")
+    op.drop_table("users")
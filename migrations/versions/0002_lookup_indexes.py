@@ -0,0 +1,48 @@
+"""indexes for auth lookups and blog listings
+
+Unique indexes on users.email/users.username back signup, signin, token
+and resend/forgot lookups. Composite (created_at, id) and
+(owner_id, created_at, id) indexes back keyset pagination. The B-tree
+indexes on blogs.image/description are dropped: nothing filters on them.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _indexes(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    blog_indexes = _indexes("blogs")
+    if "ix_blogs_created_at_id" not in blog_indexes:
+        op.create_index("ix_blogs_created_at_id", "blogs", ["created_at", "id"])
+    if "ix_blogs_owner_id_created_at_id" not in blog_indexes:
+        op.create_index(
+            "ix_blogs_owner_id_created_at_id", "blogs", ["owner_id", "created_at", "id"]
+        )
+    for name in ("ix_blogs_image", "ix_blogs_description"):
+        if name in blog_indexes:
+            op.drop_index(name, table_name="blogs")
+
+
+def downgrade() -> None:
+    op.create_index("ix_blogs_description", "blogs", ["description"])
+    op.create_index("ix_blogs_image", "blogs", ["image"])
+    op.drop_index("ix_blogs_owner_id_created_at_id", table_name="blogs")
+    op.drop_index("ix_blogs_created_at_id", table_name="blogs")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_email", table_name="users")
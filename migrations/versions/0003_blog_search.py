@@ -0,0 +1,67 @@
+"""full-text search index for blogs
+
+SQLite gets an FTS5 table, backfilled from blogs and kept in sync by
+app.search; PostgreSQL gets a generated, GIN-indexed tsvector column.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _upgrade_sqlite() -> None:
+    exists = (
+        op.get_bind()
+        .exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'blogs_fts'"
+        )
+        .first()
+    )
+    if exists:
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE blogs_fts USING fts5("
+        "title, description, tokenize = 'porter unicode61')"
+    )
+    op.execute(
+        "INSERT INTO blogs_fts (rowid, title, description) "
+        "SELECT id, title, description FROM blogs"
+    )
+
+
+def _upgrade_postgresql() -> None:
+    op.execute(
+        "ALTER TABLE blogs ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        "GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+        ") STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_blogs_search_vector "
+        "ON blogs USING GIN (search_vector)"
+    )
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _upgrade_sqlite()
+    elif dialect == "postgresql":
+        _upgrade_postgresql()
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect!r}")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS blogs_fts")
+    else:
+        op.execute("DROP INDEX IF EXISTS ix_blogs_search_vector")
+        op.execute("ALTER TABLE blogs DROP COLUMN IF EXISTS search_vector")
@@ -1,3 +1,18 @@
 #! /usr/bin/bash
+# Production launcher: migrate once, then serve with one uvicorn process per
+# core (WEB_CONCURRENCY overrides). Use dev.sh for auto-reload.
+set -euo pipefail
 
-uvicorn app.server:app --host 0.0.0.0 --port 3000 --reload
+# Exported so the app can size per-process pools and check that features
+# keeping per-process state (memory feeds) are safe with this many workers.
+export WEB_CONCURRENCY="${WEB_CONCURRENCY:-$(nproc)}"
+
+alembic upgrade head
+exec uvicorn app.server:app \
+    --host 0.0.0.0 \
+    --port "${PORT:-3000}" \
+    --workers "$WEB_CONCURRENCY" \
+    --loop uvloop \
+    --http httptools \
+    --proxy-headers \
+    --timeout-graceful-shutdown 20
@@ -0,0 +1,105 @@
+import os
+import socket
+import tempfile
+import types
+import uuid
+
+import pytest
+
+# Settings has no defaults for the token secrets; the units under test
+# never use them, but importing app.config needs them set. Tests that
+# touch the database get a throwaway SQLite file.
+for name, value in {
+    "DATABASE_URL": f"sqlite:///{tempfile.mkdtemp()}/test.db",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+    "REFRESH_TOKEN_EXPIRE_MINUTES": "1440",
+    "JWT_SECRET_KEY": "test-access",
+    "JWT_REFRESH_SECRET_KEY": "test-refresh",
+    "JWT_VERIFICATION_TOKEN": "test-verification",
+    "JWT_RESET_TOKEN": "test-reset",
+    "ALGORITHM": "HS256",
+}.items():
+    os.environ.setdefault(name, value)
+
+from tests.fake_redis import FakeRedis  # noqa: E402
+
+# Tests that run the Lua scripts need a real server, e.g.
+# TEST_REDIS_URL=redis://localhost:6379/15; they are skipped without one.
+REDIS_URL = os.environ.get("TEST_REDIS_URL")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis_url() -> str:
+    if not REDIS_URL:
+        pytest.skip("TEST_REDIS_URL is not set")
+    return REDIS_URL
+
+
+@pytest.fixture
+async def fake_redis():
+    server = FakeRedis()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture
+def closed_url() -> str:
+    """URL of a local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"redis://127.0.0.1:{port}/0"
+
+
+@pytest.fixture
+async def database():
+    """Empty tables for code that opens its own ``session_scope``."""
+    from app.auth import model as auth_model  # noqa: F401
+    from app.blog import model as blog_model  # noqa: F401
+    from app.cache import caches
+    from app.database import Base, dispose_engines, engine
+    from app.jobs import model as jobs_model  # noqa: F401
+    from app.media import model as media_model  # noqa: F401
+
+    # Ids are reused once the tables are recreated.
+    for cache in caches.values():
+        cache.clear()
+    Base.metadata.create_all(engine)
+    yield
+    # Pooled connections belong to this test's event loop.
+    await dispose_engines()
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def unique() -> str:
+    """Key prefix keeping tests apart on a shared Redis."""
+    return f"test:{uuid.uuid4().hex}:"
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    """Drives ``time`` in the TTL cache and the rate limit backends."""
+    from app.cache import lru
+    from app.ratelimit import backends
+
+    clock = Clock()
+    fake = types.SimpleNamespace(monotonic=clock, time=clock)
+    monkeypatch.setattr(lru, "time", fake)
+    monkeypatch.setattr(backends, "time", fake)
+    return clock
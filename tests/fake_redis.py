@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import time
+from typing import Callable, Dict, List, Optional, Set
+
+
+class FakeRedis:
+    """In-process RESP server for exercising the client plumbing.
+
+    Understands strings (GET/SET/DEL), AUTH, SELECT and HGET. Lua cannot
+    run here, so EVAL answers with the Python stand-in registered for the
+    script text in ``scripts`` and EVALSHA answers ``NOSCRIPT`` until that
+    script was sent with EVAL once, like a freshly started Redis.
+    """
+
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.port: Optional[int] = None
+        self.data: Dict[bytes, tuple] = {}
+        self.commands: List[list] = []
+        self.connections = 0
+        self.scripts: Dict[str, Callable[[list, list], object]] = {}
+        self.hang = False
+        self._loaded: Set[str] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/0"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._serve, "127.0.0.1", self.port or 0
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Close the listener and drop every open connection."""
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader, writer) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        authed = self.password is None
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    return
+                self.commands.append(args)
+                if self.hang:
+                    continue
+                name = args[0].decode().upper()
+                if name == "AUTH":
+                    authed = args[1].decode() == self.password
+                    reply = "OK" if authed else RuntimeError("WRONGPASS invalid")
+                elif not authed:
+                    reply = RuntimeError("NOAUTH Authentication required.")
+                else:
+                    reply = self._dispatch(name, args[1:])
+                writer.write(self._encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader) -> Optional[list]:
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _get(self, key: bytes):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _dispatch(self, name: str, args: list):
+        if name in ("PING", "SELECT"):
+            return "OK" if name == "SELECT" else "PONG"
+        if name == "GET":
+            return self._get(args[0])
+        if name == "SET":
+            expires_at = None
+            if len(args) > 3 and args[2].upper() == b"EX":
+                expires_at = time.monotonic() + int(args[3])
+            self.data[args[0]] = (args[1], expires_at)
+            return "OK"
+        if name == "DEL":
+            return sum(self.data.pop(key, None) is not None for key in args)
+        if name == "HGET":
+            value = self._get(args[0])
+            return None if value is None else value.get(args[1])
+        if name == "EVAL":
+            script = args[0].decode()
+            if script not in self.scripts:
+                return RuntimeError("ERR no stand-in for this script")
+            self._loaded.add(hashlib.sha1(args[0]).hexdigest())
+            return self._run(script, args[1:])
+        if name == "EVALSHA":
+            sha = args[0].decode()
+            if sha not in self._loaded:
+                return RuntimeError("NOSCRIPT No matching script.")
+            script = next(
+                text
+                for text in self.scripts
+                if hashlib.sha1(text.encode()).hexdigest() == sha
+            )
+            return self._run(script, args[1:])
+        return RuntimeError(f"ERR unknown command '{name}'")
+
+    def _run(self, script: str, args: list):
+        count = int(args[0])
+        return self.scripts[script](args[1 : 1 + count], args[1 + count :])
+
+    @classmethod
+    def _encode(cls, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return b"-%s\r\n" % str(reply).encode()
+        if isinstance(reply, bool):
+            return b":%d\r\n" % reply
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, str):
+            return b"+%s\r\n" % reply.encode()
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(map(cls._encode, reply))
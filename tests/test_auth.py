@@ -0,0 +1,118 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security.http import HTTPAuthorizationCredentials
+
+from app.auth.model import User
+from app.auth.repository import verify_email_repository
+from app.auth.schema import RefreshTokenSchema, VerifyEmailSchema
+from app.database import session_scope
+from app.utils.auth import (
+    create_access_token,
+    create_refresh_token,
+    create_verification_token,
+    get_current_principal,
+    principal_claims,
+    rotate_refresh_token,
+    token_versions,
+    version_claims,
+)
+from app.utils.revocation import revocations
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def user(database) -> User:
+    name = uuid.uuid4().hex[:12]
+    user = User(
+        first_name="Test",
+        last_name="User",
+        username=name,
+        email=f"{name}@example.com",
+        password="x",
+        verified=True,
+        active=True,
+        token_version=0,
+    )
+    async with session_scope() as db:
+        db.add(user)
+        await db.commit()
+    return user
+
+
+def refresh_token(user: User) -> RefreshTokenSchema:
+    return RefreshTokenSchema(
+        refresh_token=create_refresh_token(user.username, claims=version_claims(user))
+    )
+
+
+async def rotate(token: RefreshTokenSchema):
+    async with session_scope() as db:
+        return await rotate_refresh_token(token, db)
+
+
+async def token_version(user: User) -> int:
+    async with session_scope() as db:
+        return (await db.get(User, user.id)).token_version
+
+
+async def assert_replay_rejected(token: RefreshTokenSchema, user: User) -> None:
+    with pytest.raises(HTTPException) as raised:
+        await rotate(token)
+    assert raised.value.status_code == 401
+    assert await token_version(user) == 1
+    async with session_scope() as db:
+        assert await token_versions.current(user.id, db) == 1
+
+
+async def test_refresh_token_is_single_use(user):
+    token = refresh_token(user)
+    assert (await rotate(token)).id == user.id
+    await assert_replay_rejected(token, user)
+    # Every token minted before the replay is now dead too.
+    with pytest.raises(HTTPException):
+        await rotate(refresh_token(user))
+
+
+async def test_replay_seen_only_by_the_database(user):
+    """Another worker rotated the token; this one has not synced yet."""
+    token = refresh_token(user)
+    await rotate(token)
+    revocations._revoked.clear()
+    await assert_replay_rejected(token, user)
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def principal(user: User):
+    token = create_access_token(user.username, claims=principal_claims(user))
+    async with session_scope() as db:
+        return await get_current_principal(bearer(token), db)
+
+
+async def test_principal_comes_from_the_claims(user):
+    assert (await principal(user)).email == user.email
+
+
+@pytest.mark.parametrize("flag", ["verified", "active"])
+async def test_unverified_or_inactive_principal_is_rejected(user, flag):
+    setattr(user, flag, False)
+    with pytest.raises(HTTPException) as raised:
+        await principal(user)
+    assert raised.value.status_code == 403
+
+
+async def test_verification_invalidates_older_tokens(user):
+    token = create_access_token(user.username, claims=principal_claims(user))
+    async with session_scope() as db:
+        await verify_email_repository(
+            VerifyEmailSchema(token=create_verification_token(user.username)), db
+        )
+    with pytest.raises(HTTPException) as raised:
+        async with session_scope() as db:
+            await get_current_principal(bearer(token), db)
+    assert raised.value.status_code == 401
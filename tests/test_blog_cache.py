@@ -0,0 +1,32 @@
+import pytest
+
+from app.blog import cache as blog_cache
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeRequest:
+    url = "http://test/blogs/"
+
+
+def page(title: str) -> dict:
+    item = {"id": 1, "title": title, "created_at": "2024-01-02T03:04:05"}
+    return {"items": [item], "next": None, "prev": None}
+
+
+@pytest.mark.parametrize("responses_cached", [True, False])
+async def test_pages_are_cached_only_when_enabled(
+    responses_cached, unique, monkeypatch
+):
+    # Set when the cache is per-process and there are several workers.
+    monkeypatch.setattr(blog_cache, "responses_cached", responses_cached)
+    loaded = []
+
+    async def load(title: str) -> dict:
+        loaded.append(title)
+        return page(title)
+
+    for title in ("a", "b"):
+        entry = await blog_cache.cached_page(unique, FakeRequest(), lambda: load(title))
+    assert loaded == (["a"] if responses_cached else ["a", "b"])
+    assert entry["body"]["items"][0]["title"] == loaded[-1]
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.cache.backends import MemoryBackend, RedisBackend, RedisConnection, RedisError
+from app.cache.lru import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache("test_expiry", 10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+    cache.set("c", 3, ttl=600)
+    clock.now += 10
+    assert (cache.get("a"), cache.get("b")) == (1, None)
+    clock.now += 50
+    # Per-entry ttls are capped by the cache's own.
+    assert cache.get("c") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = TTLCache("test_lru", 2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_ignores_expired_ttl():
+    cache = TTLCache("test_negative", 2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a", "missing") == "missing"
+
+
+async def test_memory_backend(clock):
+    backend = MemoryBackend(10, ttl=60)
+    assert await backend.get("key") is None
+    await backend.set("key", b"value", ttl=30)
+    assert await backend.get("key") == b"value"
+    await backend.delete("key", "other")
+    assert await backend.get("key") is None
+    await backend.set("key", b"value", ttl=30)
+    clock.now += 31
+    assert await backend.get("key") is None
+
+
+async def test_resp_replies():
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"*4\r\n:1\r\n$-1\r\n*1\r\n$3\r\nabc\r\n+OK\r\n-ERR nope\r\n")
+    connection = RedisConnection(reader, None)
+    assert await connection._read_reply() == [1, None, [b"abc"], b"OK"]
+    with pytest.raises(RedisError, match="ERR nope"):
+        await connection._read_reply()
+
+
+def test_resp_commands():
+    assert RedisConnection._encode(["SET", "k", b"v\r\n", 5]) == (
+        b"*4\r\n$3\r\nSET\r\n$1\r\nk\r\n$3\r\nv\r\n\r\n$1\r\n5\r\n"
+    )
+
+
+async def test_redis_hit_miss_invalidate(fake_redis):
+    backend = RedisBackend(fake_redis.url, pool_size=2)
+    assert await backend.get("key") is None
+    await backend.set("key", b"value", ttl=30)
+    assert await backend.get("key") == b"value"
+    await backend.delete("key")
+    assert await backend.get("key") is None
+    assert [b"SET", b"key", b"value", b"EX", b"30"] in fake_redis.commands
+    # Sequential commands share one pooled connection.
+    assert fake_redis.connections == 1
+    await backend.close()
+
+
+async def test_redis_auth_and_select(fake_redis):
+    fake_redis.password = "secret"
+    url = fake_redis.url.replace("/0", "/3")
+    backend = RedisBackend(url, pool_size=1)
+    await backend.set("key", b"value", ttl=30)
+    assert fake_redis.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"3"]]
+    assert await backend.get("key") == b"value"
+    await backend.close()
+
+
+async def test_redis_error_reply_is_a_miss(fake_redis):
+    fake_redis.password = "secret"
+    backend = RedisBackend(fake_redis.url.replace("secret", "wrong"), pool_size=1)
+    assert await backend.get("key") is None
+    await backend.set("key", b"value", ttl=30)
+    assert b"key" not in fake_redis.data
+    await backend.close()
+
+
+async def test_redis_unreachable_is_a_miss(closed_url):
+    backend = RedisBackend(closed_url, pool_size=1)
+    assert await backend.get("key") is None
+    await backend.set("key", b"value", ttl=30)
+    await backend.delete("key")
+    await backend.close()
+
+
+async def test_redis_slow_server_is_a_miss(fake_redis):
+    fake_redis.hang = True
+    backend = RedisBackend(fake_redis.url, pool_size=1, timeout=0.1)
+    assert await backend.get("key") is None
+    await backend.close()
+
+
+async def test_redis_reconnects_after_restart(fake_redis):
+    backend = RedisBackend(fake_redis.url, pool_size=1)
+    await backend.set("key", b"value", ttl=30)
+    await fake_redis.stop()
+    # The pooled connection is dead: this command fails open and drops it.
+    assert await backend.get("key") is None
+    await fake_redis.start()
+    assert await backend.get("key") == b"value"
+    await backend.close()
+
+
+async def test_redis_against_server(redis_url, unique):
+    backend = RedisBackend(redis_url, pool_size=2)
+    key = unique + "key"
+    assert await backend.get(key) is None
+    await backend.set(key, b"value", ttl=30)
+    assert await backend.get(key) == b"value"
+    assert await backend.execute("TTL", key) in range(1, 31)
+    await backend.delete(key)
+    assert await backend.get(key) is None
+    await backend.close()
@@ -0,0 +1,170 @@
+import gzip
+
+import pytest
+from starlette.datastructures import Headers
+
+from app.cache.lru import TTLCache
+from app.compression import CompressionMiddleware, negotiate
+
+pytestmark = pytest.mark.anyio
+
+MINIMUM = 100
+JSON = b'{"items": [' + b'"abcdef", ' * 50 + b'"end"]}'
+
+
+def app(body: bytes, content_type="application/json", chunks=1, status=200, **headers):
+    if content_type:
+        headers["content-type"] = content_type
+    if chunks == 1 and status != 304:
+        headers["content-length"] = str(len(body))
+
+    async def asgi(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+            }
+        )
+        if scope["method"] == "HEAD" or not body:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        size = -(-len(body) // chunks)
+        for start in range(0, len(body), size):
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": body[start : start + size],
+                    "more_body": start + size < len(body),
+                }
+            )
+
+    return asgi
+
+
+async def call(asgi, accept="gzip", method="GET", cache=None):
+    middleware = CompressionMiddleware(
+        asgi, ["gzip"], minimum_size=MINIMUM, cache=cache
+    )
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/blogs/",
+        "query_string": b"",
+        "headers": [(b"accept-encoding", accept.encode())],
+    }
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, None, send)
+    headers = Headers(raw=messages[0]["headers"])
+    body = b"".join(m.get("body", b"") for m in messages[1:])
+    return headers, body
+
+
+@pytest.mark.parametrize(
+    "accept, expected",
+    [
+        ("gzip", "gzip"),
+        ("br;q=1, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+        ("*", "gzip"),
+        ("", None),
+    ],
+)
+def test_negotiate(accept, expected):
+    assert negotiate(accept, ["gzip"]) == expected
+
+
+async def test_large_body_is_compressed():
+    headers, body = await call(app(JSON, etag='"v1"'))
+    assert gzip.decompress(body) == JSON
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body))
+    assert headers["etag"] == 'W/"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+
+
+async def test_streamed_body_is_compressed():
+    headers, body = await call(app(JSON, chunks=4))
+    assert gzip.decompress(body) == JSON
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+
+
+@pytest.mark.parametrize(
+    "body, content_type, headers",
+    [
+        (b'{"a": 1}', "application/json", {}),
+        (JSON, "image/png", {}),
+        (JSON, "application/json", {"cache-control": "no-transform"}),
+        (JSON, "application/json", {"content-encoding": "br"}),
+    ],
+)
+async def test_ineligible_responses_pass_through(body, content_type, headers):
+    response_headers, response_body = await call(
+        app(body, content_type, **dict(headers))
+    )
+    assert response_body == body
+    assert response_headers.get("content-encoding") == headers.get("content-encoding")
+
+
+async def test_small_body_keeps_vary():
+    headers, body = await call(app(b'{"a": 1}', etag='"v1"'))
+    assert body == b'{"a": 1}'
+    assert headers["etag"] == '"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+
+
+async def test_identity_request_keeps_strong_etag_and_vary():
+    headers, body = await call(app(JSON, etag='"v1"'), accept="identity")
+    assert body == JSON
+    assert headers["etag"] == '"v1"'
+    assert headers["vary"] == "Accept-Encoding"
+
+
+async def test_compressed_body_is_cached_by_etag():
+    cache = TTLCache("test_compressed", 10, ttl=60)
+    first = await call(app(JSON, etag='"v1"'), cache=cache)
+    second = await call(app(JSON, etag='"v1"'), cache=cache)
+    assert second == first
+    assert cache.stats()["hits"] == 1
+    await call(app(JSON, etag='"v2"'), cache=cache)
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("accept, etag", [("gzip", 'W/"v1"'), ("identity", '"v1"')])
+async def test_not_modified_matches_the_full_response(accept, etag):
+    headers, body = await call(app(b"", None, status=304, etag='"v1"'), accept)
+    assert body == b""
+    assert headers["etag"] == etag
+    assert headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in headers
+
+
+async def test_not_modified_precompressed_keeps_its_etag():
+    """A .gz sidecar's ETag already names the encoded bytes."""
+    response = app(b"", None, status=304, etag='"gz"', **{"content-encoding": "gzip"})
+    headers, _ = await call(response)
+    assert headers["etag"] == '"gz"'
+
+
+async def test_head_matches_get():
+    get, _ = await call(app(JSON, etag='"v1"'))
+    head, body = await call(app(JSON, etag='"v1"'), method="HEAD")
+    assert body == b""
+    assert (head["etag"], head["vary"]) == (get["etag"], get["vary"])
+    assert head["content-length"] == str(len(JSON))
+    head, _ = await call(app(JSON, "image/png", etag='"v1"'), method="HEAD")
+    assert head["etag"] == '"v1"'
+    assert "vary" not in head
+
+
+async def test_vary_is_not_repeated():
+    headers, _ = await call(app(JSON, vary="Accept-Encoding"))
+    assert headers["vary"] == "Accept-Encoding"
+    headers, _ = await call(app(JSON, vary="Origin"))
+    assert headers["vary"] == "Origin, Accept-Encoding"
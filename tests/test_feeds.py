@@ -0,0 +1,174 @@
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.cache.backends import RedisBackend
+from app.cache.feeds import FEED_SCRIPTS, MemoryFeedStore, RedisFeedStore
+
+pytestmark = pytest.mark.anyio
+
+MAX_LENGTH = 3
+
+
+def entry(id: int, **fields) -> tuple:
+    return (id * 10, id, {"id": id, "title": f"t{id}", **fields})
+
+
+def ids(feed) -> list:
+    return [item["id"] for item in feed.items]
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def store(request):
+    """The same behaviour is expected of both stores; the Redis one runs
+    the Lua scripts, so it needs TEST_REDIS_URL."""
+    if request.param == "memory":
+        yield MemoryFeedStore(MAX_LENGTH, ttl=60, maxsize=100)
+        return
+    redis = RedisBackend(request.getfixturevalue("redis_url"), pool_size=2)
+    yield RedisFeedStore(redis, MAX_LENGTH, ttl=60)
+    await redis.close()
+
+
+@pytest.fixture
+def name(unique) -> str:
+    return unique + "feed"
+
+
+async def build(store, name, entries, total=None) -> None:
+    version = await store.version(name)
+    total = len(entries) if total is None else total
+    assert await store.replace(name, entries, total, version)
+
+
+async def test_missing_feed(store, name):
+    assert await store.read(name, 10) is None
+    assert await store.version(name) == 0
+
+
+async def test_replace_and_read(store, name):
+    await build(store, name, [entry(1), entry(3), entry(2)], total=7)
+    feed = await store.read(name, 2)
+    assert ids(feed) == [3, 2]
+    assert (feed.total, feed.stored) == (7, 3)
+    assert feed.covers(2) and not feed.covers(5)
+    assert ids(await store.read(name, 0)) == []
+
+
+async def test_replace_keeps_the_newest(store, name):
+    await build(store, name, [entry(5), entry(4), entry(3), entry(2)])
+    feed = await store.read(name, 10)
+    assert ids(feed) == [5, 4, 3]
+    assert (feed.total, feed.stored) == (4, 3)
+
+
+async def test_items_come_back_as_json(store, name):
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    await build(store, name, [entry(1, created_at=created)])
+    feed = await store.read(name, 1)
+    assert feed.items[0]["created_at"] == "2024-01-02T03:04:05"
+
+
+async def test_empty_feed_is_built(store, name):
+    await build(store, name, [])
+    feed = await store.read(name, 10)
+    assert (feed.items, feed.total) == ([], 0)
+    assert feed.covers(10)
+    await store.add(name, [entry(1)])
+    assert ids(await store.read(name, 10)) == [1]
+
+
+async def test_stale_rebuild_is_rejected(store, name):
+    version = await store.version(name)
+    # A write between reading the table and storing the rebuild.
+    await store.add(name, [entry(1)])
+    assert not await store.replace(name, [], 0, version)
+    assert await store.read(name, 10) is None
+    await build(store, name, [entry(1)])
+
+
+async def test_patches_to_unbuilt_feeds_are_ignored(store, name):
+    await store.add(name, [entry(1)])
+    await store.merge(name, {1: {"title": "x"}})
+    await store.remove(name, [1])
+    assert await store.read(name, 10) is None
+    assert await store.version(name) == 3
+
+
+async def test_add(store, name):
+    await build(store, name, [entry(2), entry(4)])
+    await store.add(name, [entry(3), entry(4, title="new")])
+    feed = await store.read(name, 10)
+    assert ids(feed) == [4, 3, 2]
+    assert feed.items[0]["title"] == "new"
+    assert feed.total == 3
+    # Past max_length the oldest items fall off; total keeps counting.
+    await store.add(name, [entry(5)])
+    feed = await store.read(name, 10)
+    assert ids(feed) == [5, 4, 3]
+    assert (feed.total, feed.stored) == (4, 3)
+
+
+async def test_merge(store, name):
+    await build(store, name, [entry(1), entry(2)])
+    await store.merge(name, {1: {"title": "changed"}, 9: {"title": "absent"}})
+    feed = await store.read(name, 10)
+    assert feed.items == [
+        {"id": 2, "title": "t2"},
+        {"id": 1, "title": "changed"},
+    ]
+
+
+async def test_remove(store, name):
+    await build(store, name, [entry(1), entry(2), entry(3)], total=5)
+    await store.remove(name, [2])
+    feed = await store.read(name, 10)
+    assert ids(feed) == [3, 1]
+    assert feed.total == 4
+    await store.remove(name, [1, 3, 7, 8, 9])
+    assert (await store.read(name, 10)).total == 0
+
+
+async def test_writes_bump_the_version(store, name):
+    await build(store, name, [entry(1)])
+    version = await store.version(name)
+    await store.merge(name, {1: {"title": "x"}})
+    assert await store.version(name) == version + 1
+
+
+async def test_redis_store_loads_scripts_on_noscript(fake_redis):
+    fake_redis.scripts[FEED_SCRIPTS["read"]] = lambda keys, args: [
+        2,
+        1,
+        [orjson.dumps({"id": 1}), None],
+    ]
+    redis = RedisBackend(fake_redis.url, pool_size=1)
+    store = RedisFeedStore(redis, MAX_LENGTH, ttl=60)
+    for _ in range(2):
+        feed = await store.read("feed", 2)
+        assert (ids(feed), feed.total, feed.stored) == ([1], 2, 1)
+    assert [command[0] for command in fake_redis.commands] == [
+        b"EVALSHA",
+        b"EVAL",
+        b"EVALSHA",
+    ]
+    assert fake_redis.commands[1][2:6] == [
+        b"3",
+        b"feed:ids",
+        b"feed:items",
+        b"feed:meta",
+    ]
+    await redis.close()
+
+
+async def test_redis_store_fails_open(closed_url):
+    redis = RedisBackend(closed_url, pool_size=1)
+    store = RedisFeedStore(redis, MAX_LENGTH, ttl=60)
+    assert await store.read("feed", 10) is None
+    assert await store.version("feed") == -1
+    assert not await store.replace("feed", [entry(1)], 1, 0)
+    await store.add("feed", [entry(1)])
+    await store.merge("feed", {1: {"title": "x"}})
+    await store.remove("feed", [1])
+    await redis.close()
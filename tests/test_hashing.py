@@ -0,0 +1,41 @@
+import os
+import signal
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.hashing import HashingService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def service():
+    service = HashingService(max_workers=1, max_pending=2, retry_after=3)
+    yield service
+    service.shutdown()
+
+
+async def test_hash_and_verify(service):
+    hashed = await service.hash("secret")
+    assert await service.verify("secret", hashed)
+    assert not await service.verify("other", hashed)
+    assert service.stats.calls == 3
+
+
+async def test_dead_worker_is_replaced(service):
+    pid = await service.warmup()
+    broken = service.executor
+    os.kill(pid, signal.SIGKILL)
+    hashed = await service.hash("secret")
+    assert service.executor is not broken
+    assert await service.verify("secret", hashed)
+
+
+async def test_full_queue_is_rejected(service):
+    service.pending = service.max_pending
+    with pytest.raises(HTTPException) as raised:
+        await service.hash("secret")
+    assert raised.value.status_code == 503
+    assert raised.value.headers == {"Retry-After": "3"}
+    assert service.stats.rejected == 1
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+
+from app.database import session_scope
+from app.jobs import Job, JobQueue
+from app.jobs.model import FAILED, PENDING, RUNNING
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def queue(database) -> JobQueue:
+    return JobQueue(
+        concurrency=2,
+        poll_seconds=1,
+        lease_seconds=60,
+        max_attempts=2,
+        backoff_seconds=10,
+        backoff_max_seconds=30,
+    )
+
+
+async def enqueue(queue: JobQueue, kind: str = "test", **payload) -> int:
+    async with session_scope() as db:
+        job = queue.enqueue(db, kind, payload)
+        await db.commit()
+    return job.id
+
+
+async def load(id: int):
+    async with session_scope() as db:
+        return (await db.execute(select(Job).where(Job.id == id))).scalar()
+
+
+def test_backoff_doubles_up_to_the_cap(queue, monkeypatch):
+    monkeypatch.setattr("app.jobs.queue.random.uniform", lambda low, high: high)
+    assert [queue.backoff(attempts) for attempts in (1, 2, 3, 4)] == [10, 20, 30, 30]
+    monkeypatch.setattr("app.jobs.queue.random.uniform", lambda low, high: low)
+    assert queue.backoff(2) == 10
+
+
+async def test_claim_takes_a_lease(queue):
+    id = await enqueue(queue)
+    assert [row.id for row in await queue._claim(10)] == [id]
+    job = await load(id)
+    assert (job.status, job.attempts) == (RUNNING, 1)
+    assert job.locked_until > datetime.utcnow() + timedelta(seconds=50)
+    # Leased jobs are not handed out twice.
+    assert await queue._claim(10) == []
+
+
+async def test_expired_lease_is_claimed_again(queue):
+    id = await enqueue(queue)
+    await queue._claim(10)
+    async with session_scope() as db:
+        await db.execute(
+            update(Job)
+            .where(Job.id == id)
+            .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+    rows = await queue._claim(10)
+    assert [(row.id, row.attempts) for row in rows] == [(id, 2)]
+
+
+async def test_jobs_are_not_claimed_before_run_at(queue):
+    async with session_scope() as db:
+        queue.enqueue(db, "test", {}, delay=60)
+        await db.commit()
+    assert await queue._claim(10) == []
+
+
+async def test_success_deletes_the_job(queue):
+    seen = []
+
+    @queue.handler("test")
+    async def handle(payload: dict) -> None:
+        seen.append(payload)
+
+    id = await enqueue(queue, value=1)
+    for row in await queue._claim(10):
+        await queue.run_job(*row)
+    assert seen == [{"value": 1}]
+    assert await load(id) is None
+
+
+async def test_failures_retry_with_backoff_then_fail(queue):
+    @queue.handler("test")
+    async def handle(payload: dict) -> None:
+        raise RuntimeError("boom")
+
+    id = await enqueue(queue)
+    for row in await queue._claim(10):
+        await queue.run_job(*row)
+    job = await load(id)
+    assert (job.status, job.locked_until) == (PENDING, None)
+    assert job.last_error == "RuntimeError: boom"
+    delay = (job.run_at - datetime.utcnow()).total_seconds()
+    assert 3 < delay <= 10
+    # Not due until the backoff has passed.
+    assert await queue._claim(10) == []
+
+    async with session_scope() as db:
+        await db.execute(
+            update(Job).where(Job.id == id).values(run_at=datetime.utcnow())
+        )
+        await db.commit()
+    for row in await queue._claim(10):
+        await queue.run_job(*row)
+    job = await load(id)
+    assert (job.status, job.attempts) == (FAILED, 2)
+
+
+async def test_unknown_kind_fails_at_once(queue):
+    id = await enqueue(queue, kind="missing")
+    for row in await queue._claim(10):
+        await queue.run_job(*row)
+    job = await load(id)
+    assert (job.status, job.attempts) == (FAILED, 1)
+    assert job.last_error.startswith("LookupError")
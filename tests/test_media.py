@@ -0,0 +1,81 @@
+import pytest
+from starlette.requests import Request
+
+from app.media.serving import media_response, parse_range
+
+pytestmark = pytest.mark.anyio
+
+NAME = "0123456789abcdef0123456789abcdef.txt"
+BODY = b"0123456789" * 10
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=95-200", (95, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        (" bytes = 5-5", (5, 5)),
+        ("bytes=100-", None),
+        ("bytes=100-120", None),
+        ("bytes=10-5", None),
+        ("bytes=-0", None),
+        ("bytes=0-1,5-6", None),
+        ("items=0-9", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_range(header, expected):
+    assert parse_range(header, len(BODY)) == expected
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / NAME).write_bytes(BODY)
+
+
+async def get(**headers):
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/media/{NAME}",
+        "query_string": b"",
+        "headers": [
+            (k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()
+        ],
+    }
+    return await media_response(Request(scope), NAME, precompressed=False)
+
+
+async def test_suffix_range(media):
+    response = await get(range="bytes=-10")
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 90-99/100"
+    assert (response.offset, response.count) == (90, 10)
+
+
+async def test_unsatisfiable_range(media):
+    response = await get(range="bytes=100-")
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+async def test_if_range_mismatch_sends_everything(media):
+    etag = (await get()).headers["etag"]
+    response = await get(range="bytes=0-9", if_range=etag)
+    assert response.status_code == 206
+    response = await get(range="bytes=0-9", if_range='"stale"')
+    assert response.status_code == 200
+    assert (response.offset, response.count) == (0, len(BODY))
+    assert "content-range" not in response.headers
+
+
+async def test_not_modified(media):
+    etag = (await get()).headers["etag"]
+    for tag in (etag, f"W/{etag}", f'"other", {etag}'):
+        assert (await get(if_none_match=tag)).status_code == 304
+    assert (await get(if_none_match='"other"')).status_code == 200
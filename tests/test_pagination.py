@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.blog.model import Blog
+from app.blog.queries import BLOG_KEYSET, blog_listing
+from app.database import session_scope
+from app.pagination import CursorParams, decode_cursor, encode_cursor, paginate
+from app.pagination.cursor import NEXT, PREV, _b64decode, _b64encode
+
+pytestmark = pytest.mark.anyio
+
+CREATED = datetime(2024, 1, 1)
+
+
+def request(cursor=None) -> Request:
+    query = f"limit=2&cursor={cursor}" if cursor else "limit=2"
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "scheme": "http",
+            "server": ("test", 80),
+            "path": "/blogs/",
+            "query_string": query.encode(),
+            "headers": [],
+        }
+    )
+
+
+def cursor_of(link: str) -> str:
+    return parse_qs(urlsplit(link).query)["cursor"][0]
+
+
+def test_cursor_round_trip():
+    values = (CREATED, 7)
+    assert decode_cursor(encode_cursor(values), BLOG_KEYSET) == (NEXT, values)
+    assert decode_cursor(encode_cursor(values, PREV), BLOG_KEYSET) == (PREV, values)
+
+
+def tampered() -> list:
+    payload, signature = encode_cursor((CREATED, 7)).split(".")
+    forged = _b64encode(_b64decode(payload).replace(b"7", b"8"))
+    return [
+        f"{forged}.{signature}",
+        f"{payload}.{_b64encode(b'x' * 16)}",
+        payload,
+        "not.base64!",
+        encode_cursor((CREATED,)),
+        encode_cursor((CREATED, 7), "sideways"),
+        encode_cursor(("yesterday", 7)),
+    ]
+
+
+@pytest.mark.parametrize("cursor", tampered())
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor, BLOG_KEYSET)
+    assert raised.value.status_code == 400
+
+
+async def test_next_and_prev_links_round_trip(database):
+    async with session_scope() as db:
+        db.add_all(
+            Blog(id=id, title=f"t{id}", created_at=CREATED + timedelta(minutes=id))
+            for id in range(1, 6)
+        )
+        await db.commit()
+
+    async def page(cursor=None) -> dict:
+        async with session_scope() as db:
+            return await paginate(
+                db,
+                blog_listing(),
+                BLOG_KEYSET,
+                CursorParams(limit=2, cursor=cursor),
+                request(cursor),
+            )
+
+    def ids(page: dict) -> list:
+        return [row.id for row in page["items"]]
+
+    first = await page()
+    assert (ids(first), first["prev"]) == ([5, 4], None)
+    second = await page(cursor_of(first["next"]))
+    assert ids(second) == [3, 2]
+    last = await page(cursor_of(second["next"]))
+    assert (ids(last), last["next"]) == ([1], None)
+    # Walking back lands on the same pages.
+    assert ids(await page(cursor_of(last["prev"]))) == [3, 2]
+    back = await page(cursor_of(second["prev"]))
+    assert (ids(back), back["prev"]) == ([5, 4], None)
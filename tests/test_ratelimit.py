@@ -0,0 +1,146 @@
+import importlib
+
+import pytest
+from fastapi import Body, Depends, FastAPI, HTTPException
+from fastapi.exception_handlers import (
+    http_exception_handler,
+    request_validation_exception_handler,
+)
+from fastapi.exceptions import RequestValidationError
+from fastapi.testclient import TestClient
+
+from app.ratelimit import (
+    MemoryRateLimitBackend,
+    RateLimiter,
+    RedisRateLimitBackend,
+    Rule,
+    keep_rate_limit_headers,
+    parse_rate,
+    rate_limit,
+)
+from app.ratelimit.backends import TOKEN_BUCKET_SCRIPT
+
+pytestmark = pytest.mark.anyio
+
+RATE = parse_rate("3/minute")
+
+
+@pytest.fixture(params=["memory", "redis"])
+async def backend(request, unique):
+    """Both backends must make the same decisions for the same clock; the
+    Redis one runs the Lua scripts, so it needs TEST_REDIS_URL."""
+    if request.param == "memory":
+        yield MemoryRateLimitBackend(100)
+        return
+    url = request.getfixturevalue("redis_url")
+    backend = RedisRateLimitBackend(url, pool_size=2, prefix=unique)
+    yield backend
+    await backend.close()
+
+
+async def hits(backend, count: int, algorithm: str, key: str = "key") -> list:
+    return [await backend.hit(key, RATE, algorithm) for _ in range(count)]
+
+
+async def test_token_bucket(backend, clock):
+    decisions = await hits(backend, 4, "token_bucket")
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions] == [2, 1, 0, 0]
+    assert decisions[-1].retry_after == 20
+    assert decisions[-1].headers()["Retry-After"] == "20"
+    # One token comes back every period / limit seconds.
+    clock.now += 20
+    assert [d.allowed for d in await hits(backend, 2, "token_bucket")] == [
+        True,
+        False,
+    ]
+    clock.now += 60
+    decision = await backend.hit("key", RATE, "token_bucket")
+    assert (decision.allowed, decision.remaining) == (True, 2)
+
+
+async def test_sliding_window(backend, clock):
+    # 40 seconds into a fixed window.
+    decisions = await hits(backend, 4, "sliding_window")
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert decisions[-1].retry_after == 40
+    # Next window: the previous count is weighted by its remaining overlap.
+    clock.now += 60
+    assert [d.allowed for d in await hits(backend, 3, "sliding_window")] == [
+        True,
+        True,
+        False,
+    ]
+    clock.now += 120
+    assert all(d.allowed for d in await hits(backend, 3, "sliding_window"))
+
+
+async def test_keys_are_independent(backend, clock):
+    await hits(backend, 3, "token_bucket", key="a")
+    assert (await backend.hit("b", RATE, "token_bucket")).allowed
+    assert not (await backend.hit("a", RATE, "token_bucket")).allowed
+
+
+async def test_memory_backend_is_bounded(clock):
+    backend = MemoryRateLimitBackend(2)
+    await hits(backend, 3, "token_bucket", key="a")
+    await backend.hit("b", RATE, "token_bucket")
+    await backend.hit("c", RATE, "token_bucket")
+    # "a" was evicted, so it starts over with a full bucket.
+    assert (await backend.hit("a", RATE, "token_bucket")).remaining == 2
+
+
+async def test_redis_loads_scripts_on_noscript(fake_redis, clock):
+    fake_redis.scripts[TOKEN_BUCKET_SCRIPT] = lambda keys, args: [0, b"0.5"]
+    backend = RedisRateLimitBackend(fake_redis.url, pool_size=1)
+    for _ in range(2):
+        decision = await backend.hit("key", RATE, "token_bucket")
+        assert (decision.allowed, decision.retry_after) == (False, 10)
+    assert [command[0] for command in fake_redis.commands] == [
+        b"EVALSHA",
+        b"EVAL",
+        b"EVALSHA",
+    ]
+    assert fake_redis.commands[1][2:] == [b"1", b"rl:key", b"3", b"60", b"1000000.0"]
+    await backend.close()
+
+
+async def test_redis_fails_open(closed_url):
+    backend = RedisRateLimitBackend(closed_url, pool_size=1)
+    for algorithm in ("token_bucket", "sliding_window"):
+        decision = await backend.hit("key", RATE, algorithm)
+        assert decision.allowed
+        assert decision.remaining == RATE.limit
+    await backend.close()
+
+
+def test_error_responses_keep_the_headers(monkeypatch, clock):
+    rules = {"signin": [Rule("ip", RATE, "token_bucket")]}
+    # The package re-exports the ``limiter`` instance under the module's name.
+    module = importlib.import_module("app.ratelimit.limiter")
+    monkeypatch.setattr(
+        module, "limiter", RateLimiter(MemoryRateLimitBackend(10), rules)
+    )
+    app = FastAPI()
+    app.add_exception_handler(
+        HTTPException, keep_rate_limit_headers(http_exception_handler)
+    )
+    app.add_exception_handler(
+        RequestValidationError,
+        keep_rate_limit_headers(request_validation_exception_handler),
+    )
+
+    @app.post("/signin", dependencies=[Depends(rate_limit("signin"))])
+    async def signin(body: dict = Body(...)):
+        if body.get("ok"):
+            return {}
+        raise HTTPException(status_code=400, detail="Wrong credentials")
+
+    client = TestClient(app)
+    statuses = []
+    for body in ({"ok": True}, {}, "not an object", {}):
+        response = client.post("/signin", json=body)
+        statuses.append(response.status_code)
+        assert "ratelimit-remaining" in response.headers
+    assert statuses == [200, 400, 422, 429]
+    assert response.headers["retry-after"] == "20"
@@ -0,0 +1,51 @@
+import time
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.auth.model import RevokedToken
+from app.database import session_scope
+from app.utils.revocation import revocations
+
+pytestmark = pytest.mark.anyio
+
+
+def jti() -> str:
+    return uuid.uuid4().hex
+
+
+async def test_consume_is_single_use(database):
+    token, exp = jti(), time.time() + 60
+    async with session_scope() as db:
+        assert await revocations.consume(db, token, "refresh", exp)
+        await db.commit()
+    assert revocations.is_revoked(token)
+    async with session_scope() as db:
+        assert not await revocations.consume(db, token, "refresh", exp)
+
+
+async def test_lost_race_keeps_the_callers_transaction(database):
+    used, other, exp = jti(), jti(), time.time() + 60
+    async with session_scope() as db:
+        await revocations.consume(db, used, "refresh", exp)
+        await db.commit()
+    # Another worker consumed ``used``; this one has not synced it yet.
+    revocations._revoked.clear()
+    async with session_scope() as db:
+        revocations.revoke(db, other, "access", exp)
+        assert not await revocations.consume(db, used, "refresh", exp)
+        await db.commit()
+    assert revocations.is_revoked(used) and revocations.is_revoked(other)
+    async with session_scope() as db:
+        stored = set(await db.scalars(select(RevokedToken.jti)))
+    assert stored == {used, other}
+
+
+async def test_rolled_back_revocations_are_discarded(database):
+    token = jti()
+    async with session_scope() as db:
+        revocations.revoke(db, token, "access", time.time() + 60)
+        await db.rollback()
+        await db.commit()
+    assert not revocations.is_revoked(token)
@@ -0,0 +1,53 @@
+import base64
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.upload import upload_file
+
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQ"
+    "AAAABJRU5ErkJggg=="
+)
+SVG = b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg"/>'
+
+
+def data_uri(content_type: str, data: bytes) -> str:
+    return f"data:{content_type};base64, " + base64.b64encode(data).decode()
+
+
+def test_png_round_trip(tmp_path):
+    path = upload_file(data_uri("image/png", PNG), base_dir=str(tmp_path))
+    assert path.endswith(".png")
+    assert open(path, "rb").read() == PNG
+
+
+def test_svg_is_accepted(tmp_path):
+    path = upload_file(data_uri("image/svg+xml", SVG), base_dir=str(tmp_path))
+    assert path.endswith(".svg")
+    assert open(path, "rb").read() == SVG
+
+
+def test_wrapped_base64_is_accepted(tmp_path):
+    encoded = base64.encodebytes(PNG * 50).decode()
+    assert "\n" in encoded
+    path = upload_file("data:image/png;base64, " + encoded, base_dir=str(tmp_path))
+    assert open(path, "rb").read() == PNG * 50
+
+
+@pytest.mark.parametrize(
+    "uri",
+    [
+        "garbage",
+        "data:image/png;base64, ###",
+        data_uri("image/png", SVG),
+        data_uri("image/svg+xml", b"<html>not svg</html>"),
+        data_uri("text/plain", b"hello"),
+    ],
+)
+def test_bad_input_is_rejected(tmp_path, uri):
+    with pytest.raises(HTTPException) as raised:
+        upload_file(uri, base_dir=str(tmp_path))
+    assert raised.value.status_code == 400
+    assert os.listdir(tmp_path) == []